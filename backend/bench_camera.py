@@ -0,0 +1,98 @@
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+from fake_mjpeg_server import FakeMjpegServer, read_index
+from mjpeg_client import MjpegReader
+
+
+def open_reader(kind, url):
+    if kind == 'mjpeg':
+        return MjpegReader(url)
+    cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+
+def measure(kind, server, seconds, work_ms):
+    """Read frames like the detector loop would and record how old each one is"""
+    cap = open_reader(kind, server.url)
+    if not cap.isOpened():
+        return {'reader': kind, 'error': 'could not open stream'}
+
+    ages = []
+    read_times = []
+    frames = 0
+    start = time.time()
+    while time.time() - start < seconds:
+        t0 = time.perf_counter()
+        ret, frame = cap.read()
+        read_times.append((time.perf_counter() - t0) * 1000)
+        if not ret:
+            continue
+        now = time.time()
+        sent = server.sent_at.get(read_index(frame, server.size[0]))
+        if sent is not None:
+            ages.append((now - sent) * 1000)
+        frames += 1
+        # Stand-in for detection work that is slower than the camera
+        time.sleep(work_ms / 1000)
+    cap.release()
+
+    ages = np.array(ages) if ages else np.zeros(1)
+    result = {
+        'reader': kind,
+        'frames': frames,
+        'frame_shape': list(frame.shape) if frames else None,
+        'p50_age_ms': round(float(np.percentile(ages, 50)), 1),
+        'p95_age_ms': round(float(np.percentile(ages, 95)), 1),
+        'max_age_ms': round(float(ages.max()), 1),
+        'read_ms': round(float(np.mean(read_times)), 2)
+    }
+    if kind == 'mjpeg':
+        result.update(cap.stats())
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame age of VideoCapture vs MjpegReader on a fake DroidCam")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--size", default="1280x960", help="camera frame size WxH")
+    parser.add_argument("--work-ms", type=float, default=50,
+                        help="simulated processing time per frame")
+    parser.add_argument("--readers", nargs="+", default=["opencv", "mjpeg"], choices=["opencv", "mjpeg"])
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.split('x'))
+    results = []
+    print(f"{'reader':>8} {'frames':>7} {'p50 age':>8} {'p95 age':>8} {'max age':>8} {'read ms':>8}")
+    for kind in args.readers:
+        # A fresh server per reader so both start from an empty socket
+        server = FakeMjpegServer(0, args.fps, (width, height))
+        try:
+            r = measure(kind, server, args.seconds, args.work_ms)
+        finally:
+            server.close()
+        results.append(r)
+        if 'error' in r:
+            print(f"{kind:>8} ERROR: {r['error']}")
+            continue
+        print(f"{kind:>8} {r['frames']:>7} {r['p50_age_ms']:>8.1f} {r['p95_age_ms']:>8.1f} "
+              f"{r['max_age_ms']:>8.1f} {r['read_ms']:>8.2f}")
+        if kind == 'mjpeg':
+            print(f"{'':>8} decoded at 1/{r['reduction']} scale {r['frame_shape']}, "
+                  f"{r['decode_ms']} ms per decode, {r['skipped']} frames skipped undecoded")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'settings': vars(args), 'results': results}, f, indent=2)
+        print(f"Results saved: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+from bench_features import detector_module
+from cascade import YoloVerifier
+from stone_tracker import iou
+from synthetic_frames import SCENARIOS, generate_scenario
+
+IOU_MATCH = 0.3
+
+
+def match_boxes(detected, truth):
+    """Greedy IoU matching; returns the number of true positives"""
+    pairs = sorted(((iou(d, t), i, j) for i, d in enumerate(detected) for j, t in enumerate(truth)),
+                   reverse=True)
+    used_d, used_t = set(), set()
+    for score, i, j in pairs:
+        if score < IOU_MATCH:
+            break
+        if i in used_d or j in used_t:
+            continue
+        used_d.add(i)
+        used_t.add(j)
+    return len(used_d)
+
+
+def make_detector(args):
+    detector = detector_module.SmartRiceImpurityDetector()
+    detector.feature_engine = args.engine
+    detector.pyramid_scale = args.pyramid_scale
+    if args.cascade_model:
+        detector.verifier = YoloVerifier(args.cascade_model, mode=args.cascade_mode)
+    return detector
+
+
+def run_scenario(name, args):
+    frames = generate_scenario(name, args.frames, args.seed)
+    detector = make_detector(args)
+    detector.detect_impurities(frames[0][0])
+
+    latencies = []
+    true_positives = detections = truths = 0
+    for frame, truth in frames:
+        start = time.perf_counter()
+        _, _, impurities = detector.detect_impurities(frame)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        detected = [imp['bbox'] for imp in impurities]
+        true_positives += match_boxes(detected, truth)
+        detections += len(detected)
+        truths += len(truth)
+
+    latencies = np.array(latencies)
+    return {
+        'scenario': name,
+        'frames': len(frames),
+        'fps': round(len(frames) / (latencies.sum() / 1000), 1),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 2),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 2),
+        'precision': round(true_positives / detections, 3) if detections else 1.0,
+        'recall': round(true_positives / truths, 3) if truths else 1.0,
+        'stones': truths,
+        'detections': detections,
+        'stage2_fraction': detector.verifier.stats()['stage2_fraction'] if detector.verifier else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline speed/accuracy benchmark on synthetic frames")
+    parser.add_argument("--frames", type=int, default=100, help="frames per scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--engine", default="auto", choices=["auto", "components", "contours"])
+    parser.add_argument("--pyramid-scale", type=int, default=1, choices=[1, 2, 4])
+    parser.add_argument("--cascade-model", help="verify detections with this YOLO model (cascade mode)")
+    parser.add_argument("--cascade-mode", default="roi", choices=["roi", "frame"])
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    print(f"{'scenario':>18} {'fps':>7} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} "
+          f"{'precision':>9} {'recall':>7} {'stones':>7}")
+    results = []
+    for name in args.scenarios:
+        r = run_scenario(name, args)
+        results.append(r)
+        print(f"{name:>18} {r['fps']:>7.1f} {r['p50_ms']:>7.2f} {r['p95_ms']:>7.2f} {r['p99_ms']:>7.2f} "
+              f"{r['precision']:>9.3f} {r['recall']:>7.3f} {r['stones']:>7}")
+        if r['stage2_fraction'] is not None:
+            print(f"{'':>18} {r['stage2_fraction']:.1%} of frames reached YOLO verification")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'settings': vars(args), 'results': results}, f, indent=2)
+        print(f"Results saved: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import cv2
+import numpy as np
+import importlib
+import time
+import os
+import sys
+
+# try.py is not importable with a plain import statement
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+detector_module = importlib.import_module("try")
+
+BLOB_COUNTS = [1, 3, 10, 100, 1000]
+REPEATS = 20
+
+
+def make_frame(num_blobs, seed=0):
+    """Light tray with num_blobs dark stones laid out on a grid"""
+    rng = np.random.default_rng(seed)
+    frame = np.full((480, 640, 3), 200, dtype=np.uint8)
+    noise = rng.normal(0, 4, frame.shape)
+    frame = np.clip(frame + noise, 0, 255).astype(np.uint8)
+
+    cols = int(np.ceil(np.sqrt(num_blobs * 640 / 480)))
+    rows = int(np.ceil(num_blobs / cols))
+    cell_w, cell_h = 640 // cols, 480 // rows
+    radius = max(6, min(cell_w, cell_h) // 3)
+
+    for i in range(num_blobs):
+        cx = (i % cols) * cell_w + cell_w // 2
+        cy = (i // cols) * cell_h + cell_h // 2
+        axes = (radius, max(6, int(radius * rng.uniform(0.7, 1.0))))
+        shade = int(rng.integers(40, 90))
+        cv2.ellipse(frame, (cx, cy), axes, float(rng.uniform(0, 180)), 0, 360,
+                    (shade, shade, shade), -1)
+    return frame
+
+
+def time_engine(detector, engine, cleaned, gray):
+    """Average milliseconds per call for one feature engine"""
+    detector.feature_engine = engine
+    extract = detector.extract_features
+    extract(cleaned, gray)
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        result = extract(cleaned, gray)
+    return (time.perf_counter() - start) * 1000 / REPEATS, result
+
+
+def main():
+    print(f"{'blobs':>6} {'contours ms':>12} {'components ms':>14} {'speedup':>8} "
+          f"{'auto ms':>8} {'found':>12}")
+    for num_blobs in BLOB_COUNTS:
+        frame = make_frame(num_blobs)
+        detector = detector_module.SmartRiceImpurityDetector()
+        detector.calibrate_background(frame)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        cleaned = detector.build_impurity_mask(frame, gray)
+
+        legacy_ms, legacy = time_engine(detector, "contours", cleaned, gray)
+        fast_ms, fast = time_engine(detector, "components", cleaned, gray)
+        auto_ms, _ = time_engine(detector, "auto", cleaned, gray)
+
+        legacy_boxes = sorted(imp['bbox'] for imp in legacy)
+        fast_boxes = sorted(imp['bbox'] for imp in fast)
+        match = "same" if legacy_boxes == fast_boxes else "DIFFERENT"
+
+        print(f"{num_blobs:>6} {legacy_ms:>12.2f} {fast_ms:>14.2f} "
+              f"{legacy_ms / fast_ms:>7.1f}x {auto_ms:>8.2f} {len(fast):>5} {match}")
+
+
+if __name__ == "__main__":
+    main()
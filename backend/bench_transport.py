@@ -0,0 +1,161 @@
+import argparse
+import base64
+import json
+import multiprocessing
+import os
+import time
+
+import cv2
+
+from bench_features import make_frame
+from frame_transport import (MSG_DATA, SharedMemoryRingReader, SharedMemoryRingTransport,
+                             StdoutTransport, UnixSocketTransport, read_socket_messages)
+
+SOCKET_PATH = '/tmp/dispenzo_bench.sock'
+SHM_NAME = 'dispenzo_bench'
+DONE = {'done': True}
+
+
+def is_done(payload):
+    return bytes(payload) == json.dumps(DONE).encode('utf-8')
+
+
+def consume_stdout(read_fd, results):
+    """Parent-process equivalent: split lines and base64-decode FRAME: payloads"""
+    start_cpu = time.process_time()
+    frames = 0
+    records = 0
+    payload_bytes = 0
+    with os.fdopen(read_fd, 'r') as stream:
+        for line in stream:
+            if line.startswith('FRAME:'):
+                payload_bytes += len(base64.b64decode(line[6:].strip()))
+                frames += 1
+            elif line.startswith('DATA:'):
+                if json.loads(line[5:]) == DONE:
+                    break
+                records += 1
+    results.put((frames, records, payload_bytes, time.process_time() - start_cpu))
+
+
+def consume_socket(results):
+    start_cpu = time.process_time()
+    frames = 0
+    records = 0
+    payload_bytes = 0
+    while not os.path.exists(SOCKET_PATH):
+        time.sleep(0.01)
+    for kind, payload in read_socket_messages(SOCKET_PATH):
+        if kind == MSG_DATA:
+            if is_done(payload):
+                break
+            records += 1
+            continue
+        payload_bytes += len(payload)
+        frames += 1
+    results.put((frames, records, payload_bytes, time.process_time() - start_cpu))
+
+
+def consume_shm(ready, results):
+    reader = SharedMemoryRingReader(SHM_NAME)
+    ready.set()
+    start_cpu = time.process_time()
+    frames = 0
+    records = 0
+    payload_bytes = 0
+    for seq, kind, payload in reader.messages(idle_sleep=0.0005):
+        if kind == MSG_DATA:
+            if is_done(payload):
+                break
+            records += 1
+            continue
+        size = len(payload)
+        payload.release()
+        # Count only frames that were not overwritten while being read
+        if reader.is_valid(seq, kind):
+            payload_bytes += size
+            frames += 1
+    results.put((frames, records, payload_bytes, time.process_time() - start_cpu))
+    reader.close()
+
+
+def produce(transport, jpegs):
+    start_cpu = time.process_time()
+    for i, jpeg in enumerate(jpegs):
+        transport.send_frame(jpeg)
+        transport.send_data({'frame': i, 'impurities_count': 0, 'status': 'CLEAN'})
+    transport.send_data(DONE)
+    return time.process_time() - start_cpu
+
+
+def bench_stdout(jpegs, results):
+    read_fd, write_fd = os.pipe()
+    consumer = multiprocessing.Process(target=consume_stdout, args=(read_fd, results))
+    consumer.start()
+    os.close(read_fd)
+    with os.fdopen(write_fd, 'w') as stream:
+        start = time.perf_counter()
+        producer_cpu = produce(StdoutTransport(stream), jpegs)
+    consumer.join()
+    return time.perf_counter() - start, producer_cpu
+
+
+def bench_socket(jpegs, results):
+    transport = UnixSocketTransport(SOCKET_PATH)
+    consumer = multiprocessing.Process(target=consume_socket, args=(results,))
+    consumer.start()
+    while not transport.clients:
+        time.sleep(0.01)
+    start = time.perf_counter()
+    producer_cpu = produce(transport, jpegs)
+    consumer.join()
+    elapsed = time.perf_counter() - start
+    transport.close()
+    return elapsed, producer_cpu
+
+
+def bench_shm(jpegs, results):
+    transport = SharedMemoryRingTransport(SHM_NAME, slot_count=64)
+    ready = multiprocessing.Event()
+    consumer = multiprocessing.Process(target=consume_shm, args=(ready, results))
+    consumer.start()
+    ready.wait()
+    start = time.perf_counter()
+    producer_cpu = produce(transport, jpegs)
+    consumer.join()
+    elapsed = time.perf_counter() - start
+    transport.close()
+    return elapsed, producer_cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame throughput and CPU cost of the detector transports")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--transports", nargs="+", default=["stdout", "uds", "shm"],
+                        choices=["stdout", "uds", "shm"])
+    args = parser.parse_args()
+
+    jpegs = []
+    for i in range(args.frames):
+        _, buffer = cv2.imencode('.jpg', make_frame(50, seed=i), [cv2.IMWRITE_JPEG_QUALITY, 70])
+        jpegs.append(buffer)
+    avg_kb = sum(len(j) for j in jpegs) / len(jpegs) / 1024
+    print(f"{args.frames} frames, average JPEG {avg_kb:.1f} KB")
+    # MB/s and CPU are per delivered frame; shm drops frames a slow reader misses,
+    # so compare its numbers together with the delivered column
+    print(f"{'transport':>10} {'sent':>6} {'frames':>7} {'missed':>7} {'records':>8} "
+          f"{'MB/s':>8} {'cpu us/frame':>13}")
+
+    benches = {'stdout': bench_stdout, 'uds': bench_socket, 'shm': bench_shm}
+    for name in args.transports:
+        results = multiprocessing.Queue()
+        elapsed, producer_cpu = benches[name](jpegs, results)
+        frames, records, payload_bytes, consumer_cpu = results.get()
+        cpu_per_frame = (producer_cpu + consumer_cpu) * 1e6 / max(frames, 1)
+        sent = len(jpegs)
+        print(f"{name:>10} {sent:>6} {frames:>7} {sent - frames:>7} {f'{records}/{sent}':>8} "
+              f"{payload_bytes / elapsed / 1e6:>8.1f} {cpu_per_frame:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
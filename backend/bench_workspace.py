@@ -0,0 +1,99 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+from bench_features import detector_module, make_frame
+
+TRACE_FRAMES = 200
+
+
+def rss_mb():
+    """Current resident set size in MB, or None where it cannot be read"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1e6
+    except ImportError:
+        pass
+    # Last resort, Unix only: the peak so far rather than the current size
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1e6 if sys.platform == 'darwin' else 1e3)
+
+
+def process_frame(detector, frame):
+    """Detection plus the drawing done before encoding"""
+    processed, _, impurities = detector.detect_impurities(frame)
+    if impurities:
+        processed = detector.draw_detections(processed, impurities)
+    return detector.draw_overlay(processed, impurities)
+
+
+def make_detector(use_workspace, frames):
+    detector = detector_module.SmartRiceImpurityDetector()
+    detector.workspace.enabled = use_workspace
+    detector.calibrate_background(frames[0])
+    return detector
+
+
+def transient_bytes_per_frame(detector, frames):
+    """Average peak of Python-visible allocations made while processing one frame"""
+    tracemalloc.start()
+    total = 0
+    for i in range(TRACE_FRAMES):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        process_frame(detector, frames[i % len(frames)])
+        _, peak = tracemalloc.get_traced_memory()
+        total += peak - before
+    tracemalloc.stop()
+    return total / TRACE_FRAMES
+
+
+def run(use_workspace, frames, num_frames):
+    detector = make_detector(use_workspace, frames)
+    for frame in frames:
+        process_frame(detector, frame)
+
+    samples = []
+    start = time.perf_counter()
+    for i in range(num_frames):
+        process_frame(detector, frames[i % len(frames)])
+        if i % (num_frames // 10 or 1) == 0:
+            samples.append(rss_mb())
+    fps = num_frames / (time.perf_counter() - start)
+    samples.append(rss_mb())
+
+    return fps, samples, transient_bytes_per_frame(detector, frames)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Workspace vs per-frame allocation benchmark")
+    parser.add_argument("--frames", type=int, default=10000, help="frames per run")
+    args = parser.parse_args()
+
+    frames = [make_frame(n, seed=n) for n in (1, 5, 10, 20, 40, 80)]
+    results = {}
+    for use_workspace in (False, True):
+        name = 'workspace' if use_workspace else 'allocating'
+        fps, samples, transient = run(use_workspace, frames, args.frames)
+        results[name] = fps
+        rss = " ".join(f"{mb:.0f}" if mb is not None else "-" for mb in samples)
+        print(f"{name:>10}: {fps:7.1f} fps | transient alloc {transient / 1024:8.1f} KB/frame "
+              f"| RSS MB over run: {rss}")
+
+    print(f"throughput gain: {results['workspace'] / results['allocating']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from export_model import list_images
+
+
+def peak_memory_mb():
+    """Peak resident memory of this process, or None where it cannot be read"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return round(peak / 1024 / (1024 if sys.platform == 'darwin' else 1), 1)
+    except ImportError:
+        pass
+    # Windows has no resource module; psutil exposes the peak working set there
+    try:
+        import psutil
+        peak = getattr(psutil.Process().memory_info(), 'peak_wset', None)
+    except ImportError:
+        return None
+    return round(peak / 1024 / 1024, 1) if peak is not None else None
+
+
+def benchmark_model(model_path, image_paths, conf, warmup, data_yaml):
+    """Runs in its own process so load time and memory are measured in isolation"""
+    from ultralytics import YOLO
+
+    images = [cv2.resize(cv2.imread(p), (640, 480)) for p in image_paths]
+    start = time.perf_counter()
+    model = YOLO(model_path, task='detect')
+    model(images[0], conf=conf, verbose=False)
+    load_s = time.perf_counter() - start
+
+    for image in images[:warmup]:
+        model(image, conf=conf, verbose=False)
+
+    latencies = []
+    detections = 0
+    run_start = time.perf_counter()
+    for image in images:
+        start = time.perf_counter()
+        results = model(image, conf=conf, verbose=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+        detections += sum(len(r.boxes) for r in results)
+    total = time.perf_counter() - run_start
+
+    result = {
+        'model': model_path,
+        'load_s': round(load_s, 2),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 2),
+        'fps': round(len(images) / total, 1),
+        'detections': detections,
+        'peak_mb': peak_memory_mb(),
+        'map50': None,
+        'map50_95': None
+    }
+    if data_yaml:
+        metrics = model.val(data=data_yaml, imgsz=640, batch=1, device='cpu', plots=False, verbose=False)
+        result['map50'] = round(float(metrics.box.map50), 4)
+        result['map50_95'] = round(float(metrics.box.map), 4)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PyTorch and exported YOLO models on CPU")
+    parser.add_argument("models", nargs="+", help=".pt weights, .onnx files and/or *_openvino_model folders")
+    parser.add_argument("--images", required=True, help="folder of rice frames to time on")
+    parser.add_argument("--limit", type=int, default=200, help="frames used for timing")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--conf", type=float, default=0.1)
+    parser.add_argument("--data", help="labelled dataset yaml; adds mAP50 and mAP50-95")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    paths = list_images(args.images, args.limit)
+    if not paths:
+        parser.error(f"No images in {args.images}")
+
+    print(f"{'model':>40} {'load s':>7} {'p50 ms':>7} {'p95 ms':>7} {'fps':>6} {'peak MB':>8} "
+          f"{'mAP50':>6} {'mAP50-95':>8}")
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for model_path in args.models:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            try:
+                r = pool.submit(benchmark_model, model_path, paths, args.conf, args.warmup,
+                                args.data).result()
+            except Exception as e:
+                print(f"ERROR: {model_path}: {str(e)}", file=sys.stderr)
+                continue
+        results.append(r)
+        name = os.path.basename(os.path.normpath(model_path))
+        fmt = lambda v, spec: format(v, spec) if v is not None else '-'
+        print(f"{name:>40} {r['load_s']:>7.2f} {r['p50_ms']:>7.2f} {r['p95_ms']:>7.2f} {r['fps']:>6.1f} "
+              f"{fmt(r['peak_mb'], '>8.1f'):>8} {fmt(r['map50'], '>6.3f'):>6} {fmt(r['map50_95'], '>8.3f'):>8}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'settings': vars(args), 'results': results}, f, indent=2)
+        print(f"Results saved: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
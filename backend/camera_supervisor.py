@@ -0,0 +1,239 @@
+import argparse
+import importlib
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+from frame_transport import StdoutTransport
+
+# Restart backoff for workers that exit: doubles per quick failure up to the cap
+RESTART_BACKOFF = 2.0
+MAX_RESTART_BACKOFF = 30.0
+# A worker that stayed up this long is considered healthy again
+HEALTHY_UPTIME = 60.0
+# Pending DATA records per camera before the worker starts dropping them
+TELEMETRY_QUEUE_SIZE = 1000
+# Supervisor nap when no camera had anything to report
+IDLE_SLEEP = 0.02
+
+
+class QueueTransport:
+    """Worker-side transport that forwards DATA records to the supervisor"""
+
+    name = 'queue'
+
+    def __init__(self, camera_id, telemetry):
+        self.camera_id = camera_id
+        self.telemetry = telemetry
+        self.dropped = 0
+
+    def send_frame(self, jpeg):
+        # Frames stay in the worker; only telemetry is merged
+        pass
+
+    def send_data(self, data):
+        data['camera_id'] = self.camera_id
+        try:
+            self.telemetry.put_nowait(data)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        pass
+
+
+def camera_worker(camera_id, url, telemetry, opencv_threads, pipelined):
+    """Run one detector in its own process"""
+    import cv2
+    cv2.setNumThreads(opencv_threads)
+
+    # Keep stdout for the merged stream; worker chatter goes to stderr
+    sys.stdout = sys.stderr
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    detector_module = importlib.import_module("try")
+    detector = detector_module.SmartRiceImpurityDetector(
+        droidcam_url=url,
+        pipelined=pipelined,
+        transport=QueueTransport(camera_id, telemetry)
+    )
+    detector.run()
+
+
+class CameraWorker:
+    """Supervisor-side bookkeeping for one camera process"""
+
+    def __init__(self, camera_id, url):
+        self.camera_id = camera_id
+        self.url = url
+        self.process = None
+        self.telemetry = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.backoff = RESTART_BACKOFF
+        self.next_start = 0.0
+
+        self.frames = 0
+        self.latencies = deque(maxlen=300)
+        self.last_fps = 0.0
+        self.last_seen = 0.0
+
+
+class CameraSupervisor:
+    """Runs one detector process per camera and merges their DATA telemetry"""
+
+    def __init__(self, camera_urls, opencv_threads=1, pipelined=False, report_interval=5.0):
+        self.workers = [CameraWorker(f"cam{i + 1}", url) for i, url in enumerate(camera_urls)]
+        self.opencv_threads = opencv_threads
+        self.pipelined = pipelined
+        self.report_interval = report_interval
+        self.output = StdoutTransport()
+
+    def start_worker(self, worker):
+        # A worker killed mid-put can leave its queue locked or half-written, so every
+        # process gets its own queue and it is thrown away with the process
+        worker.telemetry = multiprocessing.Queue(maxsize=TELEMETRY_QUEUE_SIZE)
+        worker.process = multiprocessing.Process(
+            target=camera_worker,
+            args=(worker.camera_id, worker.url, worker.telemetry,
+                  self.opencv_threads, self.pipelined),
+            name=f"detector-{worker.camera_id}",
+            daemon=True
+        )
+        worker.process.start()
+        worker.started_at = time.time()
+        print(f"Started {worker.camera_id} ({worker.url}) pid={worker.process.pid}", file=sys.stderr)
+
+    def check_workers(self):
+        """Restart workers that exited, backing off on repeated failures"""
+        now = time.time()
+        for worker in self.workers:
+            if worker.process is None:
+                if now >= worker.next_start:
+                    self.start_worker(worker)
+                continue
+            if worker.process.is_alive():
+                continue
+
+            uptime = now - worker.started_at
+            print(f"WARNING: {worker.camera_id} exited with code {worker.process.exitcode} "
+                  f"after {uptime:.0f}s", file=sys.stderr)
+            if uptime >= HEALTHY_UPTIME:
+                worker.backoff = RESTART_BACKOFF
+            worker.next_start = now + worker.backoff
+            worker.backoff = min(worker.backoff * 2, MAX_RESTART_BACKOFF)
+            worker.restarts += 1
+            worker.process = None
+            worker.telemetry.close()
+            worker.telemetry = None
+
+    def drain_telemetry(self):
+        """Forward everything the running cameras have queued; returns the record count"""
+        handled = 0
+        for worker in self.workers:
+            if worker.telemetry is None:
+                continue
+            # Bounded per camera so one busy camera cannot starve the others
+            for _ in range(TELEMETRY_QUEUE_SIZE):
+                try:
+                    data = worker.telemetry.get_nowait()
+                except queue.Empty:
+                    break
+                self.handle_record(worker, data)
+                handled += 1
+        return handled
+
+    def handle_record(self, worker, data):
+        worker.frames += 1
+        worker.last_seen = time.time()
+        worker.last_fps = data.get('fps', 0.0)
+        if 'latency_ms' in data:
+            worker.latencies.append(data['latency_ms'])
+        self.output.send_data(data)
+
+    def aggregate(self, window):
+        """Fleet-wide fps/latency over the last reporting window"""
+        cameras = {}
+        all_latencies = []
+        for worker in self.workers:
+            latencies = list(worker.latencies)
+            all_latencies.extend(latencies)
+            cameras[worker.camera_id] = {
+                'alive': worker.process is not None and worker.process.is_alive(),
+                'restarts': worker.restarts,
+                'fps': round(worker.frames / window, 1),
+                'latency_p50_ms': round(float(np.percentile(latencies, 50)), 1) if latencies else None,
+                'latency_p95_ms': round(float(np.percentile(latencies, 95)), 1) if latencies else None
+            }
+            worker.frames = 0
+
+        return {
+            'camera_id': 'all',
+            'cameras_alive': sum(1 for c in cameras.values() if c['alive']),
+            'cameras_total': len(cameras),
+            'total_fps': round(sum(c['fps'] for c in cameras.values()), 1),
+            'latency_p50_ms': round(float(np.percentile(all_latencies, 50)), 1) if all_latencies else None,
+            'latency_p95_ms': round(float(np.percentile(all_latencies, 95)), 1) if all_latencies else None,
+            'cameras': cameras
+        }
+
+    def print_aggregate(self, summary):
+        print(f"\n{'camera':>8} {'alive':>6} {'fps':>6} {'p50 ms':>8} {'p95 ms':>8} {'restarts':>9}",
+              file=sys.stderr)
+        for camera_id, stats in summary['cameras'].items():
+            p50 = f"{stats['latency_p50_ms']:.1f}" if stats['latency_p50_ms'] is not None else "-"
+            p95 = f"{stats['latency_p95_ms']:.1f}" if stats['latency_p95_ms'] is not None else "-"
+            print(f"{camera_id:>8} {str(stats['alive']):>6} {stats['fps']:>6.1f} {p50:>8} {p95:>8} "
+                  f"{stats['restarts']:>9}", file=sys.stderr)
+        print(f"{'total':>8} {summary['cameras_alive']:>6} {summary['total_fps']:>6.1f}", file=sys.stderr)
+
+    def run(self):
+        print(f"Supervising {len(self.workers)} camera(s), "
+              f"{self.opencv_threads} OpenCV thread(s) each", file=sys.stderr)
+        last_report = time.time()
+        try:
+            while True:
+                self.check_workers()
+                if not self.drain_telemetry():
+                    time.sleep(IDLE_SLEEP)
+
+                now = time.time()
+                if now - last_report >= self.report_interval:
+                    summary = self.aggregate(now - last_report)
+                    self.output.send_data(summary)
+                    self.print_aggregate(summary)
+                    last_report = now
+        except KeyboardInterrupt:
+            print("\nStopping cameras...", file=sys.stderr)
+        finally:
+            for worker in self.workers:
+                if worker.process is not None and worker.process.is_alive():
+                    worker.process.terminate()
+                    worker.process.join(timeout=5)
+                if worker.telemetry is not None:
+                    worker.telemetry.close()
+            print("Supervisor stopped", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run one impurity detector per DroidCam stream")
+    parser.add_argument("urls", nargs="+", help="DroidCam video URLs, one per camera")
+    parser.add_argument("--opencv-threads", type=int, default=1,
+                        help="OpenCV worker threads per camera process")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="use the threaded capture/detect/emit pipeline in each worker")
+    parser.add_argument("--report-interval", type=float, default=5.0,
+                        help="seconds between aggregate fps/latency reports")
+    args = parser.parse_args()
+
+    CameraSupervisor(
+        args.urls,
+        opencv_threads=args.opencv_threads,
+        pipelined=args.pipeline,
+        report_interval=args.report_interval
+    ).run()
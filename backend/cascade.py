@@ -0,0 +1,115 @@
+import time
+
+from stone_tracker import iou
+from yolo_worker import boxes_from_result
+
+
+def covers(yolo_box, bbox, min_iou):
+    """True if a YOLO (x1, y1, x2, y2) box overlaps an (x, y, w, h) detection enough
+    or contains its center"""
+    x1, y1, x2, y2 = yolo_box
+    x, y, w, h = bbox
+    cx, cy = x + w / 2.0, y + h / 2.0
+    if x1 <= cx <= x2 and y1 <= cy <= y2:
+        return True
+    return iou((x1, y1, x2 - x1, y2 - y1), bbox) >= min_iou
+
+
+class YoloVerifier:
+    """Second cascade stage: YOLO confirms or rejects the classical detections
+
+    The classical pipeline screens every frame; only frames where it found
+    something reach this stage. In 'roi' mode each detection is cropped
+    with some context and all crops go through YOLO as one batch; in
+    'frame' mode YOLO sees the whole frame once. A detection is kept if a
+    YOLO box covers it.
+    """
+
+    def __init__(self, model, mode='roi', conf=0.25, crop_padding=32, min_crop=96,
+                 min_iou=0.1, max_crops=16):
+        if isinstance(model, str):
+            from ultralytics import YOLO
+            model = YOLO(model, task='detect')
+        self.model = model
+        self.mode = mode
+        self.conf = conf
+        self.crop_padding = crop_padding
+        self.min_crop = min_crop
+        self.min_iou = min_iou
+        self.max_crops = max_crops
+
+        self.frames = 0
+        self.stage2_frames = 0
+        self.crops = 0
+        self.confirmed = 0
+        self.rejected = 0
+        self.stage2_time = 0.0
+
+    def crop_box(self, bbox, frame_shape):
+        """Square crop around a detection with crop_padding of context, at least min_crop wide"""
+        height, width = frame_shape[:2]
+        x, y, w, h = bbox
+        side = max(w, h) + 2 * self.crop_padding
+        side = min(max(side, self.min_crop), width, height)
+        cx, cy = x + w // 2, y + h // 2
+        x0 = min(max(0, cx - side // 2), width - side)
+        y0 = min(max(0, cy - side // 2), height - side)
+        return x0, y0, side
+
+    def yolo_boxes_roi(self, frame, impurities):
+        """YOLO boxes from a crop around every detection, max_crops crops per batch"""
+        crops = [self.crop_box(imp['bbox'], frame.shape) for imp in impurities]
+        boxes = []
+        for start in range(0, len(crops), self.max_crops):
+            batch = crops[start:start + self.max_crops]
+            images = [frame[y0:y0 + side, x0:x0 + side] for x0, y0, side in batch]
+            self.crops += len(images)
+            results = self.model(images, conf=self.conf, verbose=False)
+            for (x0, y0, _), result in zip(batch, results):
+                for x1, y1, x2, y2, _, confidence in boxes_from_result(result):
+                    boxes.append(((x1 + x0, y1 + y0, x2 + x0, y2 + y0), confidence))
+        return boxes
+
+    def yolo_boxes_frame(self, frame):
+        results = self.model(frame, conf=self.conf, verbose=False)
+        return [((x1, y1, x2, y2), confidence)
+                for r in results for x1, y1, x2, y2, _, confidence in boxes_from_result(r)]
+
+    def verify(self, frame, impurities):
+        """Classical detections that YOLO confirms, each with its 'yolo_confidence'"""
+        self.frames += 1
+        if not impurities:
+            return impurities
+
+        start = time.perf_counter()
+        self.stage2_frames += 1
+        if self.mode == 'roi':
+            boxes = self.yolo_boxes_roi(frame, impurities)
+        else:
+            boxes = self.yolo_boxes_frame(frame)
+
+        verified = []
+        for imp in impurities:
+            scores = [confidence for box, confidence in boxes if covers(box, imp['bbox'], self.min_iou)]
+            if scores:
+                verified.append(dict(imp, yolo_confidence=round(max(scores), 3)))
+        self.confirmed += len(verified)
+        self.rejected += len(impurities) - len(verified)
+        self.stage2_time += time.perf_counter() - start
+        return verified
+
+    def count_frame(self):
+        """A frame whose screening result was reused (change gate); it never reached stage 2"""
+        self.frames += 1
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'stage2_frames': self.stage2_frames,
+            'stage2_fraction': round(self.stage2_frames / self.frames, 3) if self.frames else 0.0,
+            'crops': self.crops,
+            'confirmed': self.confirmed,
+            'rejected': self.rejected,
+            'stage2_avg_ms': round(self.stage2_time * 1000 / self.stage2_frames, 2)
+            if self.stage2_frames else 0.0
+        }
@@ -1,53 +1,165 @@
+import argparse
+import time
+
 import cv2
-from ultralytics import YOLO
 
-# Load your trained model
-model = YOLO(r"C:\Users\shruti\runs\detect\train6\weights\best.pt")
+from yolo_worker import InferenceClient
+
+# Your trained model
+MODEL_PATH = r"C:\Users\shruti\runs\detect\train6\weights\best.pt"
 
 # DroidCam URL
 DROIDCAM_URL = "http://192.168.0.102:4747/video"  # change if IP differs
 
-cap = cv2.VideoCapture(DROIDCAM_URL)
-
-if not cap.isOpened():
-    print("❌ Could not connect to DroidCam")
-    exit()
-
-print("✅ Live impurity detection started. Press ESC to exit.")
-
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        break
-
-    frame = cv2.resize(frame, (640, 480))
-
-    results = model(frame, conf=0.1)
-
-    impurity_found = False
-
-    for r in results:
-        for box in r.boxes:
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
-            cls_id = int(box.cls[0])
-            conf = float(box.conf[0])
-            label = model.names[cls_id]
-
-            impurity_found = True
-
-            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
-            cv2.putText(frame, f"{label} {conf:.2f}",
-                        (x1, y1 - 8),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6,
-                        (0, 0, 255), 2)
-
-    if impurity_found:
-        print("⚠️ IMPURITY DETECTED")
-
-    cv2.imshow("AI Impurity Detection", frame)
-
-    if cv2.waitKey(1) & 0xFF == 27:
-        break
 
-cap.release()
-cv2.destroyAllWindows()
+def draw_boxes(frame, boxes, names):
+    """Draw (x1, y1, x2, y2, class_id, confidence) boxes; True if any were drawn"""
+    for x1, y1, x2, y2, cls_id, conf in boxes:
+        label = names[cls_id]
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
+        cv2.putText(frame, f"{label} {conf:.2f}",
+                    (x1, y1 - 8),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6,
+                    (0, 0, 255), 2)
+    return len(boxes) > 0
+
+
+def open_camera(url):
+    cap = cv2.VideoCapture(url)
+    if not cap.isOpened():
+        print("❌ Could not connect to DroidCam")
+        return None
+    return cap
+
+
+def run_inline(args):
+    """Original loop: capture, inference and display one frame at a time"""
+    from ultralytics import YOLO
+    from yolo_worker import boxes_from_result
+
+    model = YOLO(args.model, task='detect')
+    cap = open_camera(args.url)
+    if cap is None:
+        return
+
+    print("✅ Live impurity detection started. Press ESC to exit.")
+
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+        frame = cv2.resize(frame, (640, 480))
+
+        results = model(frame, conf=args.conf)
+
+        impurity_found = False
+        for r in results:
+            impurity_found = draw_boxes(frame, boxes_from_result(r), model.names) or impurity_found
+
+        if impurity_found:
+            print("⚠️ IMPURITY DETECTED")
+
+        cv2.imshow("AI Impurity Detection", frame)
+
+        if cv2.waitKey(1) & 0xFF == 27:
+            break
+
+    cap.release()
+    cv2.destroyAllWindows()
+
+
+def run_async(args):
+    """Capture and display at camera rate while a worker process batches inference
+
+    Each displayed frame shows the newest boxes that have come back, so the
+    overlay trails the video by the inference latency. If the worker dies
+    its old boxes are cleared, and if it cannot be restarted detection
+    falls back to the inline loop.
+    """
+    client = InferenceClient(args.model, slots=args.slots, max_batch=args.max_batch,
+                             latency_budget_ms=args.budget_ms, conf=args.conf)
+    cap = open_camera(args.url)
+    if cap is None:
+        client.close()
+        return
+
+    print("✅ Live impurity detection started. Press ESC to exit.")
+
+    latest_id = 0
+    latest_boxes = []
+    generation = client.generation
+    frames = 0
+    report_start = time.time()
+    fallback = False
+
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            frame = cv2.resize(frame, (640, 480))
+            client.submit(frame)
+            finished = client.poll()
+
+            if client.generation != generation or client.failed:
+                # Boxes from before a worker crash no longer describe the video
+                generation = client.generation
+                latest_boxes = []
+            if client.failed:
+                fallback = True
+                break
+
+            for frame_id, boxes in finished:
+                if frame_id > latest_id:
+                    latest_id, latest_boxes = frame_id, boxes
+                    if boxes:
+                        print("⚠️ IMPURITY DETECTED")
+
+            draw_boxes(frame, latest_boxes, client.names)
+            cv2.imshow("AI Impurity Detection", frame)
+            frames += 1
+
+            elapsed = time.time() - report_start
+            if elapsed >= args.report_interval:
+                stats = client.stats()
+                print(f"Camera/display {frames / elapsed:.1f} fps | inference {stats['inference_fps']} fps | "
+                      f"mean batch {stats['mean_batch']} {stats['batch_sizes']} | "
+                      f"latency {stats['latency_ms']} ms | skipped {stats['skipped']}")
+                frames = 0
+                report_start = time.time()
+
+            if cv2.waitKey(1) & 0xFF == 27:
+                break
+    finally:
+        cap.release()
+        cv2.destroyAllWindows()
+        client.close()
+
+    if fallback:
+        print("⚠️ Falling back to inline inference")
+        run_inline(args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Live YOLO impurity detection from DroidCam")
+    parser.add_argument("--model", default=MODEL_PATH,
+                        help="trained .pt weights, or an .onnx / *_openvino_model export from export_model.py")
+    parser.add_argument("--url", default=DROIDCAM_URL, help="DroidCam video URL")
+    parser.add_argument("--conf", type=float, default=0.1)
+    parser.add_argument("--inline", action="store_true",
+                        help="run inference in this process, one frame at a time (original behaviour)")
+    parser.add_argument("--slots", type=int, default=4,
+                        help="shared-memory frame slots; frames are skipped while all are busy")
+    parser.add_argument("--max-batch", type=int, default=4)
+    parser.add_argument("--budget-ms", type=float, default=80,
+                        help="latency budget a frame may spend waiting for its batch to fill")
+    parser.add_argument("--report-interval", type=float, default=5.0,
+                        help="seconds between fps/batch size reports")
+    args = parser.parse_args()
+
+    if args.inline:
+        run_inline(args)
+    else:
+        run_async(args)
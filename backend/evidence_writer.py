@@ -0,0 +1,203 @@
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import cv2
+
+POLICIES = ('drop_oldest', 'drop_newest', 'block')
+
+
+class EvidenceWriter:
+    """Saves alert images on a background thread with a bounded queue
+
+    When the queue is full the policy decides what gives: 'drop_oldest'
+    replaces the oldest waiting image, 'drop_newest' discards the new one,
+    and 'block' waits up to block_timeout seconds before discarding it.
+    Written files are fsynced in batches, and the folder is pruned a few
+    files at a time to stay within max_files, max_bytes and max_age_s.
+    """
+
+    def __init__(self, directory="detections", max_queue=16, policy='drop_oldest',
+                 block_timeout=0.05, jpeg_quality=95, fsync_batch=8, fsync_interval=2.0,
+                 max_files=500, max_bytes=500 * 1024 * 1024, max_age_s=7 * 24 * 3600,
+                 prune_step=16):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown queue policy: {policy}")
+        self.directory = directory
+        self.max_queue = max_queue
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.jpeg_quality = jpeg_quality
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.prune_step = prune_step
+
+        self.queue = deque()
+        self.cond = threading.Condition()
+        self.closed = False
+
+        # Files waiting for fsync, and the retention index (oldest first)
+        self.unsynced = []
+        self.last_sync = time.time()
+        self.files = deque()
+        self.total_bytes = 0
+
+        self.written = 0
+        self.dropped = 0
+        self.pruned = 0
+        self.errors = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self.scan_existing()
+        self.thread = threading.Thread(target=self._run, name="evidence-writer", daemon=True)
+        self.thread.start()
+
+    def scan_existing(self):
+        """Index evidence left over from earlier runs so retention covers it too"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.lower().endswith('.jpg'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.path, stat.st_size))
+        entries.sort()
+        self.files = deque(entries)
+        self.total_bytes = sum(size for _, _, size in entries)
+
+    def submit(self, filename, frame):
+        """Queue one image; returns False if it was dropped
+
+        The frame is kept as-is, so pass a copy if the caller reuses the buffer.
+        """
+        with self.cond:
+            if self.closed:
+                return False
+            if len(self.queue) >= self.max_queue:
+                if self.policy == 'drop_oldest':
+                    self.queue.popleft()
+                    self.dropped += 1
+                elif self.policy == 'block':
+                    self.cond.wait_for(lambda: len(self.queue) < self.max_queue or self.closed,
+                                       timeout=self.block_timeout)
+                if len(self.queue) >= self.max_queue or self.closed:
+                    self.dropped += 1
+                    return False
+            self.queue.append((filename, frame))
+            self.cond.notify_all()
+        return True
+
+    def _run(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.queue or self.closed, timeout=self.fsync_interval)
+                item = self.queue.popleft() if self.queue else None
+                self.cond.notify_all()
+                if item is None and self.closed:
+                    break
+
+            if item is not None:
+                self._write(*item)
+            if self.unsynced and (len(self.unsynced) >= self.fsync_batch or
+                                  time.time() - self.last_sync >= self.fsync_interval):
+                self._sync()
+            self._prune()
+
+        self._sync()
+
+    def _write(self, filename, frame):
+        path = os.path.join(self.directory, filename)
+        ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            self.errors += 1
+            return
+        f = None
+        try:
+            f = open(path, 'wb')
+            f.write(buffer)
+            f.flush()
+        except OSError as e:
+            self.errors += 1
+            if f is not None:
+                # Close and drop the partial file, or it leaks a handle and escapes pruning
+                try:
+                    f.close()
+                except OSError:
+                    pass
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            print(f"⚠️ Could not save evidence {path}: {str(e)}", file=sys.stderr)
+            return
+        self.unsynced.append(f)
+        self.files.append((time.time(), path, len(buffer)))
+        self.total_bytes += len(buffer)
+        self.written += 1
+
+    def _sync(self):
+        """fsync every file written since the last batch, then the folder entry"""
+        for f in self.unsynced:
+            try:
+                os.fsync(f.fileno())
+            except OSError:
+                self.errors += 1
+            f.close()
+        self.unsynced = []
+        self.last_sync = time.time()
+        if hasattr(os, 'O_DIRECTORY'):
+            try:
+                fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            except OSError:
+                pass
+
+    def _prune(self):
+        """Delete at most prune_step of the oldest files that break a retention limit"""
+        open_paths = {f.name for f in self.unsynced}
+        cutoff = time.time() - self.max_age_s
+        for _ in range(self.prune_step):
+            if not self.files:
+                return
+            mtime, path, size = self.files[0]
+            if (len(self.files) <= self.max_files and self.total_bytes <= self.max_bytes
+                    and mtime >= cutoff):
+                return
+            if path in open_paths:
+                self._sync()
+                open_paths = set()
+            self.files.popleft()
+            self.total_bytes -= size
+            try:
+                os.remove(path)
+                self.pruned += 1
+            except FileNotFoundError:
+                pass
+            except OSError:
+                self.errors += 1
+
+    def stats(self):
+        with self.cond:
+            queued = len(self.queue)
+        return {
+            'queued': queued,
+            'written': self.written,
+            'dropped': self.dropped,
+            'pruned': self.pruned,
+            'errors': self.errors,
+            'files': len(self.files),
+            'bytes': self.total_bytes
+        }
+
+    def close(self, timeout=5.0):
+        """Write what is still queued, fsync and stop the thread"""
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join(timeout)
@@ -0,0 +1,139 @@
+import argparse
+import os
+import shutil
+import tempfile
+
+import cv2
+import numpy as np
+
+from droidcam import MODEL_PATH
+
+IMAGE_SIZE = 640
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def list_images(folder, limit=None):
+    names = sorted(n for n in os.listdir(folder) if n.lower().endswith(IMAGE_EXTENSIONS))
+    paths = [os.path.join(folder, n) for n in names]
+    return paths[:limit] if limit else paths
+
+
+def letterbox(image, size=IMAGE_SIZE):
+    """Resize keeping aspect ratio and pad to size x size, like Ultralytics preprocessing"""
+    h, w = image.shape[:2]
+    scale = min(size / h, size / w)
+    resized = cv2.resize(image, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+    top = (size - resized.shape[0]) // 2
+    left = (size - resized.shape[1]) // 2
+    canvas[top:top + resized.shape[0], left:left + resized.shape[1]] = resized
+    return canvas
+
+
+def to_tensor(image):
+    """BGR uint8 image -> 1x3xHxW float32 RGB in [0, 1]"""
+    rgb = cv2.cvtColor(letterbox(image), cv2.COLOR_BGR2RGB)
+    return np.ascontiguousarray(rgb.transpose(2, 0, 1)[None], dtype=np.float32) / 255.0
+
+
+def write_calibration_yaml(image_dir, names, folder):
+    """Minimal dataset file pointing at the calibration frames, for Ultralytics INT8 export"""
+    path = os.path.join(folder, "calibration.yaml")
+    with open(path, 'w') as f:
+        f.write(f"path: {os.path.abspath(image_dir)}\n")
+        f.write("train: .\n")
+        f.write("val: .\n")
+        f.write("names:\n")
+        for class_id, name in sorted(names.items()):
+            f.write(f"  {class_id}: {name}\n")
+    return path
+
+
+def export_openvino(model, args):
+    """OpenVINO IR through Ultralytics; INT8 uses NNCF with the calibration frames"""
+    options = dict(format='openvino', imgsz=IMAGE_SIZE, half=False, dynamic=args.dynamic)
+    if not args.int8:
+        return model.export(**options)
+    with tempfile.TemporaryDirectory(prefix="calib_") as workdir:
+        options.update(int8=True, data=write_calibration_yaml(args.calib_dir, model.names, workdir),
+                       fraction=1.0)
+        return model.export(**options)
+
+
+class FrameCalibrationReader:
+    """onnxruntime CalibrationDataReader over a folder of rice frames"""
+
+    def __init__(self, paths, input_name):
+        self.paths = iter(paths)
+        self.input_name = input_name
+
+    def get_next(self):
+        for path in self.paths:
+            image = cv2.imread(path)
+            if image is not None:
+                return {self.input_name: to_tensor(image)}
+        return None
+
+
+def export_onnx(model, args):
+    """ONNX through Ultralytics; INT8 is static QDQ quantization with onnxruntime"""
+    onnx_path = model.export(format='onnx', imgsz=IMAGE_SIZE, simplify=True, dynamic=args.dynamic)
+    if not args.int8:
+        return onnx_path
+
+    import onnxruntime
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    input_name = onnxruntime.InferenceSession(onnx_path, providers=['CPUExecutionProvider']) \
+        .get_inputs()[0].name
+    prepared = onnx_path.replace('.onnx', '_prep.onnx')
+    quant_pre_process(onnx_path, prepared)
+
+    int8_path = onnx_path.replace('.onnx', '_int8.onnx')
+    reader = FrameCalibrationReader(list_images(args.calib_dir, args.calib_limit), input_name)
+    quantize_static(prepared, int8_path, reader,
+                    quant_format=QuantFormat.QDQ,
+                    activation_type=QuantType.QUInt8,
+                    weight_type=QuantType.QInt8,
+                    per_channel=True)
+    os.remove(prepared)
+    return int8_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the impurity YOLO model for fast CPU inference")
+    parser.add_argument("--weights", default=MODEL_PATH, help="trained .pt weights")
+    parser.add_argument("--format", default="openvino", choices=["openvino", "onnx"])
+    parser.add_argument("--int8", action="store_true",
+                        help="post-training INT8 quantization calibrated on --calib-dir")
+    parser.add_argument("--calib-dir", help="folder of representative rice frames for INT8 calibration")
+    parser.add_argument("--calib-limit", type=int, default=300,
+                        help="calibration frames used for ONNX INT8")
+    parser.add_argument("--dynamic", action="store_true",
+                        help="dynamic batch axis, needed for droidcam.py --max-batch above 1")
+    parser.add_argument("--output", help="copy the exported model here")
+    args = parser.parse_args()
+
+    if args.int8 and not args.calib_dir:
+        parser.error("--int8 needs --calib-dir")
+    if args.calib_dir and not list_images(args.calib_dir):
+        parser.error(f"No images in {args.calib_dir}")
+
+    from ultralytics import YOLO
+    model = YOLO(args.weights, task='detect')
+    exported = export_openvino(model, args) if args.format == 'openvino' else export_onnx(model, args)
+
+    if args.output:
+        if os.path.isdir(exported):
+            shutil.copytree(exported, args.output, dirs_exist_ok=True)
+        else:
+            shutil.copy(exported, args.output)
+        exported = args.output
+
+    print(f"✅ Exported model: {exported}")
+    print(f"Run it with: python droidcam.py --model \"{exported}\"")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+from synthetic_frames import generate_scenario
+
+# Frame index is drawn as a row of black/white blocks so any reader can tell
+# which frame it got, even after a reduced-scale decode
+INDEX_BITS = 20
+BLOCK = 32
+
+
+def stamp_index(frame, index):
+    for bit in range(INDEX_BITS):
+        shade = 255 if (index >> bit) & 1 else 0
+        frame[0:BLOCK, bit * BLOCK:(bit + 1) * BLOCK] = shade
+
+
+def read_index(frame, source_width):
+    """Frame index stamped by stamp_index, for a frame decoded at any scale"""
+    scale = frame.shape[1] / source_width
+    index = 0
+    for bit in range(INDEX_BITS):
+        x = int((bit * BLOCK + BLOCK // 2) * scale)
+        y = int(BLOCK // 2 * scale)
+        if frame[y, x].mean() > 127:
+            index |= 1 << bit
+    return index
+
+
+class FakeMjpegServer:
+    """DroidCam-like /video endpoint streaming synthetic rice frames at a fixed rate
+
+    sent_at maps each frame index to the time it was written, so a client in
+    the same process can measure how old the frames it reads are.
+    """
+
+    def __init__(self, port=4747, fps=30.0, size=(1280, 960), quality=80, content_length=True,
+                 host="127.0.0.1", num_frames=60):
+        self.fps = fps
+        self.size = size
+        self.content_length = content_length
+        self.sent_at = {}
+        self.closed = False
+
+        # Pre-encode a loop of frames; the index stamp is re-encoded per frame
+        self.frames = [cv2.resize(frame, size) for frame, _ in generate_scenario('baseline', num_frames)]
+        self.quality = quality
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/video':
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=--dcmjpeg')
+                self.end_headers()
+                try:
+                    server.stream(self.wfile)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.url = f"http://{host}:{self.port}/video"
+        self.thread = threading.Thread(target=self.server.serve_forever, name="fake-mjpeg", daemon=True)
+        self.thread.start()
+
+    def stream(self, out):
+        index = 0
+        next_time = time.time()
+        while not self.closed:
+            frame = self.frames[index % len(self.frames)].copy()
+            stamp_index(frame, index)
+            _, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            headers = "----dcmjpeg\r\nContent-Type: image/jpeg\r\n"
+            if self.content_length:
+                headers += f"Content-Length: {len(jpeg)}\r\n"
+            out.write((headers + "\r\n").encode('ascii'))
+            out.write(jpeg.tobytes())
+            out.write(b"\r\n")
+            self.sent_at[index] = time.time()
+            index += 1
+
+            next_time += 1.0 / self.fps
+            delay = next_time - time.time()
+            if delay > 0:
+                time.sleep(delay)
+
+    def close(self):
+        self.closed = True
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local fake DroidCam MJPEG server")
+    parser.add_argument("--port", type=int, default=4747)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--size", default="1280x960", help="frame size WxH")
+    parser.add_argument("--no-length", action="store_true", help="omit Content-Length part headers")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.split('x'))
+    fake = FakeMjpegServer(args.port, args.fps, (width, height), content_length=not args.no_length)
+    print(f"Fake DroidCam streaming at {fake.url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        fake.close()
@@ -0,0 +1,159 @@
+import threading
+import time
+import sys
+from collections import deque
+
+
+class DropOldestQueue:
+    """Bounded queue that discards its oldest item instead of blocking the producer"""
+
+    def __init__(self, name, maxsize=1, on_drop=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.on_drop = on_drop
+        self.items = deque()
+        self.cond = threading.Condition()
+        self.put_count = 0
+        self.drop_count = 0
+        self.closed = False
+
+    def put(self, item):
+        """Add an item, evicting the oldest one when full"""
+        dropped = None
+        with self.cond:
+            if len(self.items) >= self.maxsize:
+                dropped = self.items.popleft()
+                self.drop_count += 1
+            self.items.append(item)
+            self.put_count += 1
+            self.cond.notify()
+        if dropped is not None and self.on_drop:
+            self.on_drop(dropped)
+
+    def get(self, timeout=None):
+        """Next item, or None on timeout or after close"""
+        with self.cond:
+            if not self.items and not self.closed:
+                self.cond.wait(timeout)
+            if not self.items:
+                return None
+            return self.items.popleft()
+
+    def close(self):
+        """Wake up every waiting consumer"""
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def stats(self):
+        with self.cond:
+            return {
+                'depth': len(self.items),
+                'capacity': self.maxsize,
+                'received': self.put_count,
+                'dropped': self.drop_count
+            }
+
+
+class PipelineStage(threading.Thread):
+    """Worker thread that takes items from one queue and hands results to the next"""
+
+    def __init__(self, name, work, inbox, outbox, stop_event):
+        super().__init__(name=name, daemon=True)
+        self.work = work
+        self.inbox = inbox
+        self.outbox = outbox
+        self.stop_event = stop_event
+        self.processed = 0
+        self.errors = 0
+        self.busy_time = 0.0
+
+    def run(self):
+        while not self.stop_event.is_set():
+            item = self.inbox.get(timeout=0.1)
+            if item is None:
+                continue
+
+            start = time.perf_counter()
+            try:
+                result = self.work(item)
+            except Exception as e:
+                self.errors += 1
+                print(f"Error in {self.name} stage: {str(e)}", file=sys.stderr)
+                continue
+            self.busy_time += time.perf_counter() - start
+            self.processed += 1
+
+            if self.outbox is not None and result is not None:
+                self.outbox.put(result)
+
+    def stats(self):
+        avg_ms = self.busy_time * 1000 / self.processed if self.processed else 0.0
+        return {
+            'processed': self.processed,
+            'errors': self.errors,
+            'avg_ms': round(avg_ms, 2)
+        }
+
+
+class FramePipeline:
+    """Capture -> detect -> encode/emit stages joined by drop-oldest queues
+
+    read_frame() returns a captured item or None, detect(item) returns the
+    item for the emit stage, and emit(item) does the drawing, encoding and
+    output. Capture never waits on the later stages: when they fall behind,
+    stale frames are dropped and counted. discard(item) is called for every
+    detect result dropped before reaching emit, so resources it holds can
+    be handed back.
+    """
+
+    def __init__(self, read_frame, detect, emit, capture_queue_size=1, result_queue_size=2, discard=None):
+        self.read_frame = read_frame
+        self.stop_event = threading.Event()
+        self.frames = DropOldestQueue('capture', capture_queue_size)
+        self.results = DropOldestQueue('detect', result_queue_size, on_drop=discard)
+        self.captured = 0
+        self.capture_misses = 0
+
+        self.capture_thread = threading.Thread(target=self._capture_loop, name='capture', daemon=True)
+        self.stages = [
+            PipelineStage('detect', detect, self.frames, self.results, self.stop_event),
+            PipelineStage('emit', emit, self.results, None, self.stop_event)
+        ]
+
+    def _capture_loop(self):
+        while not self.stop_event.is_set():
+            frame = self.read_frame()
+            if frame is None:
+                self.capture_misses += 1
+                time.sleep(0.1)
+                continue
+            self.captured += 1
+            self.frames.put(frame)
+
+    def start(self):
+        self.capture_thread.start()
+        for stage in self.stages:
+            stage.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.frames.close()
+        self.results.close()
+        self.capture_thread.join(timeout=2)
+        for stage in self.stages:
+            stage.join(timeout=2)
+
+    def is_running(self):
+        return not self.stop_event.is_set()
+
+    def stats(self):
+        """Per-stage throughput plus queue depth and drop counts"""
+        detect_stage, emit_stage = self.stages
+        return {
+            'capture': {'captured': self.captured, 'misses': self.capture_misses},
+            'capture_queue': self.frames.stats(),
+            'detect': detect_stage.stats(),
+            'result_queue': self.results.stats(),
+            'emit': emit_stage.stats()
+        }
@@ -0,0 +1,242 @@
+import sys
+import threading
+import time
+
+import cv2
+
+from frame_pipeline import DropOldestQueue
+
+# Quality ladder from best to cheapest: (JPEG quality, scale, seconds between frames).
+# Level 1 matches the original fixed 70 quality / full size / 200 ms stream.
+LEVELS = [
+    (80, 1.0, 0.2),
+    (70, 1.0, 0.2),
+    (55, 1.0, 0.2),
+    (55, 0.75, 0.25),
+    (45, 0.5, 0.33),
+    (40, 0.5, 0.5),
+    (40, 0.5, 1.0)
+]
+START_LEVEL = 1
+
+
+class FrameConsumer:
+    """One viewer of the frame stream, fed from a newest-frame-only slot by its own thread"""
+
+    def __init__(self, name, send):
+        self.name = name
+        self.send = send
+        self.slot = DropOldestQueue(name, maxsize=1)
+        self.sent = 0
+        self.bytes_sent = 0
+        self.errors = 0
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.busy_since = 0.0
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name=f"frames-{name}", daemon=True)
+        self.thread.start()
+
+    def offer(self, published_at, jpeg):
+        self.slot.put((published_at, jpeg))
+
+    def _run(self):
+        while not self.closed:
+            item = self.slot.get(timeout=0.5)
+            if item is None:
+                continue
+            published_at, jpeg = item
+            self.busy_since = time.time()
+            try:
+                self.send(jpeg)
+            except Exception as e:
+                self.errors += 1
+                print(f"Frame consumer {self.name} failed: {str(e)}", file=sys.stderr)
+                self.closed = True
+            finally:
+                self.busy_since = 0.0
+            lag = time.time() - published_at
+            # Smoothed publish-to-delivered delay
+            self.lag = lag if self.sent == 0 else 0.8 * self.lag + 0.2 * lag
+            self.max_lag = max(self.max_lag, lag)
+            self.sent += 1
+            self.bytes_sent += len(jpeg)
+
+    @property
+    def dropped(self):
+        return self.slot.drop_count
+
+    def behind(self, interval, now):
+        """True if delivery takes longer than the send interval, or a write is stuck"""
+        return self.lag > interval or (self.busy_since and now - self.busy_since > interval)
+
+    def close(self):
+        self.closed = True
+        self.slot.close()
+
+    def stats(self):
+        return {
+            'sent': self.sent,
+            'dropped': self.dropped,
+            'lag_ms': round(self.lag * 1000, 1),
+            'max_lag_ms': round(self.max_lag * 1000, 1),
+            'kbytes_sent': round(self.bytes_sent / 1024, 1),
+            'errors': self.errors
+        }
+
+
+class AdaptiveFramePublisher:
+    """Non-blocking frame stream that adapts quality, size and rate to its consumers
+
+    publish() only copies the frame into a newest-only slot; an encoder
+    thread compresses it once and offers the JPEG to every consumer. A
+    consumer that is still writing when the next frame arrives has its
+    stale frame replaced (counted as dropped) instead of blocking anyone.
+    Every adapt_interval seconds the publisher moves one step along
+    LEVELS: down when consumers drop frames, lag behind the send interval
+    or the stream exceeds target_kbps, and back up once there is headroom.
+    """
+
+    def __init__(self, transport=None, target_kbps=1000, adapt_interval=1.0):
+        self.transport = transport
+        self.target_bytes = target_kbps * 1024 / 8
+        self.adapt_interval = adapt_interval
+        self.level = START_LEVEL
+        self.consumers = {}
+        self.transport_consumers = set()
+        self.lock = threading.Lock()
+
+        self.last_publish = 0.0
+        self.last_adapt = time.time()
+        self.window_bytes = 0
+        self.window_drops = 0
+        self.healthy_windows = 0
+        self.encoded = 0
+        self.skipped = 0
+
+        self.raw = DropOldestQueue('encode', maxsize=1)
+        self.closed = False
+        self.encoder = threading.Thread(target=self._encode_loop, name="frame-encoder", daemon=True)
+        self.encoder.start()
+
+    @property
+    def quality(self):
+        return LEVELS[self.level][0]
+
+    @property
+    def scale(self):
+        return LEVELS[self.level][1]
+
+    @property
+    def interval(self):
+        return LEVELS[self.level][2]
+
+    def add_consumer(self, name, send):
+        with self.lock:
+            consumer = self.consumers.get(name)
+            if consumer is None or consumer.closed:
+                consumer = self.consumers[name] = FrameConsumer(name, send)
+            return consumer
+
+    def remove_consumer(self, name):
+        with self.lock:
+            consumer = self.consumers.pop(name, None)
+        if consumer:
+            consumer.close()
+
+    def sync_transport_consumers(self):
+        """Follow the transport's current consumers (one per socket client, or itself)"""
+        if self.transport is None:
+            return
+        if hasattr(self.transport, 'frame_targets'):
+            targets = self.transport.frame_targets()
+        else:
+            targets = {self.transport.name: self.transport.send_frame}
+        for name, send in targets.items():
+            self.add_consumer(name, send)
+        for name in self.transport_consumers - set(targets):
+            self.remove_consumer(name)
+        self.transport_consumers = set(targets)
+
+    def due(self, now=None):
+        now = time.time() if now is None else now
+        return now - self.last_publish >= self.interval
+
+    def publish(self, frame, now=None):
+        """Hand over a frame for streaming; never waits on encoding or consumers"""
+        now = time.time() if now is None else now
+        self.last_publish = now
+        # The detector reuses its frame buffers, so the encoder gets its own copy
+        self.raw.put((now, frame.copy()))
+        if now - self.last_adapt >= self.adapt_interval:
+            self.adapt(now)
+
+    def _encode_loop(self):
+        while not self.closed:
+            item = self.raw.get(timeout=0.5)
+            if item is None:
+                continue
+            published_at, frame = item
+            self.sync_transport_consumers()
+            with self.lock:
+                consumers = [c for c in self.consumers.values() if not c.closed]
+            if not consumers:
+                self.skipped += 1
+                continue
+
+            quality, scale, _ = LEVELS[self.level]
+            if scale != 1.0:
+                frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            if not ok:
+                continue
+            self.encoded += 1
+            self.window_bytes += len(jpeg)
+            for consumer in consumers:
+                consumer.offer(published_at, jpeg)
+
+    def adapt(self, now):
+        """Move one step along LEVELS based on the last window"""
+        elapsed = now - self.last_adapt
+        self.last_adapt = now
+        with self.lock:
+            consumers = [c for c in self.consumers.values() if not c.closed]
+        drops = sum(c.dropped for c in consumers) + self.raw.drop_count
+        new_drops = drops - self.window_drops
+        self.window_drops = drops
+        rate = self.window_bytes / elapsed if elapsed > 0 else 0.0
+        lagging = any(c.behind(self.interval, now) for c in consumers)
+        self.window_bytes = 0
+
+        if new_drops > 0 or lagging or rate > self.target_bytes:
+            self.healthy_windows = 0
+            if self.level < len(LEVELS) - 1:
+                self.level += 1
+        else:
+            self.healthy_windows += 1
+            # Step up only after a few calm windows and with room for a bigger stream
+            if self.healthy_windows >= 3 and self.level > 0 and rate < 0.5 * self.target_bytes:
+                self.level -= 1
+                self.healthy_windows = 0
+
+    def stats(self):
+        with self.lock:
+            consumers = {name: c.stats() for name, c in self.consumers.items()}
+        return {
+            'quality': self.quality,
+            'scale': self.scale,
+            'interval_ms': int(self.interval * 1000),
+            'encoded': self.encoded,
+            'no_viewers': self.skipped,
+            'stale_dropped': self.raw.drop_count,
+            'consumers': consumers
+        }
+
+    def close(self):
+        self.closed = True
+        self.raw.close()
+        with self.lock:
+            consumers = list(self.consumers.values())
+            self.consumers = {}
+        for consumer in consumers:
+            consumer.close()
@@ -0,0 +1,87 @@
+import time
+from collections import deque
+
+import numpy as np
+
+MODES = ('full', 'screen', 'skip')
+
+
+class LatencyScheduler:
+    """Chooses per frame between full detection, a cheap screen, or skipping it
+
+    The choice keeps capture-to-DATA latency under target_latency_ms using
+    smoothed measured costs of each mode and of the emit step: the best
+    mode whose predicted finish still meets the target wins, and a frame
+    that cannot make it even with a screen is skipped. With cpu_budget
+    (fraction of one core) a token bucket also caps the time spent on
+    analysis, which keeps several cameras on one box from starving each
+    other. A full run is retried every probe_interval seconds so its cost
+    estimate recovers after a burst of load.
+    """
+
+    def __init__(self, target_latency_ms=150, cpu_budget=None, probe_interval=2.0, screen_scale=4):
+        self.target = target_latency_ms / 1000
+        self.cpu_budget = cpu_budget
+        self.probe_interval = probe_interval
+        self.screen_scale = screen_scale
+
+        self.cost = {'full': 0.0, 'screen': 0.0, 'emit': 0.0}
+        self.tokens = cpu_budget or 0.0
+        self.last_refill = time.time()
+        self.last_full = 0.0
+
+        self.counts = {mode: 0 for mode in MODES}
+        self.latencies = deque(maxlen=200)
+
+    def refill(self, now):
+        if self.cpu_budget is None:
+            return
+        self.tokens = min(self.cpu_budget, self.tokens + (now - self.last_refill) * self.cpu_budget)
+        self.last_refill = now
+
+    def affordable(self, mode, slack):
+        cost = self.cost[mode]
+        if cost > slack:
+            return False
+        return self.cpu_budget is None or self.tokens >= cost
+
+    def decide(self, capture_time, now=None):
+        now = time.time() if now is None else now
+        self.refill(now)
+        slack = self.target - (now - capture_time) - self.cost['emit']
+
+        if self.affordable('full', slack):
+            mode = 'full'
+        elif slack > 0 and now - self.last_full >= self.probe_interval:
+            mode = 'full'
+        elif self.affordable('screen', slack):
+            mode = 'screen'
+        else:
+            mode = 'skip'
+
+        self.counts[mode] += 1
+        if mode == 'full':
+            self.last_full = now
+        return mode
+
+    def record(self, stage, seconds):
+        """Feed back the measured time of 'full', 'screen' or 'emit'"""
+        old = self.cost[stage]
+        self.cost[stage] = seconds if old == 0 else 0.8 * old + 0.2 * seconds
+        if stage != 'emit' and self.cpu_budget is not None:
+            self.tokens -= seconds
+
+    def observe_latency(self, seconds):
+        self.latencies.append(seconds)
+
+    def stats(self):
+        latencies = np.array(self.latencies) * 1000 if self.latencies else None
+        return {
+            'target_ms': round(self.target * 1000),
+            'modes': dict(self.counts),
+            'full_ms': round(self.cost['full'] * 1000, 2),
+            'screen_ms': round(self.cost['screen'] * 1000, 2),
+            'emit_ms': round(self.cost['emit'] * 1000, 2),
+            'p50_latency_ms': round(float(np.percentile(latencies, 50)), 1) if latencies is not None else 0.0,
+            'p95_latency_ms': round(float(np.percentile(latencies, 95)), 1) if latencies is not None else 0.0
+        }
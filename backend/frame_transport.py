@@ -0,0 +1,410 @@
+import base64
+import json
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+
+# Message kinds shared by the binary transports
+MSG_FRAME = ord('F')
+MSG_DATA = ord('D')
+MSG_TELEMETRY = ord('T')
+
+# Binary message header: kind (1 byte) + payload length (4 bytes, big endian)
+MESSAGE_HEADER = struct.Struct('>BI')
+
+
+class StdoutTransport:
+    """Original text protocol: base64 FRAME: lines and JSON DATA: lines on stdout"""
+
+    name = 'stdout'
+
+    def __init__(self, stream=None):
+        self.stream = stream
+        # Frames may be written from a publisher thread; keep each line whole
+        self.lock = threading.Lock()
+
+    def _write_line(self, line):
+        # One write per line: print() emits the text and the newline separately
+        stream = self.stream or sys.stdout
+        with self.lock:
+            stream.write(line + "\n")
+            stream.flush()
+
+    def send_frame(self, jpeg):
+        frame_base64 = base64.b64encode(jpeg).decode('utf-8')
+        self._write_line(f"FRAME:{frame_base64}")
+
+    def send_data(self, data):
+        output = json.dumps(data)
+        self._write_line(f"DATA:{output}")
+
+    def send_telemetry(self, payload):
+        encoded = base64.b64encode(payload).decode('ascii')
+        self._write_line(f"TELEM:{encoded}")
+
+    def close(self):
+        pass
+
+
+class UnixSocketTransport:
+    """Length-prefixed binary messages over a Unix domain socket
+
+    The detector listens on `path`; every connected consumer receives each
+    message as MESSAGE_HEADER followed by the raw JPEG or JSON bytes. A
+    client that cannot take a message within send_timeout is dropped.
+    """
+
+    name = 'uds'
+
+    def __init__(self, path, send_timeout=0.5):
+        self.path = path
+        self.send_timeout = send_timeout
+        if os.path.exists(path):
+            os.unlink(path)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(path)
+        self.server.listen(4)
+        self.clients = []
+        self.client_locks = {}
+        self.lock = threading.Lock()
+        self.closed = False
+        self.accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
+        self.accept_thread.start()
+        print(f"Frame socket listening on {path}", file=sys.stderr)
+
+    def _accept_loop(self):
+        while not self.closed:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                break
+            # A stalled consumer must not hold up the detector thread for long
+            conn.settimeout(self.send_timeout)
+            with self.lock:
+                self.clients.append(conn)
+                self.client_locks[conn] = threading.Lock()
+
+    def _send_to(self, conn, kind, payload):
+        """Send one message to one client; a client that fails is dropped"""
+        header = MESSAGE_HEADER.pack(kind, len(payload))
+        lock = self.client_locks.get(conn)
+        if lock is None:
+            return
+        try:
+            with lock:
+                conn.sendall(header)
+                conn.sendall(payload)
+        except OSError as e:
+            # Includes send timeouts; a half-written message leaves the stream unusable anyway
+            print(f"Dropping frame socket client: {str(e) or type(e).__name__}", file=sys.stderr)
+            conn.close()
+            with self.lock:
+                if conn in self.clients:
+                    self.clients.remove(conn)
+                    del self.client_locks[conn]
+
+    def _broadcast(self, kind, payload):
+        with self.lock:
+            clients = list(self.clients)
+        for conn in clients:
+            self._send_to(conn, kind, payload)
+
+    def send_frame(self, jpeg):
+        self._broadcast(MSG_FRAME, memoryview(jpeg).cast('B'))
+
+    def frame_targets(self):
+        """One frame sender per connected client, for per-consumer streaming"""
+        with self.lock:
+            clients = list(self.clients)
+        return {f"uds:{id(conn):x}": (lambda jpeg, conn=conn:
+                                       self._send_to(conn, MSG_FRAME, memoryview(jpeg).cast('B')))
+                for conn in clients}
+
+    def send_data(self, data):
+        self._broadcast(MSG_DATA, json.dumps(data).encode('utf-8'))
+
+    def send_telemetry(self, payload):
+        self._broadcast(MSG_TELEMETRY, payload)
+
+    def close(self):
+        self.closed = True
+        self.server.close()
+        with self.lock:
+            for conn in self.clients:
+                conn.close()
+            self.clients = []
+            self.client_locks = {}
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+def read_socket_messages(path):
+    """Consumer side of UnixSocketTransport: yields (kind, payload) tuples"""
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.connect(path)
+    stream = conn.makefile('rb')
+    try:
+        while True:
+            header = stream.read(MESSAGE_HEADER.size)
+            if len(header) < MESSAGE_HEADER.size:
+                return
+            kind, length = MESSAGE_HEADER.unpack(header)
+            yield kind, stream.read(length)
+    finally:
+        stream.close()
+        conn.close()
+
+
+# Ring layout: header (slot count, slot size, next sequence, reader's next sequence)
+# then fixed-size slots, each with its own header (sequence, kind, length) followed
+# by the payload. The reader's sequence is 0 until a reader attaches.
+RING_HEADER = struct.Struct('<IIQQ')
+SLOT_HEADER = struct.Struct('<QBI')
+
+
+class ShmRing:
+    """One single-writer, single-reader ring of fixed-size slots in shared memory
+
+    A slot's sequence number is cleared while it is being written and set
+    last, so a reader can tell whether the bytes it looked at were
+    overwritten underneath it. A lossy ring always overwrites the oldest
+    slot. A lossless one waits (up to block_timeout) for an attached reader
+    to free a slot, and only drops when the reader is stuck.
+    """
+
+    def __init__(self, name, slot_count, slot_size, lossless=False, block_timeout=0.5):
+        self.slot_count = slot_count
+        self.slot_size = slot_size
+        self.lossless = lossless
+        self.block_timeout = block_timeout
+        size = RING_HEADER.size + slot_count * (SLOT_HEADER.size + slot_size)
+        try:
+            old = shared_memory.SharedMemory(name=name)
+            old.close()
+            old.unlink()
+        except FileNotFoundError:
+            pass
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.buf = self.shm.buf
+        self.next_seq = 1
+        RING_HEADER.pack_into(self.buf, 0, slot_count, slot_size, self.next_seq, 0)
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    def wait_for_space(self):
+        """False if an attached reader did not free a slot within block_timeout"""
+        deadline = time.time() + self.block_timeout
+        while True:
+            read_seq = RING_HEADER.unpack_from(self.buf, 0)[3]
+            if read_seq == 0 or self.next_seq - read_seq < self.slot_count - 1:
+                return True
+            if time.time() > deadline:
+                return False
+            time.sleep(0.0005)
+
+    def write(self, kind, payload):
+        if len(payload) > self.slot_size:
+            self.dropped += 1
+            return False
+        with self.lock:
+            if self.lossless and not self.wait_for_space():
+                # Reader looks stuck: stop waiting for it until it acknowledges again,
+                # so the detector loop is held up once rather than on every record
+                struct.pack_into('<Q', self.buf, 16, 0)
+                self.dropped += 1
+                return False
+            offset = RING_HEADER.size + (self.next_seq % self.slot_count) * (SLOT_HEADER.size + self.slot_size)
+            SLOT_HEADER.pack_into(self.buf, offset, 0, kind, 0)
+            start = offset + SLOT_HEADER.size
+            self.buf[start:start + len(payload)] = payload
+            SLOT_HEADER.pack_into(self.buf, offset, self.next_seq, kind, len(payload))
+            self.next_seq += 1
+            struct.pack_into('<Q', self.buf, 8, self.next_seq)
+            return True
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        self.shm.unlink()
+
+
+class SharedMemoryRingTransport:
+    """Shared-memory rings that consumers read in place
+
+    Frames go to a lossy ring named `name`: a slow reader skips to the
+    newest frames. DATA and telemetry records go to a lossless ring named
+    `name`_data, so detection records and contamination alerts are not
+    lost when the reader falls behind on video.
+    """
+
+    name = 'shm'
+
+    def __init__(self, name, slot_count=8, slot_size=512 * 1024, data_slots=256, data_slot_size=64 * 1024):
+        self.frames = ShmRing(name, slot_count, slot_size)
+        self.records = ShmRing(name + '_data', data_slots, data_slot_size, lossless=True)
+        print(f"Frame ring buffer ready: {name} ({slot_count} x {slot_size} bytes), "
+              f"records in {name}_data", file=sys.stderr)
+
+    def send_frame(self, jpeg):
+        self.frames.write(MSG_FRAME, memoryview(jpeg).cast('B'))
+
+    def send_data(self, data):
+        if not self.records.write(MSG_DATA, json.dumps(data).encode('utf-8')):
+            print("⚠️ Ring reader is not keeping up, DATA record dropped", file=sys.stderr)
+
+    def send_telemetry(self, payload):
+        self.records.write(MSG_TELEMETRY, payload)
+
+    def stats(self):
+        return {'frames_dropped': self.frames.dropped, 'records_dropped': self.records.dropped}
+
+    def close(self):
+        self.frames.close()
+        self.records.close()
+
+
+class ShmRingView:
+    """Reader side of one ShmRing"""
+
+    def __init__(self, name, lossless=False):
+        self.shm = shared_memory.SharedMemory(name=name)
+        self.buf = self.shm.buf
+        self.lossless = lossless
+        self.slot_count, self.slot_size, next_seq, _ = RING_HEADER.unpack_from(self.buf, 0)
+        self.read_seq = next_seq
+        self.missed = 0
+        if lossless:
+            self.ack()
+
+    def ack(self):
+        # Tells a lossless writer which slots are free again
+        struct.pack_into('<Q', self.buf, 16, self.read_seq)
+
+    def poll(self):
+        next_seq = RING_HEADER.unpack_from(self.buf, 0)[2]
+        if self.read_seq >= next_seq:
+            return None
+        if next_seq - self.read_seq > self.slot_count - 1:
+            # Fell behind the writer: jump to the oldest slot that is still intact
+            skip_to = next_seq - (self.slot_count - 1)
+            self.missed += skip_to - self.read_seq
+            self.read_seq = skip_to
+
+        seq = self.read_seq
+        offset = self.slot_offset(seq)
+        slot_seq, kind, length = SLOT_HEADER.unpack_from(self.buf, offset)
+        self.read_seq += 1
+        if slot_seq != seq:
+            self.missed += 1
+            return None
+        start = offset + SLOT_HEADER.size
+        if self.lossless:
+            # Copied out before the slot is handed back to the writer
+            payload = bytes(self.buf[start:start + length])
+            self.ack()
+            return seq, kind, payload
+        return seq, kind, self.buf[start:start + length]
+
+    def is_valid(self, seq):
+        slot_seq, _, _ = SLOT_HEADER.unpack_from(self.buf, self.slot_offset(seq))
+        return slot_seq == seq
+
+    def slot_offset(self, seq):
+        return RING_HEADER.size + (seq % self.slot_count) * (SLOT_HEADER.size + self.slot_size)
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+
+
+class SharedMemoryRingReader:
+    """Consumer side of SharedMemoryRingTransport
+
+    Records (DATA, telemetry) come first and arrive as bytes, complete and
+    in order. Frames are memoryviews into the ring: check is_valid(seq,
+    kind) after using one, or read with messages(copy=True).
+    """
+
+    def __init__(self, name):
+        self.frames = ShmRingView(name)
+        self.records = ShmRingView(name + '_data', lossless=True)
+
+    @property
+    def missed(self):
+        """Messages lost per kind: frames skipped by the lossy ring, records (should stay 0)"""
+        return {'frames': self.frames.missed, 'records': self.records.missed}
+
+    def poll(self):
+        """Next (seq, kind, payload) or None; records before frames"""
+        return self.records.poll() or self.frames.poll()
+
+    def is_valid(self, seq, kind=MSG_FRAME):
+        """True while the payload for `seq` has not been reused by the writer"""
+        if kind != MSG_FRAME:
+            return True
+        return self.frames.is_valid(seq)
+
+    def messages(self, idle_sleep=0.001, copy=False):
+        """Yield (seq, kind, payload) forever, sleeping briefly when idle
+
+        With copy, frames are copied out and re-checked, so every frame
+        yielded is intact bytes; torn ones count as missed.
+        """
+        while True:
+            message = self.poll()
+            if message is None:
+                time.sleep(idle_sleep)
+                continue
+            seq, kind, payload = message
+            if copy and kind == MSG_FRAME:
+                view = payload
+                payload = bytes(view)
+                view.release()
+                if not self.frames.is_valid(seq):
+                    self.frames.missed += 1
+                    continue
+            yield seq, kind, payload
+
+    def close(self):
+        self.frames.close()
+        self.records.close()
+
+
+class JsonlTransport:
+    """Writes DATA records to a JSON-lines file and discards frames"""
+
+    name = 'jsonl'
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'w', encoding='utf-8')
+
+    def send_frame(self, jpeg):
+        pass
+
+    def send_data(self, data):
+        self.file.write(json.dumps(data) + '\n')
+
+    def send_telemetry(self, payload):
+        self.send_data({'telemetry': base64.b64encode(payload).decode('ascii')})
+
+    def close(self):
+        self.file.close()
+
+
+def create_transport(spec):
+    """Build a transport from a startup spec: stdout, uds:PATH, shm:NAME or jsonl:PATH"""
+    kind, _, target = spec.partition(':')
+    if kind == 'stdout':
+        return StdoutTransport()
+    if kind == 'uds':
+        return UnixSocketTransport(target or '/tmp/dispenzo_frames.sock')
+    if kind == 'shm':
+        return SharedMemoryRingTransport(target or 'dispenzo_frames')
+    if kind == 'jsonl':
+        return JsonlTransport(target or 'detections.jsonl')
+    raise ValueError(f"Unknown transport: {spec}")
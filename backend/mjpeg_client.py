@@ -0,0 +1,202 @@
+import sys
+import threading
+import time
+import urllib.request
+
+import cv2
+import numpy as np
+
+# imdecode flags for 1/1, 1/2, 1/4 and 1/8 scale; libjpeg scales while decoding
+REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8
+}
+
+# Start-of-frame markers that carry the image size (not DHT, JPG or DAC)
+SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def jpeg_size(data):
+    """(width, height) read from the JPEG headers without decoding, or None"""
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        length = int.from_bytes(data[i + 2:i + 4], 'big')
+        if marker in SOF_MARKERS:
+            height = int.from_bytes(data[i + 5:i + 7], 'big')
+            width = int.from_bytes(data[i + 7:i + 9], 'big')
+            return width, height
+        i += 2 + length
+    return None
+
+
+def reduction_for(size, target_size):
+    """Largest decode reduction that still yields at least target_size"""
+    width, height = size
+    target_w, target_h = target_size
+    for factor in (8, 4, 2):
+        if width // factor >= target_w and height // factor >= target_h:
+            return factor
+    return 1
+
+
+class MjpegReader:
+    """Low-latency reader for a multipart MJPEG stream such as DroidCam's /video
+
+    A background thread keeps reading parts and keeps only the newest JPEG,
+    still compressed. read() decodes just that one, at reduced scale when
+    the source is at least twice target_size, so stale frames are never
+    decoded and nothing queues up behind a slow consumer. Mirrors the parts
+    of cv2.VideoCapture the detector uses.
+    """
+
+    def __init__(self, url, target_size=(640, 480), timeout=5.0, reconnect_delay=1.0):
+        self.url = url
+        self.target_size = target_size
+        self.timeout = timeout
+        self.reconnect_delay = reconnect_delay
+
+        self.cond = threading.Condition()
+        self.jpeg = None
+        self.seq = 0
+        self.received_at = 0.0
+        self.read_seq = 0
+        self.last_received = 0.0
+        self.connected = False
+        self.closed = False
+
+        self.reduction = None
+        self.received = 0
+        self.decoded = 0
+        self.skipped = 0
+        self.decode_time = 0.0
+
+        self.thread = threading.Thread(target=self._run, name="mjpeg-reader", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.closed:
+            try:
+                with urllib.request.urlopen(self.url, timeout=self.timeout) as response:
+                    self.connected = True
+                    self._read_parts(response)
+            except (OSError, ValueError) as e:
+                if not self.closed:
+                    print(f"MJPEG stream error: {str(e)}", file=sys.stderr)
+            self.connected = False
+            if not self.closed:
+                time.sleep(self.reconnect_delay)
+
+    def _read_parts(self, stream):
+        while not self.closed:
+            # Skip to the next part boundary, then read its headers
+            line = stream.readline()
+            if not line:
+                return
+            if not line.startswith(b'--'):
+                continue
+            length = None
+            while True:
+                header = stream.readline()
+                if not header:
+                    return
+                header = header.strip()
+                if not header:
+                    break
+                name, _, value = header.partition(b':')
+                if name.strip().lower() == b'content-length':
+                    length = int(value)
+
+            if length is not None:
+                jpeg = stream.read(length)
+            else:
+                jpeg = self._read_until_eoi(stream)
+            if not jpeg:
+                return
+
+            with self.cond:
+                self.jpeg = jpeg
+                self.seq += 1
+                self.received_at = time.time()
+                self.received += 1
+                self.cond.notify_all()
+
+    def _read_until_eoi(self, stream):
+        """JPEG bytes for a part without Content-Length: up to the end-of-image marker
+
+        Peeks ahead so nothing after the marker is consumed; the next
+        boundary line stays in the stream.
+        """
+        data = bytearray()
+        while True:
+            chunk = stream.peek(65536)
+            if not chunk:
+                return None
+            start = len(data)
+            data += chunk
+            end = data.find(b'\xff\xd9', max(0, start - 1))
+            if end >= 0:
+                stream.read(end + 2 - start)
+                return bytes(data[:end + 2])
+            stream.read(len(chunk))
+
+    def isOpened(self):
+        """Wait up to timeout for the first frame"""
+        with self.cond:
+            return self.cond.wait_for(lambda: self.seq > 0 or self.closed, self.timeout) and self.seq > 0
+
+    def read(self, timeout=None):
+        """(True, newest frame) once a frame newer than the last read arrives, else (False, None)"""
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.seq > self.read_seq or self.closed,
+                                      self.timeout if timeout is None else timeout):
+                return False, None
+            if self.closed:
+                return False, None
+            jpeg, seq, received_at = self.jpeg, self.seq, self.received_at
+        if self.read_seq:
+            self.skipped += seq - self.read_seq - 1
+        self.read_seq = seq
+        self.last_received = received_at
+
+        start = time.perf_counter()
+        if self.reduction is None:
+            size = jpeg_size(jpeg)
+            self.reduction = reduction_for(size, self.target_size) if size else 1
+        frame = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), REDUCED_FLAGS[self.reduction])
+        self.decode_time += time.perf_counter() - start
+        if frame is None:
+            return False, None
+        self.decoded += 1
+        return True, frame
+
+    def set(self, prop, value):
+        # Buffering is already one frame; nothing to configure
+        return False
+
+    def get(self, prop):
+        return 0.0
+
+    def release(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def stats(self):
+        return {
+            'received': self.received,
+            'decoded': self.decoded,
+            'skipped': self.skipped,
+            'reduction': self.reduction,
+            'decode_ms': round(self.decode_time * 1000 / self.decoded, 2) if self.decoded else 0.0
+        }
@@ -0,0 +1,170 @@
+import argparse
+import importlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+from frame_transport import JsonlTransport
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+detector_module = importlib.import_module("try")
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def read_video(path):
+    """Yield (timestamp_s, frame) from a recorded video"""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video: {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    index = 0
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            position = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            yield (position if position > 0 else index / fps), frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def read_images(path, image_fps):
+    """Yield (timestamp_s, frame) from an image folder in file name order"""
+    names = sorted(n for n in os.listdir(path) if n.lower().endswith(IMAGE_EXTENSIONS))
+    for index, name in enumerate(names):
+        frame = cv2.imread(os.path.join(path, name))
+        if frame is None:
+            print(f"Skipping unreadable image: {name}", file=sys.stderr)
+            continue
+        yield index / image_fps, frame
+
+
+def replay_recording(source, output_path, realtime=False, image_fps=10.0, save_alerts=False,
+                     pyramid_scale=1, tracking=False, opencv_threads=None):
+    """Run the detector over one recording and write its DATA records as JSON lines"""
+    if not os.path.exists(source):
+        raise IOError(f"No such recording: {source}")
+    if opencv_threads is not None:
+        cv2.setNumThreads(opencv_threads)
+
+    transport = JsonlTransport(output_path)
+    detector = detector_module.SmartRiceImpurityDetector(droidcam_url=source, transport=transport)
+    detector.pyramid_scale = pyramid_scale
+    detector.tracking = tracking
+
+    frames = read_images(source, image_fps) if os.path.isdir(source) else read_video(source)
+    started = time.time()
+    frame_count = 0
+    contaminated = 0
+
+    try:
+        for video_time, frame in frames:
+            if realtime:
+                delay = started + video_time - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+
+            capture_time = time.time()
+            processed, _, impurities = detector.detect_impurities(frame)
+            impurities = detector.update_stability(impurities)
+            detector.tick_fps()
+
+            data = detector.build_frame_data(impurities)
+            data['latency_ms'] = round((time.time() - capture_time) * 1000, 1)
+            data['source'] = source
+            data['frame_index'] = frame_count
+            data['video_time'] = round(video_time, 3)
+            detector.send_data_to_ui(data)
+
+            if save_alerts:
+                if impurities:
+                    processed = detector.draw_detections(processed, impurities)
+                detector.check_alert(impurities, processed, capture_time)
+
+            frame_count += 1
+            if impurities:
+                contaminated += 1
+    finally:
+        detector.close_evidence_writer()
+        transport.close()
+
+    elapsed = time.time() - started
+    return {
+        'source': source,
+        'output': output_path,
+        'frames': frame_count,
+        'contaminated_frames': contaminated,
+        'seconds': round(elapsed, 2),
+        'fps': round(frame_count / elapsed, 1) if elapsed > 0 else 0.0
+    }
+
+
+def output_paths_for(sources, output_dir):
+    """One JSONL path per source, named from its path below the sources' common folder
+
+    a/cam.avi and b/cam.avi become a__cam.jsonl and b__cam.jsonl rather
+    than both writing to cam.jsonl.
+    """
+    paths = [os.path.abspath(os.path.normpath(source)) for source in sources]
+    root = os.path.commonpath([os.path.dirname(path) for path in paths])
+    outputs = []
+    for path in paths:
+        name = os.path.splitext(os.path.relpath(path, root))[0].replace(os.sep, '__')
+        outputs.append(os.path.join(output_dir, f"{name}.jsonl"))
+    return outputs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded videos or image folders through the detector")
+    parser.add_argument("sources", nargs="+", help="video files and/or image directories")
+    parser.add_argument("--output-dir", default="replays", help="where the per-recording JSONL files go")
+    parser.add_argument("--realtime", action="store_true",
+                        help="pace frames at their original timestamps instead of full speed")
+    parser.add_argument("--image-fps", type=float, default=10.0,
+                        help="frame rate assumed for image folders")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="recordings processed in parallel, one process each")
+    parser.add_argument("--save-alerts", action="store_true",
+                        help="also save alert evidence images like the live detector")
+    parser.add_argument("--pyramid-scale", type=int, default=1, choices=[1, 2, 4])
+    parser.add_argument("--track", action="store_true",
+                        help="track stones and count each one once per recording")
+    args = parser.parse_args()
+
+    jobs = list(zip(args.sources, output_paths_for(args.sources, args.output_dir)))
+    outputs = {}
+    for source, output in jobs:
+        if output in outputs:
+            parser.error(f"{outputs[output]} and {source} would both write {output}")
+        outputs[output] = source
+    os.makedirs(args.output_dir, exist_ok=True)
+    # With several worker processes, one OpenCV thread each avoids oversubscription
+    threads = 1 if args.workers > 1 else None
+    options = dict(realtime=args.realtime, image_fps=args.image_fps, save_alerts=args.save_alerts,
+                   pyramid_scale=args.pyramid_scale, tracking=args.track, opencv_threads=threads)
+
+    started = time.time()
+    total_frames = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(replay_recording, source, output, **options): source
+                   for source, output in jobs}
+        for future in as_completed(futures):
+            try:
+                summary = future.result()
+            except Exception as e:
+                print(f"ERROR: {futures[future]}: {str(e)}", file=sys.stderr)
+                continue
+            total_frames += summary['frames']
+            print(f"{summary['source']}: {summary['frames']} frames, "
+                  f"{summary['contaminated_frames']} with impurities, {summary['fps']} fps "
+                  f"-> {summary['output']}")
+
+    elapsed = time.time() - started
+    print(f"Replayed {len(jobs)} recording(s), {total_frames} frames in {elapsed:.1f}s "
+          f"({total_frames / elapsed if elapsed > 0 else 0:.1f} frames/s overall)")
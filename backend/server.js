@@ -120,6 +120,8 @@ let moistureAlert = false;
 // ================= GRAIN QUALITY DETECTION WITH BUFFERING =================
 let frameBuffer = '';
 let dataBuffer = '';
+// Last full DATA record; delta records (--telemetry-rate) are merged into it
+let grainState = {};
 
 // Start grain quality detection
 app.post('/api/grain-quality/start', (req, res) => {
@@ -136,6 +138,7 @@ app.post('/api/grain-quality/start', (req, res) => {
   // Reset buffers
   frameBuffer = '';
   dataBuffer = '';
+  grainState = {};
 
   pythonProcess.stdout.on('data', (chunk) => {
     const output = chunk.toString();
@@ -191,7 +194,19 @@ app.post('/api/grain-quality/start', (req, res) => {
             
             if (line.startsWith('DATA:')) {
               const jsonStr = line.substring(5).trim();
-              const grainData = JSON.parse(jsonStr);
+              const record = JSON.parse(jsonStr);
+              if (!record.delta) {
+                grainState = {};
+              }
+              for (const [key, value] of Object.entries(record)) {
+                if (value === null) {
+                  delete grainState[key];
+                } else {
+                  grainState[key] = value;
+                }
+              }
+              delete grainState.delta;
+              const grainData = { ...grainState };
               
               console.log(`📊 Data: ${grainData.impurities_count} stones, Score: ${grainData.quality_score}`);
               
@@ -0,0 +1,114 @@
+import json
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+class StageTimers:
+    """Rolling per-stage latency windows with p50/p95/p99 summaries
+
+    Callers hold a lap function from start(); each lap(stage) call records
+    the time since the previous one. When timing is off the detector keeps
+    no StageTimers at all, so the only cost left is a None check per stage.
+    """
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.samples = {}
+        self.counts = {}
+        self.totals = {}
+        self.lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self.lock:
+            samples = self.samples.get(stage)
+            if samples is None:
+                samples = self.samples[stage] = deque(maxlen=self.window)
+                self.counts[stage] = 0
+                self.totals[stage] = 0.0
+            samples.append(seconds)
+            self.counts[stage] += 1
+            self.totals[stage] += seconds
+
+    def start(self):
+        """Lap clock for one frame: lap(stage) records the time since the last lap"""
+        last = [time.perf_counter()]
+
+        def lap(stage):
+            now = time.perf_counter()
+            self.record(stage, now - last[0])
+            last[0] = now
+        return lap
+
+    def snapshot(self):
+        """{stage: count, mean and p50/p95/p99 in ms} over the rolling window"""
+        with self.lock:
+            windows = {stage: np.array(samples) for stage, samples in self.samples.items()}
+            counts = dict(self.counts)
+        result = {}
+        for stage, values in windows.items():
+            p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1000
+            result[stage] = {
+                'count': counts[stage],
+                'mean_ms': round(float(values.mean() * 1000), 3),
+                'p50_ms': round(float(p50), 3),
+                'p95_ms': round(float(p95), 3),
+                'p99_ms': round(float(p99), 3)
+            }
+        return result
+
+    def prometheus_text(self):
+        """Snapshot in the Prometheus text format, one summary per stage"""
+        snapshot = self.snapshot()
+        with self.lock:
+            totals = dict(self.totals)
+        lines = ["# HELP detector_stage_seconds Time spent in each detector stage",
+                 "# TYPE detector_stage_seconds summary"]
+        for stage, stats in sorted(snapshot.items()):
+            for quantile in ('50', '95', '99'):
+                lines.append(f'detector_stage_seconds{{stage="{stage}",quantile="0.{quantile}"}} '
+                             f"{stats[f'p{quantile}_ms'] / 1000:.6f}")
+            lines.append(f'detector_stage_seconds_sum{{stage="{stage}"}} {totals[stage]:.6f}')
+            lines.append(f'detector_stage_seconds_count{{stage="{stage}"}} {stats["count"]}')
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Local HTTP endpoint: /metrics (Prometheus text) and /metrics.json"""
+
+    def __init__(self, timers, port=9102, host="127.0.0.1"):
+        self.timers = timers
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                if handler.path == '/metrics':
+                    body = timers.prometheus_text().encode('utf-8')
+                    content_type = 'text/plain; version=0.0.4'
+                elif handler.path == '/metrics.json':
+                    body = json.dumps(timers.snapshot()).encode('utf-8')
+                    content_type = 'application/json'
+                else:
+                    handler.send_error(404)
+                    return
+                handler.send_response(200)
+                handler.send_header('Content-Type', content_type)
+                handler.send_header('Content-Length', str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="metrics", daemon=True)
+        self.thread.start()
+        print(f"Stage metrics at http://{host}:{self.server.server_address[1]}/metrics", file=sys.stderr)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
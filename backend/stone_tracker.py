@@ -0,0 +1,150 @@
+import time
+
+
+def iou(a, b):
+    """Intersection over union of two (x, y, w, h) boxes"""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+def centroid(box):
+    x, y, w, h = box
+    return x + w / 2.0, y + h / 2.0
+
+
+class Track:
+    """One stone followed across frames"""
+
+    def __init__(self, track_id, impurity):
+        self.id = track_id
+        self.impurity = impurity
+        self.bbox = impurity['bbox']
+        self.hits = 1
+        self.misses = 0
+        self.confirmed = False
+        self.first_seen = time.time()
+
+
+class StoneTracker:
+    """Centroid/IoU tracker giving every stone a persistent id
+
+    A track is confirmed after confirm_hits matched frames and is counted
+    and reported once at that moment. It survives up to max_misses frames
+    without a match, so one dropped detection does not reset it.
+    """
+
+    def __init__(self, confirm_hits=3, iou_threshold=0.3, max_distance=40, max_misses=5):
+        self.confirm_hits = confirm_hits
+        self.iou_threshold = iou_threshold
+        self.max_distance = max_distance
+        self.max_misses = max_misses
+        self.tracks = []
+        self.next_id = 1
+        self.confirmed_total = 0
+
+    def match(self, impurities):
+        """Greedy assignment: IoU overlaps first, then nearest centroids"""
+        pairs = []
+        for ti, track in enumerate(self.tracks):
+            tx, ty = centroid(track.bbox)
+            for di, imp in enumerate(impurities):
+                overlap = iou(track.bbox, imp['bbox'])
+                if overlap >= self.iou_threshold:
+                    pairs.append((1.0 + overlap, ti, di))
+                    continue
+                dx, dy = centroid(imp['bbox'])
+                distance = ((tx - dx) ** 2 + (ty - dy) ** 2) ** 0.5
+                if distance <= self.max_distance:
+                    pairs.append((1.0 - distance / self.max_distance, ti, di))
+
+        pairs.sort(reverse=True)
+        matched_tracks, matched_dets = {}, set()
+        for _, ti, di in pairs:
+            if ti in matched_tracks or di in matched_dets:
+                continue
+            matched_tracks[ti] = di
+            matched_dets.add(di)
+        return matched_tracks
+
+    def update(self, impurities):
+        """Advance all tracks by one frame; returns impurities tagged with track ids
+
+        Each returned detection is a new dict with 'track_id' and
+        'new_stone' (True only on the frame its track gets confirmed).
+        """
+        matched = self.match(impurities)
+        assigned = {}
+
+        for ti, track in enumerate(self.tracks):
+            di = matched.get(ti)
+            if di is None:
+                track.misses += 1
+                continue
+            track.impurity = impurities[di]
+            track.bbox = impurities[di]['bbox']
+            track.hits += 1
+            track.misses = 0
+            new_stone = False
+            if not track.confirmed and track.hits >= self.confirm_hits:
+                track.confirmed = True
+                self.confirmed_total += 1
+                new_stone = True
+            assigned[di] = (track.id, new_stone)
+
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+
+        for di, imp in enumerate(impurities):
+            if di in assigned:
+                continue
+            track = Track(self.next_id, imp)
+            self.next_id += 1
+            new_stone = self.confirm_hits <= 1
+            if new_stone:
+                track.confirmed = True
+                self.confirmed_total += 1
+            self.tracks.append(track)
+            assigned[di] = (track.id, new_stone)
+
+        return [dict(imp, track_id=assigned[di][0], new_stone=assigned[di][1])
+                for di, imp in enumerate(impurities)]
+
+    def lookup(self, bbox, pixels):
+        """Features of a currently visible track whose blob is unchanged, or None
+
+        Only the shape features carry over; geometry and pixel counts are
+        from the frame they were measured in, callers overwrite them.
+        """
+        for track in self.tracks:
+            if track.misses:
+                continue
+            known = track.impurity
+            if (iou(track.bbox, bbox) >= 0.9 and
+                    abs(known.get('pixels', 0) - pixels) <= 0.05 * pixels):
+                return known
+        return None
+
+    def stability(self):
+        """Matched frames of the longest-lived visible stone, capped at confirm_hits
+
+        Raw per-track hit counts are in summary().
+        """
+        hits = max((t.hits for t in self.tracks if t.misses == 0), default=0)
+        return min(hits, self.confirm_hits)
+
+    def reset_session(self):
+        """Start counting unique stones from zero"""
+        self.tracks = []
+        self.confirmed_total = 0
+
+    def summary(self):
+        return [{
+            'id': t.id,
+            'bbox': [int(v) for v in t.bbox],
+            'hits': t.hits,
+            'confirmed': t.confirmed
+        } for t in self.tracks if t.misses == 0]
@@ -0,0 +1,180 @@
+import json
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BOUNDARY = 'dispenzoframe'
+
+INDEX_PAGE = b"""<!doctype html>
+<html><head><title>Rice impurity stream</title></head>
+<body style="background:#111;color:#eee;font-family:sans-serif">
+<img src="/stream.mjpg" style="max-width:100%">
+<pre id="data"></pre>
+<script>
+new EventSource('/events').onmessage = e => {
+  document.getElementById('data').textContent = JSON.stringify(JSON.parse(e.data), null, 2);
+};
+</script>
+</body></html>
+"""
+
+
+class LatestValue:
+    """Newest published item plus a sequence number that viewers wait on"""
+
+    def __init__(self):
+        self.value = None
+        self.seq = 0
+        self.cond = threading.Condition()
+
+    def publish(self, value):
+        with self.cond:
+            self.value = value
+            self.seq += 1
+            self.cond.notify_all()
+
+    def wait_newer(self, seq, timeout):
+        """(seq, value) newer than seq, or None after timeout"""
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.seq > seq, timeout):
+                return None
+            return self.seq, self.value
+
+
+class StreamServer:
+    """Embedded HTTP server: MJPEG at /stream.mjpg and DATA as server-sent events at /events
+
+    The detector publishes each JPEG and each DATA record once; every viewer
+    thread picks up the newest one when it is ready for it, so a slow viewer
+    only skips frames. A viewer whose socket stays blocked for
+    write_timeout seconds is disconnected. Detection never writes to sockets.
+    """
+
+    def __init__(self, port=8090, host="0.0.0.0", max_clients=16, write_timeout=2.0):
+        self.frames = LatestValue()
+        self.events = LatestValue()
+        self.max_clients = max_clients
+        self.write_timeout = write_timeout
+        self.clients = 0
+        self.lock = threading.Lock()
+        self.closed = False
+
+        self.served_frames = 0
+        self.skipped_frames = 0
+        self.dropped_clients = 0
+        self.rejected_clients = 0
+
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="stream-server", daemon=True)
+        self.thread.start()
+        print(f"MJPEG stream at http://{host}:{self.server.server_address[1]}/stream.mjpg", file=sys.stderr)
+
+    def publish_frame(self, jpeg):
+        self.frames.publish(bytes(jpeg))
+
+    def publish_data(self, data):
+        self.events.publish(json.dumps(data).encode('utf-8'))
+
+    def _handler_class(self):
+        stream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/':
+                    self.send_body(INDEX_PAGE, 'text/html')
+                elif self.path == '/snapshot.jpg':
+                    if stream.frames.value is None:
+                        self.send_error(503, "No frame yet")
+                    else:
+                        self.send_body(stream.frames.value, 'image/jpeg')
+                elif self.path == '/stream.mjpg':
+                    stream.serve_client(self, stream.write_mjpeg)
+                elif self.path == '/events':
+                    stream.serve_client(self, stream.write_events)
+                else:
+                    self.send_error(404)
+
+            def send_body(self, body, content_type):
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def serve_client(self, handler, writer):
+        with self.lock:
+            if self.clients >= self.max_clients:
+                self.rejected_clients += 1
+                handler.send_error(503, "Too many viewers")
+                return
+            self.clients += 1
+        handler.connection.settimeout(self.write_timeout)
+        try:
+            writer(handler)
+        except socket.timeout:
+            self.dropped_clients += 1
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with self.lock:
+                self.clients -= 1
+
+    def write_mjpeg(self, handler):
+        handler.send_response(200)
+        handler.send_header('Content-Type', f'multipart/x-mixed-replace; boundary={BOUNDARY}')
+        handler.send_header('Cache-Control', 'no-cache')
+        handler.end_headers()
+        seq = 0
+        while not self.closed:
+            latest = self.frames.wait_newer(seq, timeout=1.0)
+            if latest is None:
+                continue
+            if seq:
+                self.skipped_frames += latest[0] - seq - 1
+            seq, jpeg = latest
+            handler.wfile.write(f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                                f"Content-Length: {len(jpeg)}\r\n\r\n".encode('ascii'))
+            handler.wfile.write(jpeg)
+            handler.wfile.write(b"\r\n")
+            self.served_frames += 1
+
+    def write_events(self, handler):
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'text/event-stream')
+        handler.send_header('Cache-Control', 'no-cache')
+        handler.end_headers()
+        seq = 0
+        last_write = time.time()
+        while not self.closed:
+            latest = self.events.wait_newer(seq, timeout=1.0)
+            if latest is None:
+                # Comment line as a keep-alive so dead viewers are noticed
+                if time.time() - last_write > 15:
+                    handler.wfile.write(b": ping\n\n")
+                    last_write = time.time()
+                continue
+            seq, payload = latest
+            handler.wfile.write(b"data: " + payload + b"\n\n")
+            last_write = time.time()
+
+    def stats(self):
+        return {
+            'viewers': self.clients,
+            'served_frames': self.served_frames,
+            'skipped_frames': self.skipped_frames,
+            'dropped_viewers': self.dropped_clients,
+            'rejected_viewers': self.rejected_clients
+        }
+
+    def close(self):
+        self.closed = True
+        self.server.shutdown()
+        self.server.server_close()
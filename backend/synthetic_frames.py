@@ -0,0 +1,107 @@
+import cv2
+import numpy as np
+
+FRAME_WIDTH = 640
+FRAME_HEIGHT = 480
+
+# Generator settings; every scenario overrides a few of them
+DEFAULTS = {
+    'stones': (1, 5),           # stones per frame (min, max)
+    'stone_size': (7, 16),      # stone radius in pixels (min, max)
+    'contrast': (60, 110),      # how much darker than the tray a stone is
+    'stone_texture': 18.0,      # strength of the mottling on a stone's surface
+    'gradient': 0.0,            # lighting falloff across the frame (0 = flat)
+    'noise': 4.0,               # sensor noise standard deviation
+    'grains': 1200,             # rice grains scattered on the tray
+    'grain_contrast': (5, 20)   # how much brighter than the tray a grain is
+}
+
+SCENARIOS = {
+    'clean': {'stones': (0, 0)},
+    'baseline': {},
+    'many_stones': {'stones': (10, 25)},
+    'small_stones': {'stones': (3, 8), 'stone_size': (6, 8)},
+    'low_contrast': {'contrast': (30, 50)},
+    'lighting_gradient': {'gradient': 0.35},
+    'noisy': {'noise': 12.0}
+}
+
+
+def overlaps(box, boxes, margin=6):
+    x, y, w, h = box
+    for ox, oy, ow, oh in boxes:
+        if (x - margin < ox + ow and ox - margin < x + w and
+                y - margin < oy + oh and oy - margin < y + h):
+            return True
+    return False
+
+
+def generate_frame(rng, tray=180.0, stones=DEFAULTS['stones'], stone_size=DEFAULTS['stone_size'],
+                   contrast=DEFAULTS['contrast'], gradient=DEFAULTS['gradient'],
+                   noise=DEFAULTS['noise'], grains=DEFAULTS['grains'],
+                   grain_contrast=DEFAULTS['grain_contrast'],
+                   stone_texture=DEFAULTS['stone_texture']):
+    """One rice-on-tray BGR frame and the ground-truth (x, y, w, h) box of every stone"""
+    frame = np.full((FRAME_HEIGHT, FRAME_WIDTH, 3), tray, dtype=np.float32)
+
+    # Rice grains: small bright ellipses, slightly warm
+    for _ in range(grains):
+        center = (int(rng.integers(0, FRAME_WIDTH)), int(rng.integers(0, FRAME_HEIGHT)))
+        axes = (int(rng.integers(5, 8)), int(rng.integers(2, 4)))
+        shade = min(255.0, tray + rng.uniform(*grain_contrast))
+        cv2.ellipse(frame, center, axes, float(rng.uniform(0, 180)), 0, 360,
+                    (shade - 6, shade - 2, shade), -1)
+
+    # Stones: irregular dark brown-gray polygons that do not touch each other
+    boxes = []
+    for _ in range(int(rng.integers(stones[0], stones[1] + 1))):
+        for _attempt in range(20):
+            radius = rng.uniform(*stone_size)
+            cx = rng.uniform(radius + 2, FRAME_WIDTH - radius - 2)
+            cy = rng.uniform(radius + 2, FRAME_HEIGHT - radius - 2)
+            num_points = int(rng.integers(6, 11))
+            angles = np.sort(rng.uniform(0, 2 * np.pi, num_points))
+            radii = radius * rng.uniform(0.7, 1.0, num_points)
+            points = np.stack([cx + radii * np.cos(angles), cy + radii * np.sin(angles)], axis=1)
+            points = np.round(points).astype(np.int32)
+            box = cv2.boundingRect(points)
+            if not overlaps(box, boxes):
+                break
+        else:
+            continue
+
+        shade = max(0.0, tray - rng.uniform(*contrast))
+        cv2.fillPoly(frame, [points], (shade * 0.85, shade * 0.93, shade))
+
+        # Mottled surface so a stone is not a perfectly flat patch
+        x, y, w, h = box
+        stone_mask = np.zeros((h, w), dtype=np.uint8)
+        cv2.fillPoly(stone_mask, [points - [x, y]], 1)
+        texture = cv2.GaussianBlur(rng.normal(0, stone_texture, (h, w)).astype(np.float32), (3, 3), 0)
+        frame[y:y+h, x:x+w] += (texture * stone_mask)[..., None]
+        boxes.append(tuple(int(v) for v in box))
+
+    # Uneven lighting: linear falloff along a random direction
+    if gradient > 0:
+        theta = rng.uniform(0, 2 * np.pi)
+        ys, xs = np.mgrid[0:FRAME_HEIGHT, 0:FRAME_WIDTH].astype(np.float32)
+        ramp = xs * np.cos(theta) + ys * np.sin(theta)
+        ramp = (ramp - ramp.min()) / (ramp.max() - ramp.min())
+        frame *= (1.0 - gradient * ramp)[..., None]
+
+    if noise > 0:
+        frame += rng.normal(0, noise, frame.shape).astype(np.float32)
+
+    return np.clip(frame, 0, 255).astype(np.uint8), boxes
+
+
+def generate_scenario(name, num_frames, seed=0):
+    """Seeded list of (frame, ground_truth_boxes) for one named scenario
+
+    The tray brightness is fixed per scenario, like a single mounted camera,
+    so the detector's one-time background calibration stays valid.
+    """
+    settings = dict(DEFAULTS, **SCENARIOS[name])
+    rng = np.random.default_rng([seed, sorted(SCENARIOS).index(name)])
+    tray = rng.uniform(165, 195)
+    return [generate_frame(rng, tray, **settings) for _ in range(num_frames)]
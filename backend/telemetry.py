@@ -0,0 +1,243 @@
+import json
+import struct
+import time
+
+STATUS_CODES = {'CLEAN': 0, 'CONTAMINATION DETECTED': 1}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+# Fields with a fixed binary layout, in presence-bitmask order
+BINARY_FIELDS = [
+    ('impurities_count', 'H'),
+    ('quality_score', 'B'),
+    ('status', 'B'),
+    # Consecutive detection frames; only the tracker caps it, so without tracking
+    # it passes 65535 within the hour
+    ('stability', 'I'),
+    ('background_intensity', 'f'),
+    ('fps', 'f'),
+    ('latency_ms', 'f'),
+    ('timestamp', 'I')
+]
+DETECTIONS_BIT = 1 << len(BINARY_FIELDS)
+EXTRAS_BIT = DETECTIONS_BIT << 1
+
+# Binary message: flags (bit 0 = full state), sequence number, presence bitmask
+BINARY_HEADER = struct.Struct('<BIH')
+DETECTION = struct.Struct('<HIf')
+DETECTION_KEYS = ('confidence', 'area', 'darkness_diff')
+
+# Changes smaller than these do not count as changed on their own
+DEFAULT_DEADBANDS = {'fps': 0.5, 'latency_ms': 5.0, 'background_intensity': 1.0}
+
+
+def encode_binary(seq, fields, full):
+    """Pack a full or delta record; fields outside BINARY_FIELDS travel as compact JSON"""
+    mask = 0
+    body = bytearray()
+    extras = {}
+    for bit, (name, fmt) in enumerate(BINARY_FIELDS):
+        if name not in fields or fields[name] is None:
+            continue
+        value = fields[name]
+        if name == 'status':
+            value = STATUS_CODES.get(value)
+            if value is None:
+                extras['status'] = fields['status']
+                continue
+        elif name == 'timestamp':
+            h, m, s = (int(part) for part in value.split(':'))
+            value = h * 3600 + m * 60 + s
+        mask |= 1 << bit
+        body += struct.pack('<' + fmt, value)
+
+    for name, value in fields.items():
+        if name == 'detections':
+            continue
+        if value is None or all(name != field for field, _ in BINARY_FIELDS):
+            extras[name] = value
+
+    detections = fields.get('detections')
+    if detections is not None:
+        if all(set(d) == set(DETECTION_KEYS) for d in detections):
+            mask |= DETECTIONS_BIT
+            body += struct.pack('<H', len(detections))
+            for d in detections:
+                body += DETECTION.pack(d['confidence'], d['area'], d['darkness_diff'])
+        else:
+            extras['detections'] = detections
+
+    if extras:
+        mask |= EXTRAS_BIT
+        extra_bytes = json.dumps(extras, separators=(',', ':')).encode('utf-8')
+        body += struct.pack('<I', len(extra_bytes)) + extra_bytes
+
+    return BINARY_HEADER.pack(1 if full else 0, seq, mask) + bytes(body)
+
+
+def decode_binary(payload):
+    """Inverse of encode_binary: (seq, full, fields)"""
+    flags, seq, mask = BINARY_HEADER.unpack_from(payload, 0)
+    offset = BINARY_HEADER.size
+    fields = {}
+    for bit, (name, fmt) in enumerate(BINARY_FIELDS):
+        if not mask & (1 << bit):
+            continue
+        value, = struct.unpack_from('<' + fmt, payload, offset)
+        offset += struct.calcsize('<' + fmt)
+        if name == 'status':
+            value = STATUS_NAMES[value]
+        elif name == 'timestamp':
+            value = f"{value // 3600:02d}:{value // 60 % 60:02d}:{value % 60:02d}"
+        elif fmt == 'f':
+            value = round(value, 1)
+        fields[name] = value
+
+    if mask & DETECTIONS_BIT:
+        count, = struct.unpack_from('<H', payload, offset)
+        offset += 2
+        detections = []
+        for _ in range(count):
+            confidence, area, darkness = DETECTION.unpack_from(payload, offset)
+            offset += DETECTION.size
+            detections.append({'confidence': confidence, 'area': area,
+                               'darkness_diff': round(darkness, 2)})
+        fields['detections'] = detections
+
+    if mask & EXTRAS_BIT:
+        length, = struct.unpack_from('<I', payload, offset)
+        offset += 4
+        fields.update(json.loads(bytes(payload[offset:offset + length])))
+
+    return seq, bool(flags & 1), fields
+
+
+class DeltaTelemetry:
+    """Coalesces DATA records to at most rate_hz messages and sends only what changed
+
+    A status change (CLEAN <-> CONTAMINATION DETECTED) is always sent at once.
+    Every keyframe_interval seconds the full record goes out so a consumer
+    that joined late can resync. JSON deltas carry 'delta': true and are
+    merged into the previous state; binary records use encode_binary and
+    the transport's send_telemetry.
+    """
+
+    def __init__(self, transport, rate_hz=2.0, binary=False, keyframe_interval=10.0,
+                 deadbands=None):
+        if binary and not hasattr(transport, 'send_telemetry'):
+            raise ValueError(f"Transport '{transport.name}' cannot carry binary telemetry")
+        self.transport = transport
+        self.min_interval = 1.0 / rate_hz if rate_hz > 0 else 0.0
+        self.binary = binary
+        self.keyframe_interval = keyframe_interval
+        self.deadbands = DEFAULT_DEADBANDS if deadbands is None else deadbands
+
+        self.state = None
+        self.seq = 0
+        self.last_send = 0.0
+        self.last_keyframe = 0.0
+
+        self.offered = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.binary_bytes = 0
+
+    def due(self, status, now=None):
+        """True if a record with this status would be sent now
+
+        Lets the caller skip building the record entirely when it would be coalesced.
+        """
+        now = time.monotonic() if now is None else now
+        self.offered += 1
+        if self.state is None or status != self.state.get('status'):
+            return True
+        if now - self.last_send >= self.min_interval:
+            return True
+        self.coalesced += 1
+        return False
+
+    def changed_fields(self, data):
+        changes = {}
+        for name, value in data.items():
+            if name not in self.state:
+                changes[name] = value
+                continue
+            old = self.state[name]
+            if value == old:
+                continue
+            band = self.deadbands.get(name)
+            if band and isinstance(value, (int, float)) and isinstance(old, (int, float)) \
+                    and abs(value - old) < band:
+                continue
+            changes[name] = value
+        for name in self.state:
+            if name not in data:
+                changes[name] = None
+        return changes
+
+    def publish(self, data, now=None):
+        """Send the record (or its delta); call after due() returned True"""
+        now = time.monotonic() if now is None else now
+        full = self.state is None or now - self.last_keyframe >= self.keyframe_interval
+        if full:
+            fields = data
+            self.last_keyframe = now
+        else:
+            fields = self.changed_fields(data)
+            # Deadbanded fields stay at the value the consumer last saw
+            data = dict(data)
+            for name in self.state:
+                if name in data and name not in fields:
+                    data[name] = self.state[name]
+            if not fields:
+                self.last_send = now
+                return
+
+        self.seq += 1
+        if self.binary:
+            payload = encode_binary(self.seq, fields, full)
+            self.transport.send_telemetry(payload)
+            self.binary_bytes += len(payload)
+        else:
+            payload = dict(fields, seq=self.seq) if full else dict(fields, delta=True, seq=self.seq)
+            self.transport.send_data(payload)
+        self.state = {name: value for name, value in data.items() if value is not None}
+        self.sent += 1
+        self.last_send = now
+
+    def stats(self):
+        return {
+            'offered': self.offered,
+            'sent': self.sent,
+            'coalesced': self.coalesced,
+            'binary_bytes': self.binary_bytes
+        }
+
+
+class TelemetryState:
+    """Consumer side: rebuilds full records from keyframes and deltas"""
+
+    def __init__(self):
+        self.state = {}
+        self.seq = 0
+        self.gaps = 0
+
+    def apply(self, seq, full, fields):
+        if self.seq and seq != self.seq + 1:
+            self.gaps += 1
+        self.seq = seq
+        if full:
+            self.state = {}
+        for name, value in fields.items():
+            if value is None:
+                self.state.pop(name, None)
+            else:
+                self.state[name] = value
+        return dict(self.state)
+
+    def apply_json(self, record):
+        record = dict(record)
+        full = not record.pop('delta', False)
+        return self.apply(record.pop('seq', self.seq + 1), full, record)
+
+    def apply_binary(self, payload):
+        return self.apply(*decode_binary(payload))
@@ -412,9 +412,21 @@ import numpy as np
 from datetime import datetime
 import time
 import os
-import json
 import sys
-import base64
+import argparse
+import threading
+
+from frame_pipeline import FramePipeline
+from frame_transport import StdoutTransport, create_transport
+from stone_tracker import StoneTracker
+from evidence_writer import EvidenceWriter
+from stage_metrics import MetricsServer, StageTimers
+from telemetry import DeltaTelemetry
+from frame_publisher import AdaptiveFramePublisher
+from stream_server import StreamServer
+from cascade import YoloVerifier
+from frame_scheduler import LatencyScheduler
+from mjpeg_client import MjpegReader
 
 # ===== FIX FOR WINDOWS ENCODING =====
 if sys.platform == 'win32':
@@ -422,12 +434,97 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 
+# Constant detection inputs, built once instead of per frame
+DARK_HSV_LOWER = np.array([0, 0, 0], dtype=np.uint8)
+DARK_HSV_UPPER = np.array([180, 255, 100], dtype=np.uint8)
+KERNEL_3X3 = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+
+
+def merge_rois(rois):
+    """Merge overlapping [x0, y0, x1, y1] rectangles until none overlap"""
+    merged = []
+    for roi in sorted(rois):
+        roi = list(roi)
+        changed = True
+        while changed:
+            changed = False
+            for other in merged:
+                if (roi[0] < other[2] and other[0] < roi[2] and
+                        roi[1] < other[3] and other[1] < roi[3]):
+                    merged.remove(other)
+                    roi = [min(roi[0], other[0]), min(roi[1], other[1]),
+                           max(roi[2], other[2]), max(roi[3], other[3])]
+                    changed = True
+                    break
+        merged.append(roi)
+    return merged
+
+
+class DetectionWorkspace:
+    """Reusable per-frame buffers handed to OpenCV as dst= outputs
+    
+    Output frames rotate through a few slots, which is enough when each
+    frame is finished before the next is detected. With track_frames (the
+    pipelined loop) frames come from a free list instead and only go back
+    to it through release_frame(), so a frame still queued or being emitted
+    is never overwritten, however far detection runs ahead.
+    With enabled=False every get() returns None and OpenCV allocates as usual.
+    """
+    
+    def __init__(self, enabled=True, frame_slots=4):
+        self.enabled = enabled
+        self.frame_slots = frame_slots
+        self.frame_index = 0
+        self.buffers = {}
+        self.track_frames = False
+        self.free_frames = []
+        self.frames_allocated = 0
+        self.frame_lock = threading.Lock()
+    
+    def get(self, name, shape, dtype=np.uint8):
+        """Buffer reused across frames, or None when disabled"""
+        if not self.enabled:
+            return None
+        buffer = self.buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            self.buffers[name] = buffer
+        return buffer
+    
+    def next_frame(self, shape):
+        """Buffer for the next output frame"""
+        if not self.enabled:
+            return None
+        if not self.track_frames:
+            self.frame_index = (self.frame_index + 1) % self.frame_slots
+            return self.get(f'frame{self.frame_index}', shape)
+        with self.frame_lock:
+            while self.free_frames:
+                frame = self.free_frames.pop()
+                if frame.shape == shape:
+                    return frame
+            self.frames_allocated += 1
+        return np.empty(shape, dtype=np.uint8)
+    
+    def release_frame(self, frame):
+        """Hand a frame from next_frame() back once nothing uses it any more"""
+        if self.track_frames and frame is not None:
+            with self.frame_lock:
+                self.free_frames.append(frame)
+
+
 class SmartRiceImpurityDetector:
-    """Smart detector that streams frames via base64"""
+    """Smart detector that streams annotated frames to the UI"""
     
-    def __init__(self, droidcam_url="http://10.242.149.224:4747/video"):
+    def __init__(self, droidcam_url="http://10.242.149.224:4747/video", pipelined=False,
+                 transport=None):
         self.droidcam_url = droidcam_url
+        self.pipelined = pipelined
+        self.transport = transport or StdoutTransport()
+        self.pipeline = None
         self.cap = None
+        # 'opencv' (cv2.VideoCapture) or 'mjpeg' (newest-frame MjpegReader with reduced decode)
+        self.camera_reader = 'opencv'
         self.impurity_counter = 0
         self.alert_sent = False
         self.last_alert_time = 0
@@ -438,47 +535,124 @@ class SmartRiceImpurityDetector:
         self.stable_frames = 3
         self.alert_cooldown = 10
         
+        # Feature extraction: 'contours' (legacy), 'components' (single labelling pass)
+        # or 'auto'. Contours cost ~0.55 ms per candidate blob, components ~2-2.7 ms
+        # almost regardless of count, so auto labels only from this many blobs up
+        self.feature_engine = 'auto'
+        self.components_min_blobs = 5
+        
+        # Reusable per-frame buffers; ROI crops vary in size, so they allocate
+        self.workspace = DetectionWorkspace()
+        self.roi_workspace = DetectionWorkspace(enabled=False)
+        
+        # Coarse-to-fine mode: screen at 1/pyramid_scale resolution (1 = off) and run
+        # the full pipeline only inside candidate ROIs padded by roi_padding pixels
+        self.pyramid_scale = 1
+        self.roi_padding = 16
+        self.screen_darkness = 10
+        self.max_roi_coverage = 0.5
+        
+        # Change gating: skip detection when a gate_size thumbnail moved by no more
+        # than gate_threshold gray levels, but re-analyze at least every gate_max_skip frames
+        self.change_gating = False
+        self.gate_size = (80, 60)
+        self.gate_threshold = 8
+        self.gate_max_skip = 30
+        self.gate_reference = None
+        self.frames_since_full = 0
+        self.gate_skipped = 0
+        self.gate_analyzed = 0
+        self.gate_full_time = 0.0
+        self.gate_check_time = 0.0
+        self.last_cleaned = None
+        self.last_impurities = []
+        self.last_result_cached = False
+        
         # Background reference
         self.background_color = None
         self.calibrated = False
+        
+        # Stone tracking: persistent ids replace the consecutive-frame counter, and
+        # each stone is alerted and counted once per session
+        self.tracking = False
+        self.tracker = StoneTracker(confirm_hits=self.stable_frames)
+        
+        # Alert images go through a background writer, created on the first alert
+        self.evidence_options = {}
+        self.evidence_writer = None
+        
+        # Per-stage timing (None = off); a snapshot joins DATA every metrics_interval seconds
+        self.stage_timers = None
+        self.metrics_interval = 5.0
+        
+        # Optional DeltaTelemetry: rate-limited, delta-encoded DATA instead of one record per frame
+        self.telemetry = None
+        
+        # Optional AdaptiveFramePublisher: non-blocking stream replacing the fixed 200 ms sends
+        self.frame_publisher = None
+        
+        # Optional StreamServer: MJPEG and server-sent DATA for any number of browser viewers
+        self.stream_server = None
+        
+        # Cascade mode: a YoloVerifier confirms detections on the frames the classical stage flags
+        self.verifier = None
+        
+        # Optional LatencyScheduler picking full / screen / skip per frame
+        self.scheduler = None
+        
+        # Streaming state
+        self.reset_stream_state()
     
     def send_data_to_ui(self, data):
-        """Send data to UI via stdout in JSON format"""
+        """Send data to UI through the selected transport"""
         try:
-            output = json.dumps(data)
-            print(f"DATA:{output}", flush=True)
-            sys.stdout.flush()
+            if self.stream_server:
+                self.stream_server.publish_data(data)
+            if self.telemetry:
+                self.telemetry.publish(data)
+            else:
+                self.transport.send_data(data)
         except Exception as e:
             print(f"Error sending data: {str(e)}", file=sys.stderr)
     
-    def send_frame_to_ui(self, frame):
-        """Encode frame as base64 and send to UI"""
+    def send_frame_to_ui(self, frame, lap=None):
+        """Encode frame as JPEG and send it to UI"""
         try:
             # Encode frame as JPEG
             _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 70])
-            # Convert to base64
-            frame_base64 = base64.b64encode(buffer).decode('utf-8')
-            
-            # Send as FRAME: prefix
-            print(f"FRAME:{frame_base64}", flush=True)
-            sys.stdout.flush()
+            if lap:
+                lap('encode')
+            if self.stream_server:
+                self.stream_server.publish_frame(buffer)
+            self.transport.send_frame(buffer)
+            if lap:
+                lap('send_frame')
         except Exception as e:
             print(f"Error sending frame: {str(e)}", file=sys.stderr)
     
     def connect_camera(self):
         """Connect to DroidCam"""
-        print("Connecting to DroidCam...")
+        print("Connecting to DroidCam...", file=sys.stderr)
+        if self.camera_reader == 'mjpeg':
+            self.cap = MjpegReader(self.droidcam_url, target_size=(640, 480))
+            if not self.cap.isOpened():
+                print("ERROR: Could not connect to DroidCam", file=sys.stderr)
+                self.cap.release()
+                return False
+            print("SUCCESS: DroidCam connected!", file=sys.stderr)
+            return True
+        
         self.cap = cv2.VideoCapture(self.droidcam_url)
         
         if not self.cap.isOpened():
             self.cap = cv2.VideoCapture(self.droidcam_url, cv2.CAP_FFMPEG)
         
         if not self.cap.isOpened():
-            print("ERROR: Could not connect to DroidCam")
+            print("ERROR: Could not connect to DroidCam", file=sys.stderr)
             return False
         
         self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-        print("SUCCESS: DroidCam connected!")
+        print("SUCCESS: DroidCam connected!", file=sys.stderr)
         return True
     
     def calibrate_background(self, frame):
@@ -494,48 +668,86 @@ class SmartRiceImpurityDetector:
             'intensity': avg_intensity
         }
         
-        print(f"Background calibrated - Avg intensity: {avg_intensity:.1f}")
+        print(f"Background calibrated - Avg intensity: {avg_intensity:.1f}", file=sys.stderr)
         self.calibrated = True
+        self.gate_reference = None
     
-    def detect_impurities(self, frame):
-        """Enhanced detection for dark stones in rice"""
-        frame = cv2.resize(frame, (640, 480))
-        original = frame.copy()
-        
-        if not self.calibrated:
-            self.calibrate_background(frame)
-        
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    def build_impurity_mask(self, frame, gray, ws=None, lap=None):
+        """Combine darkness, adaptive, color and edge cues into a cleaned mask"""
+        ws = ws or self.workspace
+        shape = gray.shape
         background_intensity = self.background_color['intensity']
         
         # Detection methods
         darkness_threshold = background_intensity - 30
-        _, dark_mask = cv2.threshold(gray, int(darkness_threshold), 255, cv2.THRESH_BINARY_INV)
+        _, dark_mask = cv2.threshold(gray, int(darkness_threshold), 255, cv2.THRESH_BINARY_INV,
+                                     dst=ws.get('dark_mask', shape))
+        if lap:
+            lap('dark_threshold')
         
         adaptive_thresh = cv2.adaptiveThreshold(
-            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-            cv2.THRESH_BINARY_INV, 15, 5
+            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+            cv2.THRESH_BINARY_INV, 15, 5, dst=ws.get('adaptive', shape)
         )
+        if lap:
+            lap('adaptive_threshold')
+        
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV, dst=ws.get('hsv', frame.shape))
+        dark_color_mask = cv2.inRange(hsv, DARK_HSV_LOWER, DARK_HSV_UPPER,
+                                      dst=ws.get('dark_color', shape))
+        if lap:
+            lap('color_mask')
         
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        lower_dark = np.array([0, 0, 0])
-        upper_dark = np.array([180, 255, 100])
-        dark_color_mask = cv2.inRange(hsv, lower_dark, upper_dark)
+        blur = cv2.GaussianBlur(gray, (5, 5), 0, dst=ws.get('blur', shape))
+        edges = cv2.Canny(blur, 30, 100, edges=ws.get('edges', shape))
+        edges_dilated = cv2.dilate(edges, KERNEL_3X3, dst=ws.get('edges_dilated', shape),
+                                   iterations=2)
+        if lap:
+            lap('canny_edges')
         
-        blur = cv2.GaussianBlur(gray, (5, 5), 0)
-        edges = cv2.Canny(blur, 30, 100)
-        kernel_edge = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
-        edges_dilated = cv2.dilate(edges, kernel_edge, iterations=2)
+        combined = ws.get('combined', shape)
+        combined = cv2.bitwise_or(dark_mask, adaptive_thresh, dst=combined)
+        combined = cv2.bitwise_or(combined, dark_color_mask, dst=combined)
+        combined = cv2.bitwise_and(combined, edges_dilated, dst=combined)
         
-        combined = cv2.bitwise_or(dark_mask, adaptive_thresh)
-        combined = cv2.bitwise_or(combined, dark_color_mask)
-        combined = cv2.bitwise_and(combined, edges_dilated)
+        opened = cv2.morphologyEx(combined, cv2.MORPH_OPEN, KERNEL_3X3,
+                                  dst=ws.get('opened', shape), iterations=1)
+        cleaned = cv2.morphologyEx(opened, cv2.MORPH_CLOSE, KERNEL_3X3,
+                                   dst=ws.get('cleaned', shape), iterations=2)
+        if lap:
+            lap('morphology')
+        return cleaned
+    
+    def score_impurity(self, area, darkness_diff, circularity, solidity):
+        """Confidence score for one candidate blob"""
+        confidence = 0
+        if darkness_diff > 30:
+            confidence += 35
+        elif darkness_diff > 20:
+            confidence += 25
+        elif darkness_diff > 10:
+            confidence += 15
         
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
-        cleaned = cv2.morphologyEx(combined, cv2.MORPH_OPEN, kernel, iterations=1)
-        cleaned = cv2.morphologyEx(cleaned, cv2.MORPH_CLOSE, kernel, iterations=2)
+        if 150 <= area <= 10000:
+            confidence += 25
+        else:
+            confidence += 10
         
-        contours, _ = cv2.findContours(cleaned, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if 0.2 <= circularity <= 1.0:
+            confidence += 20
+        else:
+            confidence += 10
+        
+        if solidity > 0.5:
+            confidence += 10
+        
+        return confidence
+    
+    def extract_features_contours(self, cleaned, gray, contours=None):
+        """Legacy per-contour features (one full-frame mask per contour)"""
+        background_intensity = self.background_color['intensity']
+        if contours is None:
+            contours, _ = cv2.findContours(cleaned, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
         impurities_detected = []
         
@@ -567,26 +779,114 @@ class SmartRiceImpurityDetector:
             hull_area = cv2.contourArea(hull)
             solidity = area / hull_area if hull_area > 0 else 0
             
-            confidence = 0
-            if darkness_diff > 30:
-                confidence += 35
-            elif darkness_diff > 20:
-                confidence += 25
-            elif darkness_diff > 10:
-                confidence += 15
+            confidence = self.score_impurity(area, darkness_diff, circularity, solidity)
             
-            if 150 <= area <= 10000:
-                confidence += 25
-            else:
-                confidence += 10
+            if confidence >= 40:
+                impurities_detected.append({
+                    'contour': cnt,
+                    'bbox': (x, y, w, h),
+                    'area': area,
+                    'confidence': confidence,
+                    'intensity': mean_intensity,
+                    'darkness_diff': darkness_diff,
+                    'circularity': circularity,
+                    'solidity': solidity
+                })
+        
+        return impurities_detected
+    
+    def fill_holes(self, mask, ws=None):
+        """Fill enclosed holes so every blob covers its filled outer contour"""
+        ws = ws or self.workspace
+        h, w = mask.shape
+        flood = ws.get('flood', (h + 2, w + 2))
+        if flood is None:
+            flood = np.empty((h + 2, w + 2), dtype=np.uint8)
+        flood[0, :] = 0
+        flood[-1, :] = 0
+        flood[:, 0] = 0
+        flood[:, -1] = 0
+        flood[1:-1, 1:-1] = mask
+        # Background reachable from the border, 4-connected like findContours
+        fill_mask = ws.get('flood_mask', (h + 4, w + 4))
+        if fill_mask is not None:
+            fill_mask[:] = 0
+        cv2.floodFill(flood, fill_mask, (0, 0), 255, flags=4)
+        # numpy reads the strided interior view directly, OpenCV would copy it first
+        holes = np.bitwise_not(flood[1:-1, 1:-1], out=ws.get('holes', mask.shape))
+        return cv2.bitwise_or(mask, holes, dst=ws.get('filled', mask.shape))
+    
+    def extract_features_components(self, cleaned, gray, ws=None, reuse_tracks=False):
+        """Label the mask once and measure all blobs in a single pass"""
+        ws = ws or self.workspace
+        background_intensity = self.background_color['intensity']
+        
+        # Clean frames: skip the full-frame flood fill and labelling entirely
+        if cv2.countNonZero(cleaned) == 0:
+            return []
+        
+        # Filled blobs behave like RETR_EXTERNAL: holes and nested blobs join the outer one
+        filled = self.fill_holes(cleaned, ws)
+        # 16-bit labels are enough after MORPH_OPEN and roughly twice as fast to compute
+        num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(
+            filled, labels=ws.get('labels', filled.shape, np.uint16),
+            connectivity=8, ltype=cv2.CV_16U
+        )
+        if num_labels <= 1:
+            return []
+        
+        # Area and bbox of every blob come straight from the label stats
+        pixel_counts = stats[:, cv2.CC_STAT_AREA]
+        widths = stats[:, cv2.CC_STAT_WIDTH]
+        heights = stats[:, cv2.CC_STAT_HEIGHT]
+        aspect_ratios = widths / heights.astype(np.float64)
+        
+        # Pixel count bounds the contour area from above, so this never drops a valid blob
+        keep = ((pixel_counts >= self.min_area) &
+                (aspect_ratios <= 5) & (aspect_ratios >= 0.2))
+        keep[0] = False
+        
+        impurities_detected = []
+        
+        for label in np.flatnonzero(keep):
+            x, y, w, h = (int(v) for v in stats[label, :4])
+            
+            # Everything below touches only the blob's padded bounding box
+            roi = np.zeros((h + 2, w + 2), dtype=np.uint8)
+            roi[1:-1, 1:-1][labels[y:y+h, x:x+w] == label] = 255
+            mean_intensity = cv2.mean(gray[y:y+h, x:x+w], mask=roi[1:-1, 1:-1])[0]
             
-            if 0.2 <= circularity <= 1.0:
-                confidence += 20
+            darkness_diff = background_intensity - mean_intensity
+            if darkness_diff < 10:
+                continue
+            
+            pixels = int(pixel_counts[label])
+            contours, _ = cv2.findContours(roi, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE,
+                                           offset=(x - 1, y - 1))
+            if not contours:
+                continue
+            cnt = max(contours, key=cv2.contourArea)
+            
+            area = cv2.contourArea(cnt)
+            if area < self.min_area or area > self.max_area:
+                continue
+            
+            # Unchanged blob of a tracked stone: reuse its shape features, skip the hull
+            known = self.tracker.lookup((x, y, w, h), pixels) if reuse_tracks else None
+            if known is not None:
+                circularity = known['circularity']
+                solidity = known['solidity']
             else:
-                confidence += 10
+                perimeter = cv2.arcLength(cnt, True)
+                if perimeter == 0:
+                    continue
+                
+                circularity = 4 * np.pi * area / (perimeter * perimeter)
+                hull = cv2.convexHull(cnt)
+                hull_area = cv2.contourArea(hull)
+                solidity = area / hull_area if hull_area > 0 else 0
             
-            if solidity > 0.5:
-                confidence += 10
+            confidence = self.score_impurity(area, darkness_diff, circularity, solidity)
             
             if confidence >= 40:
                 impurities_detected.append({
@@ -597,10 +897,195 @@ class SmartRiceImpurityDetector:
                     'intensity': mean_intensity,
                     'darkness_diff': darkness_diff,
                     'circularity': circularity,
-                    'solidity': solidity
+                    'solidity': solidity,
+                    'pixels': pixels
                 })
         
-        return original, cleaned, impurities_detected
+        return impurities_detected
+    
+    def extract_features(self, cleaned, gray, ws=None, reuse_tracks=False):
+        """Measure and score the blobs of a cleaned mask with the selected engine"""
+        if self.feature_engine == 'contours':
+            return self.extract_features_contours(cleaned, gray)
+        if self.feature_engine == 'components':
+            return self.extract_features_components(cleaned, gray, ws, reuse_tracks)
+        
+        # auto: a few blobs are cheaper per contour than one full-frame labelling pass
+        contours, _ = cv2.findContours(cleaned, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        candidates = [cnt for cnt in contours
+                      if self.min_area <= cv2.contourArea(cnt) <= self.max_area]
+        if len(candidates) < self.components_min_blobs:
+            return self.extract_features_contours(cleaned, gray, candidates)
+        return self.extract_features_components(cleaned, gray, ws, reuse_tracks)
+    
+    def screen_candidates(self, frame, scale=None):
+        """Cheap low-resolution screen returning padded full-resolution ROIs
+        
+        Returns None when candidates cover so much of the frame that the
+        full-frame pipeline is cheaper.
+        """
+        ws = self.workspace
+        scale = scale or self.pyramid_scale
+        h, w = frame.shape[:2]
+        small_shape = (h // scale, w // scale)
+        
+        small = cv2.resize(frame, (small_shape[1], small_shape[0]),
+                           dst=ws.get('screen_frame', small_shape + (3,)),
+                           interpolation=cv2.INTER_AREA)
+        small_gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=ws.get('screen_gray', small_shape))
+        
+        # Any stone that can pass the full pipeline is at least this much darker
+        screen_threshold = self.background_color['intensity'] - self.screen_darkness
+        _, screen = cv2.threshold(small_gray, int(screen_threshold), 255, cv2.THRESH_BINARY_INV,
+                                  dst=ws.get('screen_mask', small_shape))
+        num_labels, _, stats, _ = cv2.connectedComponentsWithStats(
+            screen, labels=ws.get('screen_labels', small_shape, np.uint16),
+            connectivity=8, ltype=cv2.CV_16U
+        )
+        
+        # Keep blobs covering at least a quarter of the smallest stone at this scale
+        min_cells = max(1, self.min_area // (4 * scale * scale))
+        pad = self.roi_padding
+        rois = []
+        for x, y, bw, bh, area in stats[1:num_labels]:
+            if area < min_cells:
+                continue
+            rois.append([max(0, x * scale - pad), max(0, y * scale - pad),
+                         min(w, (x + bw) * scale + pad), min(h, (y + bh) * scale + pad)])
+        
+        rois = merge_rois(rois)
+        covered = sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in rois)
+        if covered > self.max_roi_coverage * w * h:
+            return None
+        return rois
+    
+    def detect_in_rois(self, frame, gray, rois):
+        """Run the full-resolution pipeline only inside the candidate ROIs"""
+        cleaned = self.workspace.get('roi_cleaned', gray.shape)
+        if cleaned is None:
+            cleaned = np.empty(gray.shape, dtype=np.uint8)
+        cleaned[:] = 0
+        
+        impurities_detected = []
+        for x0, y0, x1, y1 in rois:
+            frame_roi = np.ascontiguousarray(frame[y0:y1, x0:x1])
+            gray_roi = np.ascontiguousarray(gray[y0:y1, x0:x1])
+            cleaned_roi = self.build_impurity_mask(frame_roi, gray_roi, self.roi_workspace)
+            cleaned[y0:y1, x0:x1] = cleaned_roi
+            
+            for imp in self.extract_features(cleaned_roi, gray_roi, self.roi_workspace):
+                x, y, w, h = imp['bbox']
+                imp['bbox'] = (x + x0, y + y0, w, h)
+                imp['contour'] = imp['contour'] + np.array([x0, y0], dtype=imp['contour'].dtype)
+                impurities_detected.append(imp)
+        
+        return cleaned, impurities_detected
+    
+    def detect_impurities(self, frame):
+        """Enhanced detection for dark stones in rice"""
+        lap = self.stage_timers.start() if self.stage_timers else None
+        
+        # The resized frame is never modified here, so it doubles as the returned original
+        frame = cv2.resize(frame, (640, 480), dst=self.workspace.next_frame((480, 640, 3)))
+        
+        if not self.calibrated:
+            self.calibrate_background(frame)
+        
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self.workspace.get('gray', (480, 640)))
+        if lap:
+            lap('resize_gray')
+        
+        if self.change_gating:
+            small = self.gate_thumbnail(gray)
+            changed = self.frame_changed(small)
+            if lap:
+                lap('change_gate')
+            if not changed:
+                # Nothing moved: reuse the last result instead of re-running the pipeline
+                self.gate_skipped += 1
+                self.frames_since_full += 1
+                if self.verifier:
+                    self.verifier.count_frame()
+                self.last_result_cached = True
+                return frame, self.last_cleaned, self.last_impurities
+        
+        start = time.perf_counter()
+        rois = self.screen_candidates(frame) if self.pyramid_scale > 1 else None
+        if rois is not None:
+            cleaned, impurities_detected = self.detect_in_rois(frame, gray, rois)
+            if lap:
+                lap('roi_detection')
+        else:
+            cleaned = self.build_impurity_mask(frame, gray, lap=lap)
+            impurities_detected = self.extract_features(cleaned, gray, reuse_tracks=self.tracking)
+            if lap:
+                lap('features')
+        
+        if self.verifier:
+            impurities_detected = self.verifier.verify(frame, impurities_detected)
+            if lap:
+                lap('verify')
+        
+        self.last_result_cached = False
+        if self.change_gating:
+            self.gate_full_time += time.perf_counter() - start
+            self.gate_analyzed += 1
+            self.frames_since_full = 0
+            self.gate_reference = small.copy()
+        self.last_cleaned = cleaned
+        self.last_impurities = impurities_detected
+        
+        return frame, cleaned, impurities_detected
+    
+    def analyze_frame(self, frame, mode='full'):
+        """Run the detection level the scheduler picked for this frame
+        
+        'screen' only runs the low-resolution candidate screen: a frame with no
+        candidates is clean, otherwise the last full result stands. 'skip'
+        returns None so the caller drops the frame.
+        """
+        if mode == 'skip':
+            return None
+        start = time.perf_counter()
+        if mode == 'full' or not self.calibrated:
+            result = self.detect_impurities(frame)
+            mode = 'full'
+        else:
+            frame = cv2.resize(frame, (640, 480), dst=self.workspace.next_frame((480, 640, 3)))
+            rois = self.screen_candidates(frame, self.scheduler.screen_scale)
+            impurities = self.last_impurities if rois is None or rois else []
+            self.last_result_cached = True
+            result = frame, self.last_cleaned, impurities
+        self.scheduler.record(mode, time.perf_counter() - start)
+        return result
+    
+    def gate_thumbnail(self, gray):
+        """Block-averaged thumbnail used for the change test"""
+        width, height = self.gate_size
+        return cv2.resize(gray, self.gate_size, dst=self.workspace.get('gate_small', (height, width)),
+                          interpolation=cv2.INTER_AREA)
+    
+    def frame_changed(self, small):
+        """True if any block moved more than gate_threshold since the last analyzed frame"""
+        if self.gate_reference is None or self.frames_since_full >= self.gate_max_skip:
+            return True
+        start = time.perf_counter()
+        diff = cv2.absdiff(small, self.gate_reference, dst=self.workspace.get('gate_diff', small.shape))
+        changed = int(diff.max()) > self.gate_threshold
+        self.gate_check_time += time.perf_counter() - start
+        return changed
+    
+    def gate_stats(self):
+        """Skip ratio and estimated CPU saved by change gating"""
+        total = self.gate_analyzed + self.gate_skipped
+        avg_full_ms = self.gate_full_time * 1000 / self.gate_analyzed if self.gate_analyzed else 0.0
+        saved_ms = self.gate_skipped * avg_full_ms - self.gate_check_time * 1000
+        return {
+            'skip_ratio': round(self.gate_skipped / total, 3) if total else 0.0,
+            'skipped': self.gate_skipped,
+            'analyzed': self.gate_analyzed,
+            'saved_cpu_ms': round(max(0.0, saved_ms), 1)
+        }
     
     def draw_detections(self, frame, impurities):
         """Draw bounding boxes"""
@@ -636,36 +1121,245 @@ class SmartRiceImpurityDetector:
         """Send comprehensive alert"""
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
-        print("\n" + "="*70)
-        print("ALERT! IMPURITY ALERT - CONTAMINATION DETECTED!")
-        print("="*70)
-        print(f"Time: {timestamp}")
-        print(f"Impurities Count: {impurity_count} stone(s) detected")
-        print("="*70 + "\n")
+        print("\n" + "="*70, file=sys.stderr)
+        print("ALERT! IMPURITY ALERT - CONTAMINATION DETECTED!", file=sys.stderr)
+        print("="*70, file=sys.stderr)
+        print(f"Time: {timestamp}", file=sys.stderr)
+        print(f"Impurities Count: {impurity_count} stone(s) detected", file=sys.stderr)
+        print("="*70 + "\n", file=sys.stderr)
+        
+        # Queue the alert image; the frame buffer is reused, so hand over a copy
+        now = datetime.now()
+        filename = f"impurity_alert_{now.strftime('%Y%m%d_%H%M%S')}_{now.microsecond // 1000:03d}.jpg"
+        writer = self.get_evidence_writer()
+        if writer.submit(filename, frame.copy()):
+            print(f"Detection image queued: {os.path.join(writer.directory, filename)}", file=sys.stderr)
+        else:
+            print(f"⚠️ Detection image dropped, evidence queue full: {filename}", file=sys.stderr)
+    
+    def get_evidence_writer(self):
+        if self.evidence_writer is None:
+            self.evidence_writer = EvidenceWriter(**self.evidence_options)
+        return self.evidence_writer
+    
+    def close_evidence_writer(self):
+        """Flush queued alert images to disk"""
+        if self.evidence_writer is not None:
+            self.evidence_writer.close()
+            self.evidence_writer = None
+    
+    def update_stability(self, impurities):
+        """Count consecutive frames with detections; returns the frame's impurities
+        
+        With tracking on, the returned detections carry persistent track ids.
+        """
+        if self.tracking:
+            impurities = self.tracker.update(impurities)
+            self.impurity_counter = self.tracker.stability()
+            return impurities
+        
+        if len(impurities) > 0:
+            self.impurity_counter += 1
+        else:
+            self.impurity_counter = 0
+            self.alert_sent = False
+        return impurities
+    
+    def tick_fps(self):
+        """Update the rolling FPS estimate once per output frame"""
+        self.fps_counter += 1
+        elapsed = time.time() - self.fps_start
+        if elapsed > 1:
+            self.fps = self.fps_counter / elapsed
+            self.fps_counter = 0
+            self.fps_start = time.time()
+    
+    def draw_overlay(self, processed, impurities, stability=None):
+        """Draw the status panel on top of the annotated frame"""
+        if stability is None:
+            stability = self.impurity_counter
+        status = "IMPURITY DETECTED!" if len(impurities) > 0 else "CLEAN"
+        status_color = (0, 0, 255) if len(impurities) > 0 else (0, 255, 0)
+        
+        # Blending with a black panel only scales the panel rows, so darken them in place
+        panel = processed[:121]
+        cv2.addWeighted(panel, 0.6, panel, 0, 0, dst=panel)
+        
+        cv2.putText(processed, status, (10, 40), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 1.0, status_color, 2)
+        
+        info = f"Stones: {len(impurities)} | Stability: {stability}/{self.stable_frames}"
+        cv2.putText(processed, info, (10, 70), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+        
+        if self.calibrated:
+            bg_info = f"Background: {self.background_color['intensity']:.0f}"
+            cv2.putText(processed, bg_info, (10, 95), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+        
+        cv2.putText(processed, f"FPS: {self.fps:.1f}", (10, 115), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
+        return processed
+    
+    def stability_state(self):
+        """Counters as update_stability left them for the frame it just handled"""
+        state = {'stability': self.impurity_counter}
+        if self.tracking:
+            state['unique_stones'] = self.tracker.confirmed_total
+            state['tracks'] = self.tracker.summary()
+        return state
+    
+    def frame_state(self, impurities):
+        """stability_state plus this frame's alert decision
+        
+        Must run on the thread that called update_stability; the pipelined
+        detect stage hands the result to emit with the frame.
+        """
+        state = self.stability_state()
+        state['alert_count'] = self.alert_due(impurities, time.time())
+        return state
+    
+    def build_frame_data(self, impurities, state=None):
+        """DATA payload for one processed frame"""
+        state = state or self.stability_state()
+        data = {
+            'impurities_count': len(impurities),
+            'quality_score': max(0, 100 - (len(impurities) * 10)),
+            'status': 'CONTAMINATION DETECTED' if len(impurities) > 0 else 'CLEAN',
+            'stability': state['stability'],
+            'background_intensity': self.background_color['intensity'] if self.calibrated else 0,
+            'timestamp': datetime.now().strftime('%H:%M:%S'),
+            'fps': round(self.fps, 1),
+            'detections': [{
+                'confidence': int(imp['confidence']),
+                'area': int(imp['area']),
+                'darkness_diff': float(imp['darkness_diff'])
+            } for imp in impurities],
+            'cached': self.last_result_cached
+        }
+        if self.change_gating:
+            data['gate'] = self.gate_stats()
+        if self.tracking:
+            for entry, imp in zip(data['detections'], impurities):
+                entry['track_id'] = imp.get('track_id')
+            data['unique_stones'] = state['unique_stones']
+            data['tracks'] = state['tracks']
+        if self.verifier:
+            for entry, imp in zip(data['detections'], impurities):
+                entry['yolo_confidence'] = imp.get('yolo_confidence')
+            data['cascade'] = self.verifier.stats()
+        return data
+    
+    def alert_due(self, impurities, current_time):
+        """Stones to alert about for this frame (0 = none), marking the alert as sent"""
+        if self.tracking:
+            # Every stone is reported once, when its track is confirmed
+            new_stones = [imp for imp in impurities if imp.get('new_stone')]
+            if new_stones:
+                self.last_alert_time = current_time
+            return len(new_stones)
+        
+        if (self.impurity_counter >= self.stable_frames and 
+            not self.alert_sent and 
+            current_time - self.last_alert_time > self.alert_cooldown):
+            
+            self.alert_sent = True
+            self.last_alert_time = current_time
+            return len(impurities)
+        return 0
+    
+    def check_alert(self, impurities, processed, current_time):
+        """Send alert if detections have been stable long enough"""
+        alert_count = self.alert_due(impurities, current_time)
+        if alert_count:
+            self.send_alert(alert_count, processed)
+    
+    def emit_results(self, processed, impurities, capture_time, extra_data=None, state=None):
+        """Draw, stream and report one analyzed frame
+        
+        state is frame_state() taken after detection; without it the counters
+        are read here, which is only safe on the thread that updates them.
+        """
+        lap = self.stage_timers.start() if self.stage_timers else None
+        if state is None:
+            state = self.frame_state(impurities)
+        if impurities:
+            processed = self.draw_detections(processed, impurities)
+            if lap:
+                lap('draw_detections')
         
-        # Save alert image
-        os.makedirs("detections", exist_ok=True)
-        timestamp_file = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"detections/impurity_alert_{timestamp_file}.jpg"
-        cv2.imwrite(filename, frame)
-        print(f"Detection image saved: {filename}")
+        self.tick_fps()
+        processed = self.draw_overlay(processed, impurities, state['stability'])
+        if lap:
+            lap('overlay')
+        
+        # Send frame every 200ms (5 FPS to UI)
+        current_time = time.time()
+        if self.frame_publisher:
+            # Quality, size and rate follow the consumers; this never waits on them
+            if self.frame_publisher.due(current_time):
+                self.frame_publisher.publish(processed, current_time)
+                if lap:
+                    lap('publish_frame')
+        elif current_time - self.last_frame_send >= 0.2:
+            self.send_frame_to_ui(processed, lap)
+            self.last_frame_send = current_time
+        
+        # Send data to UI; with telemetry on, records that would be coalesced are never built
+        status = 'CONTAMINATION DETECTED' if impurities else 'CLEAN'
+        if self.telemetry is None or self.telemetry.due(status):
+            data = self.build_frame_data(impurities, state)
+            data['latency_ms'] = round((time.time() - capture_time) * 1000, 1)
+            if extra_data:
+                data.update(extra_data)
+            if self.frame_publisher:
+                data['stream'] = self.frame_publisher.stats()
+            if self.stream_server:
+                data['http'] = self.stream_server.stats()
+            if self.evidence_writer is not None:
+                data['evidence'] = self.evidence_writer.stats()
+            if lap and current_time - self.last_metrics_report >= self.metrics_interval:
+                data['stage_timings'] = self.stage_timers.snapshot()
+                self.last_metrics_report = current_time
+            self.send_data_to_ui(data)
+        if lap:
+            lap('send_data')
+        
+        if state['alert_count']:
+            self.send_alert(state['alert_count'], processed)
+        if lap:
+            lap('alert')
+        if self.scheduler:
+            done = time.time()
+            self.scheduler.record('emit', done - current_time)
+            self.scheduler.observe_latency(done - capture_time)
+        return processed
+    
+    def print_banner(self, mode):
+        print("\n" + "="*70, file=sys.stderr)
+        print(f"SMART RICE IMPURITY DETECTION SYSTEM - {mode}", file=sys.stderr)
+        print("="*70, file=sys.stderr)
+        print("Starting camera feed...", file=sys.stderr)
+        print("Streaming frames to UI...", file=sys.stderr)
+    
+    def reset_stream_state(self):
+        self.fps = 0.0
+        self.fps_counter = 0
+        self.fps_start = time.time()
+        self.last_frame_send = time.time()
+        self.last_metrics_report = time.time()
     
     def run(self):
         """Main detection loop with frame streaming"""
+        if self.pipelined:
+            return self.run_pipelined()
+        
         if not self.connect_camera():
             return
         
-        print("\n" + "="*70)
-        print("SMART RICE IMPURITY DETECTION SYSTEM - STREAMING MODE")
-        print("="*70)
-        print("Starting camera feed...")
-        print("Streaming frames to UI...")
-        
-        fps = 0.0
-        fps_counter = 0
-        fps_start = time.time()
+        self.print_banner("STREAMING MODE")
+        self.reset_stream_state()
         frame_count = 0
-        last_frame_send = time.time()
         
         try:
             while True:
@@ -676,106 +1370,219 @@ class SmartRiceImpurityDetector:
                     continue
                 
                 frame_count += 1
+                capture_time = time.time()
                 
                 # Detect impurities
-                processed, threshold, impurities = self.detect_impurities(frame)
-                
-                # Draw detections
-                if impurities:
-                    processed = self.draw_detections(processed, impurities)
-                
-                # Update counter
-                if len(impurities) > 0:
-                    self.impurity_counter += 1
+                if self.scheduler:
+                    mode = self.scheduler.decide(capture_time)
+                    result = self.analyze_frame(frame, mode)
+                    if result is not None:
+                        processed, threshold, impurities = result
+                        impurities = self.update_stability(impurities)
+                        processed = self.emit_results(processed, impurities, capture_time,
+                                                      {'mode': mode, 'scheduler': self.scheduler.stats()})
                 else:
-                    self.impurity_counter = 0
-                    self.alert_sent = False
-                
-                # Calculate FPS
-                fps_counter += 1
-                elapsed = time.time() - fps_start
-                if elapsed > 1:
-                    fps = fps_counter / elapsed
-                    fps_counter = 0
-                    fps_start = time.time()
-                
-                # Add overlay
-                status = "IMPURITY DETECTED!" if len(impurities) > 0 else "CLEAN"
-                status_color = (0, 0, 255) if len(impurities) > 0 else (0, 255, 0)
-                
-                overlay = processed.copy()
-                cv2.rectangle(overlay, (0, 0), (640, 120), (0, 0, 0), -1)
-                processed = cv2.addWeighted(overlay, 0.4, processed, 0.6, 0)
-                
-                cv2.putText(processed, status, (10, 40), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 1.0, status_color, 2)
-                
-                info = f"Stones: {len(impurities)} | Stability: {self.impurity_counter}/{self.stable_frames}"
-                cv2.putText(processed, info, (10, 70), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
-                
-                if self.calibrated:
-                    bg_info = f"Background: {self.background_color['intensity']:.0f}"
-                    cv2.putText(processed, bg_info, (10, 95), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
-                
-                cv2.putText(processed, f"FPS: {fps:.1f}", (10, 115), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
-                
-                # Send frame every 200ms (5 FPS to UI)
-                current_time = time.time()
-                if current_time - last_frame_send >= 0.2:
-                    self.send_frame_to_ui(processed)
-                    last_frame_send = current_time
-                
-                # Send data to UI
-                data = {
-                    'impurities_count': len(impurities),
-                    'quality_score': max(0, 100 - (len(impurities) * 10)),
-                    'status': 'CONTAMINATION DETECTED' if len(impurities) > 0 else 'CLEAN',
-                    'stability': self.impurity_counter,
-                    'background_intensity': self.background_color['intensity'] if self.calibrated else 0,
-                    'timestamp': datetime.now().strftime('%H:%M:%S'),
-                    'fps': round(fps, 1),
-                    'detections': [{
-                        'confidence': int(imp['confidence']),
-                        'area': int(imp['area']),
-                        'darkness_diff': float(imp['darkness_diff'])
-                    } for imp in impurities]
-                }
-                self.send_data_to_ui(data)
-                
-                # Send alert if stable
-                if (self.impurity_counter >= self.stable_frames and 
-                    not self.alert_sent and 
-                    current_time - self.last_alert_time > self.alert_cooldown):
+                    processed, threshold, impurities = self.detect_impurities(frame)
+                    impurities = self.update_stability(impurities)
                     
-                    self.send_alert(len(impurities), processed)
-                    self.alert_sent = True
-                    self.last_alert_time = current_time
+                    processed = self.emit_results(processed, impurities, capture_time)
                 
                 # Optional: Show local window
                 # cv2.imshow("Detection", processed)
                 
                 key = cv2.waitKey(1) & 0xFF
                 if key == 27:  # ESC
-                    print("\nShutting down...")
+                    print("\nShutting down...", file=sys.stderr)
                     break
                 elif key == ord('r'):
-                    print("Recalibrating background...")
+                    print("Recalibrating background...", file=sys.stderr)
                     self.calibrated = False
-                    
+                    self.tracker.reset_session()
+        
         except KeyboardInterrupt:
-            print("\nStopped by user")
+            print("\nStopped by user", file=sys.stderr)
         finally:
             if self.cap:
                 self.cap.release()
             cv2.destroyAllWindows()
-            print("System stopped")
+            print("System stopped", file=sys.stderr)
+    
+    def read_frame(self):
+        """Read one (capture_time, frame) pair from the camera, or None if nothing arrived"""
+        ret, frame = self.cap.read()
+        return (time.time(), frame) if ret else None
+    
+    def pipeline_detect(self, item):
+        """Detection stage: analyze one captured frame"""
+        capture_time, frame = item
+        mode = 'full'
+        if self.scheduler:
+            # Time spent queued counts against the latency target
+            mode = self.scheduler.decide(capture_time)
+            result = self.analyze_frame(frame, mode)
+            if result is None:
+                return None
+            processed, threshold, impurities = result
+        else:
+            processed, threshold, impurities = self.detect_impurities(frame)
+        impurities = self.update_stability(impurities)
+        # Counters and alert state change on this thread only; emit gets this frame's copy
+        state = self.frame_state(impurities)
+        return capture_time, processed, impurities, self.last_result_cached, mode, state
+    
+    def pipeline_emit(self, item):
+        """Encode/emit stage: draw, stream and report one analyzed frame"""
+        capture_time, processed, impurities, cached, mode, state = item
+        extra_data = {'pipeline': self.pipeline.stats(), 'cached': cached}
+        if self.scheduler:
+            extra_data['mode'] = mode
+            extra_data['scheduler'] = self.scheduler.stats()
+        try:
+            self.emit_results(processed, impurities, capture_time, extra_data, state)
+        finally:
+            # Publisher and evidence writer keep copies, so the buffer is free again
+            self.workspace.release_frame(processed)
+    
+    def pipeline_discard(self, item):
+        """A detect result dropped before emit: just return its frame buffer"""
+        self.workspace.release_frame(item[1])
+    
+    def run_pipelined(self):
+        """Detection loop with capture, detection and encoding on separate threads"""
+        if not self.connect_camera():
+            return
+        
+        self.print_banner("PIPELINED STREAMING MODE")
+        self.reset_stream_state()
+        
+        self.workspace.track_frames = True
+        self.pipeline = FramePipeline(self.read_frame, self.pipeline_detect, self.pipeline_emit,
+                                      discard=self.pipeline_discard)
+        self.pipeline.start()
+        
+        try:
+            while self.pipeline.is_running():
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            print("\nStopped by user", file=sys.stderr)
+        finally:
+            self.pipeline.stop()
+            if self.cap:
+                self.cap.release()
+            print("System stopped", file=sys.stderr)
 
     
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Smart rice impurity detector")
+    parser.add_argument("--url", default="http://10.242.149.224:4747/video",
+                        help="DroidCam video URL")
+    parser.add_argument("--camera", default="opencv", choices=["opencv", "mjpeg"],
+                        help="frame reader: cv2.VideoCapture or the built-in newest-frame MJPEG client")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="run capture, detection and encoding on separate threads")
+    parser.add_argument("--transport", default="stdout",
+                        help="frame/data channel: stdout, uds:PATH, shm:NAME or jsonl:PATH")
+    parser.add_argument("--pyramid-scale", type=int, default=1, choices=[1, 2, 4],
+                        help="screen at 1/N resolution and refine only candidate ROIs (1 = off)")
+    parser.add_argument("--roi-padding", type=int, default=16,
+                        help="pixels of context around each candidate ROI")
+    parser.add_argument("--change-gate", action="store_true",
+                        help="reuse the last result while the frame is unchanged")
+    parser.add_argument("--gate-threshold", type=int, default=8,
+                        help="gray-level change of an 8x8 block that counts as motion")
+    parser.add_argument("--track", action="store_true",
+                        help="track stones across frames and report each one once")
+    parser.add_argument("--evidence-dir", default="detections",
+                        help="folder for alert evidence images")
+    parser.add_argument("--evidence-queue", type=int, default=16,
+                        help="alert images waiting to be written before the policy applies")
+    parser.add_argument("--evidence-policy", default="drop_oldest",
+                        choices=["drop_oldest", "drop_newest", "block"],
+                        help="what to do when the evidence queue is full")
+    parser.add_argument("--evidence-max-files", type=int, default=500)
+    parser.add_argument("--evidence-max-mb", type=float, default=500)
+    parser.add_argument("--evidence-max-days", type=float, default=7)
+    parser.add_argument("--stage-metrics", action="store_true",
+                        help="time every pipeline stage and add p50/p95/p99 to DATA periodically")
+    parser.add_argument("--metrics-interval", type=float, default=5.0,
+                        help="seconds between stage timing snapshots in DATA")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="also serve stage metrics on http://127.0.0.1:PORT/metrics (0 = off)")
+    parser.add_argument("--telemetry-rate", type=float, default=0,
+                        help="coalesce DATA to at most N delta-encoded messages per second "
+                             "(0 = one full record per frame)")
+    parser.add_argument("--telemetry-binary", action="store_true",
+                        help="send the coalesced telemetry in the compact binary encoding "
+                             "(uds/shm/jsonl consumers; the dashboard on stdout only reads DATA)")
+    parser.add_argument("--adaptive-stream", action="store_true",
+                        help="stream frames without blocking, adapting quality/size/rate to the consumers")
+    parser.add_argument("--target-kbps", type=float, default=1000,
+                        help="bandwidth the adaptive stream aims to stay under")
+    parser.add_argument("--http-port", type=int, default=0,
+                        help="serve /stream.mjpg and /events (DATA as SSE) on this port (0 = off)")
+    parser.add_argument("--cascade-model",
+                        help="YOLO weights/export that must confirm classical detections (cascade mode)")
+    parser.add_argument("--cascade-mode", default="roi", choices=["roi", "frame"],
+                        help="verify cropped detections or the whole flagged frame")
+    parser.add_argument("--cascade-conf", type=float, default=0.25)
+    parser.add_argument("--target-latency-ms", type=float, default=0,
+                        help="pick full/screen/skip per frame to keep latency under this (0 = always full)")
+    parser.add_argument("--cpu-budget", type=float,
+                        help="with --target-latency-ms, cores' worth of time detection may use (e.g. 0.5)")
+    args = parser.parse_args()
+    if args.telemetry_binary and args.transport.partition(':')[0] == 'stdout':
+        # server.js only merges JSON DATA lines; TELEM: lines would leave the dashboard empty
+        parser.error("--telemetry-binary needs --transport uds:, shm: or jsonl:")
+    
+    transport = create_transport(args.transport)
     detector = SmartRiceImpurityDetector(
-        droidcam_url="http://10.242.149.224:4747/video"
+        droidcam_url=args.url,
+        pipelined=args.pipeline,
+        transport=transport
     )
-    detector.run()
\ No newline at end of file
+    detector.camera_reader = args.camera
+    detector.pyramid_scale = args.pyramid_scale
+    detector.roi_padding = args.roi_padding
+    detector.change_gating = args.change_gate
+    detector.gate_threshold = args.gate_threshold
+    detector.tracking = args.track
+    if args.cascade_model:
+        detector.verifier = YoloVerifier(args.cascade_model, mode=args.cascade_mode,
+                                         conf=args.cascade_conf)
+    if args.target_latency_ms > 0:
+        detector.scheduler = LatencyScheduler(args.target_latency_ms, cpu_budget=args.cpu_budget)
+    detector.evidence_options = {
+        'directory': args.evidence_dir,
+        'max_queue': args.evidence_queue,
+        'policy': args.evidence_policy,
+        'max_files': args.evidence_max_files,
+        'max_bytes': int(args.evidence_max_mb * 1024 * 1024),
+        'max_age_s': args.evidence_max_days * 24 * 3600
+    }
+    if args.telemetry_rate > 0 or args.telemetry_binary:
+        detector.telemetry = DeltaTelemetry(transport, rate_hz=args.telemetry_rate,
+                                            binary=args.telemetry_binary)
+    if args.adaptive_stream:
+        detector.frame_publisher = AdaptiveFramePublisher(transport, target_kbps=args.target_kbps)
+    if args.http_port:
+        detector.stream_server = StreamServer(args.http_port)
+        if detector.frame_publisher:
+            # One encode per frame feeds the transport and every browser viewer
+            detector.frame_publisher.add_consumer('http', detector.stream_server.publish_frame)
+    metrics_server = None
+    if args.stage_metrics or args.metrics_port:
+        detector.stage_timers = StageTimers()
+        detector.metrics_interval = args.metrics_interval
+    if args.metrics_port:
+        metrics_server = MetricsServer(detector.stage_timers, args.metrics_port)
+    try:
+        detector.run()
+    finally:
+        if detector.frame_publisher:
+            detector.frame_publisher.close()
+        if detector.stream_server:
+            detector.stream_server.close()
+        if metrics_server:
+            metrics_server.close()
+        detector.close_evidence_writer()
+        transport.close()
@@ -0,0 +1,215 @@
+import multiprocessing
+import queue
+import sys
+import time
+from collections import Counter, deque
+from multiprocessing import shared_memory
+
+import numpy as np
+
+FRAME_SHAPE = (480, 640, 3)
+
+
+def boxes_from_result(result):
+    """Plain (x1, y1, x2, y2, class_id, confidence) tuples from one Ultralytics result"""
+    boxes = result.boxes
+    return [(int(x1), int(y1), int(x2), int(y2), int(cls_id), float(conf))
+            for (x1, y1, x2, y2), cls_id, conf in zip(boxes.xyxy.tolist(), boxes.cls.tolist(),
+                                                      boxes.conf.tolist())]
+
+
+def inference_worker(shm_name, slots, model_path, conf, max_batch, budget_s, requests, results):
+    """Child process: batch frames from the shared slots and run YOLO on them
+
+    A batch takes every frame already waiting, then keeps collecting until
+    max_batch frames or until waiting longer would make the oldest frame
+    miss its latency budget, given the recent time per batch.
+    """
+    from ultralytics import YOLO
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    frames = np.ndarray((slots,) + FRAME_SHAPE, dtype=np.uint8, buffer=shm.buf)
+    model = YOLO(model_path, task='detect')
+    results.put(('ready', dict(model.names)))
+
+    batch_time = 0.0
+    running = True
+    while running:
+        item = requests.get()
+        if item is None:
+            break
+        batch = [item]
+        deadline = item[2] + budget_s - batch_time
+        while len(batch) < max_batch:
+            # Frames that queued up during the last batch join at once; beyond
+            # that, wait only while the oldest frame is still within budget
+            timeout = deadline - time.time()
+            try:
+                item = requests.get(timeout=timeout) if timeout > 0 else requests.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                running = False
+                break
+            batch.append(item)
+
+        start = time.perf_counter()
+        outputs = model([frames[slot] for _, slot, _ in batch], conf=conf, verbose=False)
+        elapsed = time.perf_counter() - start
+        batch_time = elapsed if batch_time == 0 else 0.8 * batch_time + 0.2 * elapsed
+
+        for (frame_id, slot, submitted_at), output in zip(batch, outputs):
+            results.put(('result', frame_id, slot, boxes_from_result(output), len(batch),
+                         elapsed, submitted_at))
+
+    del frames
+    shm.close()
+
+
+class InferenceClient:
+    """Parent side of the YOLO worker: submit frames, poll boxes, never wait
+
+    Frames are copied into one of `slots` shared-memory slots; when every
+    slot is still being inferred the frame is skipped instead of queued,
+    so capture and display keep running at camera rate.
+
+    If the worker process dies, submit() and poll() notice, log it and
+    start a new one (up to max_restarts times). `generation` goes up on
+    every restart so callers can drop boxes from before the crash; once
+    the restarts are used up `failed` is set and nothing more is queued.
+    """
+
+    def __init__(self, model_path, slots=4, max_batch=4, latency_budget_ms=80, conf=0.1,
+                 startup_timeout=300, max_restarts=3):
+        frame_bytes = int(np.prod(FRAME_SHAPE))
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * frame_bytes)
+        self.frames = np.ndarray((slots,) + FRAME_SHAPE, dtype=np.uint8, buffer=self.shm.buf)
+        self.slots = slots
+        self.worker_args = (model_path, conf, max_batch, latency_budget_ms / 1000)
+        self.startup_timeout = startup_timeout
+        self.max_restarts = max_restarts
+        self.restarts = 0
+        self.generation = 0
+        self.failed = False
+        self.process = None
+
+        self.next_id = 0
+        self.skipped = 0
+        self.inferred = 0
+        self.batch_sizes = Counter()
+        self.latencies = deque(maxlen=200)
+        self.window_start = time.time()
+        self.window_frames = 0
+        self.fps = 0.0
+
+        if not self.start_worker():
+            self.close()
+            raise RuntimeError("Inference worker failed to load the model")
+
+    def start_worker(self):
+        """Start a worker with fresh queues and wait for its model; False if it never came up"""
+        model_path, conf, max_batch, budget_s = self.worker_args
+        # A killed worker can leave a queue's lock held, so never reuse them
+        self.free_slots = deque(range(self.slots))
+        self.requests = multiprocessing.Queue()
+        self.results = multiprocessing.Queue()
+        self.process = multiprocessing.Process(
+            target=inference_worker,
+            args=(self.shm.name, self.slots, model_path, conf, max_batch, budget_s,
+                  self.requests, self.results),
+            daemon=True
+        )
+        self.process.start()
+
+        print(f"Loading {model_path} in the inference worker...")
+        deadline = time.time() + self.startup_timeout
+        while True:
+            try:
+                _, self.names = self.results.get(timeout=1.0)
+                return True
+            except queue.Empty:
+                if not self.process.is_alive() or time.time() > deadline:
+                    return False
+
+    def check_worker(self):
+        """True if the worker is usable, restarting it after a crash"""
+        if self.failed:
+            return False
+        if self.process.is_alive():
+            return True
+        print(f"❌ Inference worker died (exit code {self.process.exitcode}); "
+              f"{self.slots - len(self.free_slots)} frames in flight lost", file=sys.stderr)
+        while self.restarts < self.max_restarts:
+            self.restarts += 1
+            self.generation += 1
+            print(f"Restarting inference worker ({self.restarts}/{self.max_restarts})", file=sys.stderr)
+            if self.start_worker():
+                return True
+        self.failed = True
+        print("❌ Inference worker keeps failing, giving up on it", file=sys.stderr)
+        return False
+
+    def submit(self, frame):
+        """Queue a 640x480 frame for inference; returns its id, or None if no slot was free"""
+        if not self.check_worker():
+            return None
+        if not self.free_slots:
+            self.skipped += 1
+            return None
+        slot = self.free_slots.popleft()
+        self.frames[slot] = frame
+        self.next_id += 1
+        self.requests.put((self.next_id, slot, time.time()))
+        return self.next_id
+
+    def poll(self):
+        """Finished (frame_id, boxes) pairs, without blocking"""
+        finished = []
+        if not self.check_worker():
+            return finished
+        while True:
+            try:
+                message = self.results.get_nowait()
+            except queue.Empty:
+                break
+            _, frame_id, slot, boxes, batch_size, _, submitted_at = message
+            self.free_slots.append(slot)
+            self.inferred += 1
+            self.window_frames += 1
+            self.batch_sizes[batch_size] += 1
+            self.latencies.append(time.time() - submitted_at)
+            finished.append((frame_id, boxes))
+
+        elapsed = time.time() - self.window_start
+        if elapsed >= 1.0:
+            self.fps = self.window_frames / elapsed
+            self.window_frames = 0
+            self.window_start = time.time()
+        return finished
+
+    def stats(self):
+        # batch_sizes counts frames; a batch of n contributed n of them
+        batches = {size: count // size for size, count in sorted(self.batch_sizes.items())}
+        total_batches = sum(batches.values())
+        return {
+            'inference_fps': round(self.fps, 1),
+            'inferred': self.inferred,
+            'skipped': self.skipped,
+            'mean_batch': round(self.inferred / total_batches, 2) if total_batches else 0.0,
+            'batch_sizes': batches,
+            'latency_ms': round(float(np.mean(self.latencies)) * 1000, 1) if self.latencies else 0.0,
+            'restarts': self.restarts
+        }
+
+    def close(self):
+        try:
+            if self.process is not None and self.process.is_alive():
+                self.requests.put(None)
+                self.process.join(5)
+                if self.process.is_alive():
+                    self.process.terminate()
+        finally:
+            self.frames = None
+            self.shm.close()
+            self.shm.unlink()
+            print("Inference worker stopped", file=sys.stderr)
@@ -0,0 +1,115 @@
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+
+from bulk_loader import BulkLoader
+from fake_rtdb import FakeRtdb, RestReference
+from fileupload import push_records
+
+
+def synthetic_records(path, count):
+    """count rows cycled from the dataset, each with its own Transaction_ID"""
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    for i in range(count):
+        yield dict(rows[i % len(rows)], Transaction_ID=f"TXN_{i + 1:07d}")
+
+
+class FlakyReference:
+    """Fails the update after fail_after successful ones, once"""
+
+    def __init__(self, ref, fail_after):
+        self.ref = ref
+        self.fail_after = fail_after
+        self.updates = 0
+
+    def update(self, value):
+        self.updates += 1
+        if self.updates == self.fail_after + 1:
+            raise ConnectionError("injected failure")
+        self.ref.update(value)
+
+
+def run_push(fake, args):
+    ref = RestReference(fake.url, "/Dispenzo_Transactions")
+    start = time.time()
+    push_records(ref, synthetic_records(args.csv, args.push_rows))
+    return args.push_rows, time.time() - start
+
+
+def run_bulk(fake, args, chunk_size, workers):
+    ref = RestReference(fake.url, "/Dispenzo_Transactions")
+    loader = BulkLoader(ref, chunk_size, workers, report_interval=1e9)
+    start = time.time()
+    loader.load(synthetic_records(args.csv, args.rows), "bench", total=args.rows)
+    return args.rows, time.time() - start
+
+
+def check_resume(fake, args):
+    """Kill a load part way, run it again and check every row landed exactly once"""
+    ref = RestReference(fake.url, "/Dispenzo_Transactions")
+    checkpoint = os.path.join(tempfile.mkdtemp(), "upload_state.json")
+    rows = args.rows // 4
+    loader = BulkLoader(FlakyReference(ref, 5), 200, 4, retries=0, checkpoint=checkpoint, report_interval=1e9)
+    try:
+        loader.load(synthetic_records(args.csv, rows), "resume")
+        return {'error': 'injected failure did not stop the load'}
+    except RuntimeError as e:
+        print(f"  first run: {str(e)}")
+    first = fake.count("/Dispenzo_Transactions")
+    resumed = BulkLoader(ref, 200, 4, checkpoint=checkpoint, report_interval=1e9)
+    resumed.load(synthetic_records(args.csv, rows), "resume")
+    total = fake.count("/Dispenzo_Transactions")
+    return {'rows': rows, 'after_failure': first, 'skipped_on_resume': resumed.skipped,
+            'final': total, 'exactly_once': total == rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-row push vs chunked parallel loads on a fake RTDB")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--push-rows", type=int, default=300, help="rows for the slow per-row push run")
+    parser.add_argument("--latency", type=float, default=0.03, help="fake round trip per request (s)")
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--csv", default="Dispenzo_2.0_Sample_Dataset.csv")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'mode':>6} {'chunk':>6} {'workers':>8} {'rows':>7} {'seconds':>8} {'rows/s':>9} {'requests':>9}")
+    runs = [('push', 1, 1)] + [('bulk', c, w) for c in args.chunk_sizes for w in args.workers]
+    for mode, chunk_size, workers in runs:
+        fake = FakeRtdb(0, args.latency)
+        try:
+            if mode == 'push':
+                rows, seconds = run_push(fake, args)
+            else:
+                rows, seconds = run_bulk(fake, args, chunk_size, workers)
+            stored = fake.count("/Dispenzo_Transactions")
+        finally:
+            fake.close()
+        r = {'mode': mode, 'chunk_size': chunk_size, 'workers': workers, 'rows': rows, 'stored': stored,
+             'seconds': round(seconds, 2), 'rows_per_s': round(rows / seconds, 1), 'requests': fake.requests}
+        results.append(r)
+        print(f"{mode:>6} {chunk_size:>6} {workers:>8} {rows:>7} {r['seconds']:>8.2f} "
+              f"{r['rows_per_s']:>9.1f} {fake.requests:>9}")
+
+    print("Resume after a failed chunk:")
+    fake = FakeRtdb(0, args.latency)
+    try:
+        resume = check_resume(fake, args)
+    finally:
+        fake.close()
+    print(f"  {resume}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'settings': vars(args), 'results': results, 'resume': resume}, f, indent=2)
+        print(f"Results saved: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from csv_stream import SCHEMA, TransactionReader
+
+
+def write_dataset(path, rows, dirty, source="Dispenzo_2.0_Sample_Dataset.csv"):
+    """rows transactions cycled from the sample, with a dirty fraction of broken values"""
+    with open(source, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        sample = list(reader)
+    time_col = header.index("Time")
+    number_col = header.index("Temperature (°C)")
+    rng = random.Random(0)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for i in range(rows):
+            row = list(sample[i % len(sample)])
+            row[0] = f"TXN_{i + 1:09d}"
+            if rng.random() < dirty:
+                kind = rng.randrange(3)
+                if kind == 0:
+                    row[time_col] += "\t"  # fixed by stripping
+                elif kind == 1:
+                    row[number_col] = "n/a"  # rejected
+                else:
+                    row = row[:-1]  # rejected
+            writer.writerow(row)
+
+
+def consume(mode, path, chunk_rows):
+    """Read the whole file the given way; returns (rows, seconds)"""
+    start = time.time()
+    if mode == "pandas":
+        import pandas as pd
+        # The old fileupload.py path: full DataFrame, then a full list of dicts
+        df = pd.read_csv(path, on_bad_lines='skip')
+        records = df.to_dict(orient="records")
+        rows = len(records)
+    else:
+        reader = TransactionReader(path, chunk_rows, os.devnull)
+        rows = sum(1 for _ in reader)
+    return rows, time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak memory and speed of whole-file vs streamed CSV ingestion")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--dirty", type=float, default=0.01, help="fraction of rows with broken values")
+    parser.add_argument("--chunk-rows", type=int, default=10000)
+    parser.add_argument("--modes", nargs="+", default=["pandas", "stream"], choices=["pandas", "stream"])
+    parser.add_argument("--keep", help="write the generated CSV here and keep it")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    if args.worker:
+        # Child process, so each mode gets its own peak RSS
+        rows, seconds = consume(args.worker, args.keep, args.chunk_rows)
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(json.dumps({'rows': rows, 'seconds': seconds, 'peak_mb': peak_mb}))
+        return
+
+    path = args.keep or os.path.join(tempfile.mkdtemp(), "transactions.csv")
+    print(f"Writing {args.rows} rows to {path} ...")
+    write_dataset(path, args.rows, args.dirty)
+    size_mb = os.path.getsize(path) / 1e6
+    print(f"{size_mb:.0f} MB, {len(SCHEMA)} columns")
+
+    results = []
+    print(f"{'mode':>7} {'rows':>9} {'seconds':>8} {'rows/s':>9} {'peak MB':>8}")
+    try:
+        for mode in args.modes:
+            out = subprocess.run([sys.executable, __file__, "--worker", mode, "--keep", path,
+                                  "--chunk-rows", str(args.chunk_rows)],
+                                 capture_output=True, text=True, check=True)
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            r.update(mode=mode, rows_per_s=round(r['rows'] / r['seconds']), file_mb=round(size_mb, 1))
+            results.append(r)
+            print(f"{mode:>7} {r['rows']:>9} {r['seconds']:>8.2f} {r['rows_per_s']:>9} {r['peak_mb']:>8.0f}")
+    finally:
+        if not args.keep:
+            os.remove(path)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'settings': vars(args), 'results': results}, f, indent=2)
+        print(f"Results saved: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import argparse
+import csv
+import json
+import queue
+import threading
+import time
+
+import requests
+
+from conn import thingspeak_fields
+from fake_thingspeak import FakeThingSpeak
+from uploader import BulkUploader
+
+
+def load_rows(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def feed(rows, rate, seconds, put):
+    start = time.time()
+    index = 0
+    while time.time() - start < seconds:
+        put(f"k{index:08d}", rows[index % len(rows)])
+        index += 1
+        time.sleep(1.0 / rate)
+    return index
+
+
+def run_single(fake, rows, rate, seconds, interval):
+    """One point per /update call with a fresh connection, like upload_to_thingspeak"""
+    pending = queue.Queue()
+    stop = threading.Event()
+    stats = {'requests': 0}
+
+    def sender():
+        while not stop.is_set():
+            try:
+                entry = pending.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            while not stop.is_set():
+                params = dict(thingspeak_fields(entry), api_key=fake.api_key)
+                stats['requests'] += 1
+                response = requests.post(fake.url + "/update", params=params, timeout=10)
+                if response.status_code == 200 and response.text.strip() != "0":
+                    break
+                stop.wait(interval)
+            # Spacing as in the sync mode, so the next point is not rejected
+            stop.wait(interval)
+
+    thread = threading.Thread(target=sender, daemon=True)
+    thread.start()
+    sent = feed(rows, rate, seconds, lambda key, entry: pending.put(entry))
+    stop.set()
+    thread.join()
+    return sent, stats['requests'], pending.qsize(), 0
+
+
+def run_bulk(fake, rows, rate, seconds, interval):
+    uploader = BulkUploader("1", fake.api_key, thingspeak_fields, base_url=fake.url, interval=interval)
+    uploader.start()
+    sent = feed(rows, rate, seconds, uploader.put)
+    backlog = uploader.backlog()
+    uploader.close(timeout=0)
+    return sent, uploader.requests, backlog, uploader.retries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Points per minute of per-point vs bulk ThingSpeak uploads")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--rate", type=float, default=20, help="transactions arriving per second")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="server's minimum seconds between writes (ThingSpeak free: 15)")
+    parser.add_argument("--fail-rate", type=float, default=0.1, help="fraction of requests answered 503")
+    parser.add_argument("--latency", type=float, default=0.05, help="server latency per request (s)")
+    parser.add_argument("--csv", default="Dispenzo_2.0_Sample_Dataset.csv")
+    parser.add_argument("--modes", nargs="+", default=["single", "bulk"], choices=["single", "bulk"])
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    rows = load_rows(args.csv)
+    runners = {'single': run_single, 'bulk': run_bulk}
+    results = []
+    print(f"{'mode':>7} {'arrived':>8} {'points':>7} {'requests':>9} {'conns':>6} {'retries':>8} "
+          f"{'backlog':>8} {'pts/min':>8} {'max@15s':>8}")
+    for mode in args.modes:
+        fake = FakeThingSpeak(0, args.interval, args.fail_rate, args.latency)
+        try:
+            arrived, requests_made, backlog, retries = runners[mode](fake, rows, args.rate, args.seconds,
+                                                                     args.interval)
+        finally:
+            fake.close()
+        points = len(fake.points)
+        per_min = points * 60 / args.seconds
+        r = {
+            'mode': mode,
+            'arrived': arrived,
+            'points': points,
+            'requests': requests_made,
+            'connections': fake.connections,
+            'retries': retries,
+            'backlog': backlog,
+            'points_per_min': round(per_min, 1),
+            # Ceiling against ThingSpeak's real 15 s limit: 4 requests a minute
+            'max_points_per_min_at_15s': 4 * (960 if mode == 'bulk' else 1)
+        }
+        results.append(r)
+        print(f"{mode:>7} {arrived:>8} {points:>7} {requests_made:>9} {fake.connections:>6} {retries:>8} "
+              f"{backlog:>8} {r['points_per_min']:>8.1f} {r['max_points_per_min_at_15s']:>8}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'settings': vars(args), 'results': results}, f, indent=2)
+        print(f"Results saved: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
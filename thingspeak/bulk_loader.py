@@ -0,0 +1,164 @@
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from push_keys import random_salt, sequential_key
+
+
+def chunked(records, size):
+    """(chunk index, first row index, rows) in order, without holding more than one chunk"""
+    chunk = []
+    index = 0
+    start = 0
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield index, start, chunk
+            index += 1
+            start += size
+            chunk = []
+    if chunk:
+        yield index, start, chunk
+
+
+class LoadCheckpoint:
+    """Which chunks of a load are committed, kept in a JSON file next to the script
+
+    Holds the key base and salt too, so a resumed load generates the same
+    keys and a chunk that is written twice overwrites itself.
+    """
+
+    def __init__(self, path, source, chunk_size):
+        self.path = path
+        self.state = None
+        if path and os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            if state.get('source') == source and state.get('chunk_size') == chunk_size:
+                self.state = state
+            else:
+                print(f"⚠️ {path} is for another load, starting over")
+        if self.state is None:
+            self.state = {'source': source, 'chunk_size': chunk_size, 'base_ms': int(time.time() * 1000),
+                          'salt': random_salt(), 'done': [], 'rows': 0}
+        self.done = set(self.state['done'])
+
+    def key(self, index):
+        return sequential_key(self.state['base_ms'], self.state['salt'], index)
+
+    def commit(self, chunk_index, rows):
+        self.done.add(chunk_index)
+        self.state['rows'] += rows
+        self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        self.state['done'] = sorted(self.done)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.path)
+
+    def finish(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class BulkLoader:
+    """Writes records under a database node in large multi-path update chunks
+
+    Keys are generated locally (no push() round trip per row) and each
+    chunk of chunk_size records goes out as one ref.update(), which the
+    database applies atomically. Up to workers chunks are in flight at a
+    time and only that many are held in memory, so records can be a
+    generator. A chunk is retried with backoff; if it still fails the
+    load stops and re-running it with the same checkpoint skips every
+    committed chunk.
+    """
+
+    def __init__(self, ref, chunk_size=500, workers=4, retries=3, checkpoint=None, report_interval=2.0):
+        self.ref = ref
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.retries = retries
+        self.checkpoint_path = checkpoint
+        self.report_interval = report_interval
+
+        self.rows = 0
+        self.chunks = 0
+        self.skipped = 0
+        self.elapsed = 0.0
+
+    def write_chunk(self, keys, rows):
+        update = dict(zip(keys, rows))
+        delay = 1.0
+        for attempt in range(self.retries + 1):
+            try:
+                self.ref.update(update)
+                return
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                print(f"⚠️ Chunk write failed ({str(e)}), retrying in {delay:.0f}s")
+                time.sleep(delay)
+                delay *= 2
+
+    def load(self, records, source, total=None):
+        """Write all records; returns the number of rows written by this run"""
+        checkpoint = LoadCheckpoint(self.checkpoint_path, source, self.chunk_size)
+        if checkpoint.done:
+            print(f"Resuming: {len(checkpoint.done)} chunks ({checkpoint.state['rows']} rows) already loaded")
+
+        start = time.time()
+        last_report = start
+        in_flight = {}
+        failed = None
+
+        def collect(done):
+            nonlocal failed
+            for future in done:
+                chunk_index, count = in_flight.pop(future)
+                try:
+                    future.result()
+                except Exception as e:
+                    failed = failed or e
+                    continue
+                checkpoint.commit(chunk_index, count)
+                self.rows += count
+                self.chunks += 1
+
+        with ThreadPoolExecutor(self.workers) as pool:
+            for chunk_index, first, rows in chunked(records, self.chunk_size):
+                if chunk_index in checkpoint.done:
+                    self.skipped += 1
+                    continue
+                if failed:
+                    break
+                while len(in_flight) >= self.workers:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+                keys = [checkpoint.key(first + i) for i in range(len(rows))]
+                in_flight[pool.submit(self.write_chunk, keys, rows)] = (chunk_index, len(rows))
+
+                now = time.time()
+                if now - last_report >= self.report_interval:
+                    last_report = now
+                    self.report(checkpoint, total, now - start)
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+
+        self.elapsed = time.time() - start
+        if failed:
+            raise RuntimeError(f"load stopped after {checkpoint.state['rows']} rows, "
+                               f"run again to resume: {str(failed)}")
+        self.report(checkpoint, total, self.elapsed)
+        checkpoint.finish()
+        return self.rows
+
+    def report(self, checkpoint, total, elapsed):
+        loaded = checkpoint.state['rows']
+        progress = f"{loaded}/{total} rows ({loaded * 100 // total}%)" if total else f"{loaded} rows"
+        print(f"{progress}, {self.rows / max(elapsed, 1e-6):.0f} rows/s, {self.chunks} chunks this run")
@@ -1,21 +1,42 @@
-import firebase_admin
-from firebase_admin import credentials, db
-import requests
+import argparse
+import queue
+import threading
 import time
 
+import requests
+
+from listener import RestStreamSource, TransactionListener
+from sync_cursor import SyncCursor, fetch_after, latest_key
+from uploader import THINGSPEAK_BASE_URL, BulkUploader
+
 # Firebase setup
-cred = credentials.Certificate("dispenzo2service.json")  # your JSON key
-firebase_admin.initialize_app(cred, {
-    'databaseURL': 'https://dispenzo2-default-rtdb.firebaseio.com/'
-})
+SERVICE_ACCOUNT = "dispenzo2service.json"  # your JSON key
+DATABASE_URL = "https://dispenzo2-default-rtdb.firebaseio.com/"
+TRANSACTIONS_PATH = "/Dispenzo_Transactions"
 
 # ThingSpeak setup
 THINGSPEAK_API_KEY = "5YM4K6VYIKM2BGYN"
 THINGSPEAK_URL = "https://api.thingspeak.com/update"
+THINGSPEAK_CHANNEL_ID = ""  # needed for bulk updates, or pass --channel
 
-def upload_to_thingspeak(data):
-    payload = {
-        "api_key": THINGSPEAK_API_KEY,
+
+def init_firebase():
+    import firebase_admin
+    from firebase_admin import credentials, db
+
+    cred = credentials.Certificate(SERVICE_ACCOUNT)
+    firebase_admin.initialize_app(cred, {'databaseURL': DATABASE_URL})
+    return db.reference(TRANSACTIONS_PATH)
+
+
+def firebase_token():
+    """OAuth access token of the service account, for the REST stream"""
+    import firebase_admin
+    return firebase_admin.get_app().credential.get_access_token().access_token
+
+
+def thingspeak_fields(data):
+    return {
         "field1": data.get("Quantity_Dispensed (kg)", 0),
         "field2": data.get("Stock_Remaining (kg)", 0),
         "field3": data.get("Dispense_Time (s)", 0),
@@ -25,22 +46,213 @@ def upload_to_thingspeak(data):
         "field7": 0 if data.get("Error_Code") == "ERR_NONE" else 1,
         "field8": 1  # Incremental user count (optional)
     }
-    response = requests.post(THINGSPEAK_URL, params=payload)
-    if response.status_code == 200:
+
+
+def upload_to_thingspeak(data):
+    """True if ThingSpeak accepted the entry"""
+    payload = dict(thingspeak_fields(data), api_key=THINGSPEAK_API_KEY)
+    try:
+        response = requests.post(THINGSPEAK_URL, params=payload, timeout=10)
+    except requests.RequestException as e:
+        print(f"⚠️ Upload failed: {str(e)}")
+        return False
+    # ThingSpeak answers 200 with entry id 0 when it drops an update (rate limit)
+    if response.status_code == 200 and response.text.strip() != "0":
         print("✅ Data uploaded to ThingSpeak successfully.")
+        return True
+    print(f"⚠️ Upload failed: {response.status_code} {response.text.strip()}")
+    return False
+
+
+def sync_once(ref, cursor, upload, batch=20, spacing=15.0):
+    """Forward every transaction newer than the cursor, oldest first
+
+    The cursor only moves past an entry once ThingSpeak has accepted it; a
+    failed upload ends the pass and the same entry is retried next time.
+    spacing waits between uploads to respect ThingSpeak's update interval.
+    """
+    sent = 0
+    while True:
+        entries = fetch_after(ref, cursor.last_key, batch)
+        for key, entry in entries:
+            if sent:
+                time.sleep(spacing)
+            if not upload(entry):
+                return sent
+            cursor.save(key)
+            sent += 1
+        if len(entries) < batch:
+            return sent
+
+
+def sync_once_bulk(ref, cursor, uploader):
+    """sync_once with the bulk uploader: up to max_batch new transactions per request
+
+    A batch ThingSpeak rejects for good is in the uploader's reject log, so the
+    cursor moves past it too instead of fetching it again on every poll.
+    """
+    sent = 0
+    while True:
+        entries = fetch_after(ref, cursor.last_key, uploader.max_batch)
+        if not entries:
+            return sent
+        now = time.time()
+        accepted = uploader.send([(key, entry, now) for key, entry in entries])
+        if accepted is None:
+            return sent
+        cursor.save(entries[-1][0], accepted)
+        sent += accepted
+        if len(entries) < uploader.max_batch:
+            return sent
+
+
+def run_sync(ref, cursor, upload, interval, batch, spacing, backfill, uploader=None):
+    if cursor.last_key is None and not backfill:
+        # First run: start after what is already there instead of replaying history
+        key = latest_key(ref)
+        if key is not None:
+            cursor.save(key, count=0)
+        print(f"Starting after {key}")
     else:
-        print(f"⚠️ Upload failed: {response.status_code}")
+        print(f"Resuming after {cursor.last_key} ({cursor.synced} synced so far)")
+
+    while True:
+        if uploader is not None:
+            sent = sync_once_bulk(ref, cursor, uploader)
+        else:
+            sent = sync_once(ref, cursor, upload, batch, spacing)
+        if sent:
+            print(f"Synced {sent} new transaction(s), last key {cursor.last_key}")
+        time.sleep(interval)
+
+
+def run_stream(listener, cursor, upload, spacing, report_interval=60):
+    """Upload transactions as the listener queues them; nothing runs while idle
 
-# Continuously sync new data every few seconds
-while True:
-    # Fetch latest transaction from Firebase
-    ref = db.reference("/Dispenzo_Transactions")
-    all_data = ref.get()
+    A failed upload is retried after spacing; the cursor advances only once
+    ThingSpeak has accepted the entry.
+    """
+    listener.start()
+    last_upload = 0.0
+    last_report = time.time()
+    try:
+        while True:
+            try:
+                key, entry, received_at = listener.get(timeout=report_interval)
+            except queue.Empty:
+                key = None
+            if key is not None:
+                while True:
+                    wait = spacing - (time.time() - last_upload)
+                    if wait > 0:
+                        time.sleep(wait)
+                    last_upload = time.time()
+                    if upload(entry):
+                        break
+                cursor.save(key)
+                print(f"Forwarded {key} {(time.time() - received_at) * 1000:.0f} ms after it arrived")
+            if time.time() - last_report >= report_interval:
+                last_report = time.time()
+                print(f"Listener: {listener.stats()}, synced {cursor.synced}")
+    finally:
+        listener.close()
 
-    if all_data:
-        # Get last transaction (most recent)
-        last_key = list(all_data.keys())[-1]
-        last_entry = all_data[last_key]
-        upload_to_thingspeak(last_entry)
 
-    time.sleep(30)  # update every 30 seconds
\ No newline at end of file
+def run_stream_bulk(listener, uploader, report_interval=60):
+    """Stream mode with the bulk uploader; it moves the cursor as batches are accepted"""
+    listener.start()
+    uploader.start()
+    last_report = time.time()
+    try:
+        while True:
+            try:
+                key, entry, received_at = listener.get(timeout=report_interval)
+                uploader.put(key, entry, received_at)
+            except queue.Empty:
+                pass
+            if time.time() - last_report >= report_interval:
+                last_report = time.time()
+                print(f"Listener: {listener.stats()}, uploader: {uploader.stats()}")
+    finally:
+        listener.close()
+        uploader.close(timeout=30)
+
+
+def dry_run_upload(data):
+    print(f"[dry-run] {thingspeak_fields(data)}")
+    return True
+
+
+def run_latest(ref, interval):
+    """Original behaviour: read the whole node and upload only its last entry"""
+    while True:
+        all_data = ref.get()
+        if all_data:
+            last_key = list(all_data.keys())[-1]
+            upload_to_thingspeak(all_data[last_key])
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Forward Dispenzo transactions from Firebase to ThingSpeak")
+    parser.add_argument("--mode", default="sync", choices=["sync", "stream", "latest"],
+                        help="sync: poll for new transactions, stream: listen for them, "
+                             "latest: last entry each poll")
+    parser.add_argument("--interval", type=float, default=30, help="seconds between polls")
+    parser.add_argument("--state", default="sync_state.json", help="file holding the last synced key")
+    parser.add_argument("--batch", type=int, default=20, help="transactions fetched per query")
+    parser.add_argument("--spacing", type=float, default=15,
+                        help="seconds between ThingSpeak updates")
+    parser.add_argument("--backfill", action="store_true",
+                        help="with no saved state, forward the existing history too")
+    parser.add_argument("--source", default="firebase", choices=["firebase", "fake"],
+                        help="stream mode: Firebase or an offline stand-in fed from a CSV")
+    parser.add_argument("--fake-csv", default="Dispenzo_2.0_Sample_Dataset.csv")
+    parser.add_argument("--fake-rate", type=float, default=0.2, help="fake transactions per second")
+    parser.add_argument("--fake-drop-every", type=float, help="drop the fake stream every N seconds")
+    parser.add_argument("--dry-run", action="store_true", help="print instead of uploading")
+    parser.add_argument("--uploader", default="single", choices=["single", "bulk"],
+                        help="one /update per transaction, or batched bulk_update requests")
+    parser.add_argument("--channel", default=THINGSPEAK_CHANNEL_ID, help="channel id for bulk updates")
+    parser.add_argument("--thingspeak-url", default=THINGSPEAK_BASE_URL,
+                        help="bulk API base URL, e.g. a fake_thingspeak.py server")
+    parser.add_argument("--max-batch", type=int, default=960, help="points per bulk update")
+    parser.add_argument("--rejects", default="thingspeak_rejects.jsonl",
+                        help="bulk updates ThingSpeak refused for good are logged here")
+    args = parser.parse_args()
+
+    upload = dry_run_upload if args.dry_run else upload_to_thingspeak
+    cursor = SyncCursor(args.state)
+    uploader = None
+    if args.uploader == "bulk":
+        if not args.channel:
+            parser.error("--uploader bulk needs a ThingSpeak channel id (--channel)")
+        if args.dry_run:
+            parser.error("--dry-run only replaces single uploads; point --thingspeak-url "
+                         "at fake_thingspeak.py to try the bulk uploader")
+        uploader = BulkUploader(args.channel, THINGSPEAK_API_KEY, thingspeak_fields, args.thingspeak_url,
+                                args.spacing, args.max_batch, on_sent=cursor.save,
+                                rejects_path=args.rejects)
+    if args.mode == "stream":
+        if args.source == "fake":
+            from fake_events import FakeEventSource, feed_from_csv
+            source = FakeEventSource()
+            threading.Thread(target=feed_from_csv, daemon=True,
+                             args=(source, args.fake_csv, args.fake_rate, args.fake_drop_every)).start()
+        else:
+            ref = init_firebase()
+            if cursor.last_key is None and not args.backfill:
+                # Start after the newest key instead of streaming the history once to find it
+                cursor.save(latest_key(ref), count=0)
+            source = RestStreamSource(DATABASE_URL, TRANSACTIONS_PATH, token=firebase_token)
+        skip = cursor.last_key is None and not args.backfill
+        listener = TransactionListener(source, cursor.last_key, skip_existing=skip)
+        if uploader is not None:
+            run_stream_bulk(listener, uploader)
+        else:
+            run_stream(listener, cursor, upload, args.spacing)
+    elif args.mode == "latest":
+        run_latest(init_firebase(), args.interval)
+    else:
+        run_sync(init_firebase(), cursor, upload, args.interval, args.batch, args.spacing,
+                 args.backfill, uploader)
@@ -0,0 +1,130 @@
+import csv
+
+import pandas as pd
+
+from uploader import LOCAL_TZ
+
+# The twenty columns of a Dispenzo transaction export and how each is typed
+SCHEMA = [
+    ("Transaction_ID", "str"),
+    ("User_ID", "str"),
+    ("User_Name", "str"),
+    ("Ration_Card_No", "str"),
+    ("Date", "str"),
+    ("Time", "str"),
+    ("Center_ID", "str"),
+    ("Item_Name", "str"),
+    ("Quantity_Dispensed (kg)", "float"),
+    ("Authorized_Quota (kg)", "float"),
+    ("Remaining_Quota (kg)", "float"),
+    ("Authentication_Method", "str"),
+    ("Authentication_Status", "int"),
+    ("Transaction_Status", "str"),
+    ("Dispense_Time (s)", "float"),
+    ("Stock_Remaining (kg)", "float"),
+    ("Power_Consumption (W)", "float"),
+    ("Temperature (°C)", "float"),
+    ("Humidity (%)", "float"),
+    ("Error_Code", "str"),
+]
+
+UTC_OFFSET = int(LOCAL_TZ.utcoffset(None).total_seconds())
+
+
+class TransactionReader:
+    """Streams a transaction CSV as typed records, chunk_rows at a time
+
+    Only one chunk is in memory at once, whatever the file size. Every
+    value is stripped (exports contain times like '19:00:00\\t'), numeric
+    columns are coerced to int/float and Date + Time become an epoch
+    'Timestamp' (local time, see uploader.LOCAL_TZ). Rows with the wrong
+    number of fields, empty text columns, non-numeric numbers or an
+    unparseable date go to rejects_path with a Reject_Reason instead.
+    """
+
+    def __init__(self, path, chunk_rows=10000, rejects_path=None):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.rejects_path = rejects_path
+
+        self.rows = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.reject_file = None
+        self.reject_writer = None
+
+    def __iter__(self):
+        with open(self.path, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = [name.strip() for name in next(reader, [])]
+            missing = [name for name, _ in SCHEMA if name not in header]
+            if missing:
+                raise ValueError(f"{self.path} is missing columns: {', '.join(missing)}")
+            self.header = header
+            try:
+                chunk = []
+                for line, fields in enumerate(reader, start=2):
+                    if not fields:
+                        continue
+                    self.rows += 1
+                    if len(fields) != len(header):
+                        self.reject(fields, line, f"expected {len(header)} fields, got {len(fields)}")
+                        continue
+                    chunk.append((line, [value.strip() for value in fields]))
+                    if len(chunk) == self.chunk_rows:
+                        yield from self.convert(chunk)
+                        chunk = []
+                if chunk:
+                    yield from self.convert(chunk)
+            finally:
+                if self.reject_file is not None:
+                    self.reject_file.close()
+                    self.reject_file = None
+
+    def convert(self, chunk):
+        lines = [line for line, _ in chunk]
+        names = [name for name, _ in SCHEMA]
+        df = pd.DataFrame([fields for _, fields in chunk], columns=self.header, dtype=object)[names]
+        reasons = pd.Series("", index=df.index, dtype=object)
+
+        def flag(mask, reason):
+            reasons[mask & (reasons == "")] = reason
+
+        for name, kind in SCHEMA:
+            if kind == "str":
+                flag(df[name] == "", f"empty {name}")
+                continue
+            values = pd.to_numeric(df[name], errors='coerce')
+            flag(values.isna(), f"bad {name}")
+            if kind == "int":
+                flag(values.notna() & (values % 1 != 0), f"bad {name}")
+                values = values.fillna(0).astype('int64')
+            df[name] = values
+
+        stamp = pd.to_datetime(df["Date"] + " " + df["Time"], format="%Y-%m-%d %H:%M:%S", errors='coerce')
+        flag(stamp.isna(), "bad Date/Time")
+        epoch = (stamp - pd.Timestamp("1970-01-01")) // pd.Timedelta(seconds=1) - UTC_OFFSET
+        df["Timestamp"] = epoch.fillna(0).astype('int64')
+
+        bad = reasons != ""
+        for i in bad[bad].index:
+            self.reject(chunk[i][1], lines[i], reasons[i])
+        good = df[~bad]
+        self.accepted += len(good)
+        # Column lists zipped back into rows; much cheaper than DataFrame.to_dict
+        names = list(good.columns)
+        columns = [good[name].tolist() for name in names]
+        return [dict(zip(names, row)) for row in zip(*columns)]
+
+    def reject(self, fields, line, reason):
+        self.rejected += 1
+        if not self.rejects_path:
+            return
+        if self.reject_writer is None:
+            self.reject_file = open(self.rejects_path, 'w', newline='', encoding='utf-8')
+            self.reject_writer = csv.writer(self.reject_file)
+            self.reject_writer.writerow(["Line"] + self.header + ["Reject_Reason"])
+        self.reject_writer.writerow([line] + fields + [reason])
+
+    def stats(self):
+        return {'rows': self.rows, 'accepted': self.accepted, 'rejected': self.rejected}
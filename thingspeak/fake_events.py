@@ -0,0 +1,88 @@
+import csv
+import queue
+import threading
+import time
+
+from listener import Event
+from push_keys import PushKeyGenerator
+
+
+class FakeHandle:
+    def __init__(self, callback):
+        self.callback = callback
+        self.events = queue.Queue()
+        self.live = True
+        self.thread = threading.Thread(target=self._run, name="fake-listen", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        # Callbacks run on their own thread, as with the SDK
+        while self.live:
+            try:
+                event = self.events.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if self.live:
+                self.callback(event)
+
+    def alive(self):
+        return self.live
+
+    def close(self):
+        self.live = False
+
+
+class FakeEventSource:
+    """Offline stand-in for a listened RTDB node
+
+    listen() delivers the same events as the REST stream: a snapshot put
+    at '/' of the children from `after` on, then a put per added child. drop() kills every open
+    stream, like a network loss; children added until the next listen()
+    only show up in its snapshot.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.keys = PushKeyGenerator()
+        self.lock = threading.Lock()
+        self.handles = []
+        self.snapshot_sizes = []
+
+    def add(self, entry):
+        with self.lock:
+            key = self.keys.next_key()
+            self.data[key] = entry
+            for handle in self.handles:
+                if handle.live:
+                    handle.events.put(Event('put', '/' + key, entry))
+        return key
+
+    def listen(self, callback, after=None):
+        with self.lock:
+            handle = FakeHandle(callback)
+            snapshot = {key: entry for key, entry in self.data.items() if after is None or key >= after}
+            self.snapshot_sizes.append(len(snapshot))
+            handle.events.put(Event('put', '/', snapshot or None))
+            self.handles = [h for h in self.handles if h.live] + [handle]
+        return handle
+
+    def drop(self):
+        with self.lock:
+            for handle in self.handles:
+                handle.close()
+
+
+def feed_from_csv(source, path, rate, drop_every=None, stop=None):
+    """Add the CSV rows to source at rate per second, looping; optionally drop the stream"""
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    index = 0
+    last_drop = time.time()
+    while stop is None or not stop.is_set():
+        source.add(rows[index % len(rows)])
+        index += 1
+        if drop_every and time.time() - last_drop >= drop_every:
+            print("(fake) dropping the stream")
+            source.drop()
+            last_drop = time.time()
+        time.sleep(1.0 / rate)
@@ -0,0 +1,287 @@
+import argparse
+import json
+import queue
+import socket
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from push_keys import PushKeyGenerator
+
+
+def split_path(path):
+    return [part for part in path.strip('/').split('/') if part]
+
+
+class FakeRtdb:
+    """Local stand-in for the Realtime Database REST API
+
+    Supports GET (with orderBy="$key", startAt, limitToFirst and
+    limitToLast), PUT, PATCH with multi-path updates, POST (push) and
+    DELETE on /<path>.json. latency is added to every request, like the
+    round trip to the real database. A GET with Accept: text/event-stream
+    streams like the real server: a put of the (queried) node, then a
+    put per change below it and a keep-alive every keepalive seconds.
+    """
+
+    def __init__(self, port=0, latency=0.03, host="127.0.0.1", keepalive=30.0):
+        self.latency = latency
+        self.keepalive = keepalive
+        self.streams = []
+        self.root = {}
+        self.lock = threading.Lock()
+        self.keys = PushKeyGenerator()
+        self.requests = 0
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # Headers and body go out in separate writes; don't let Nagle hold the body
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def do_GET(self):
+                self.handle_request('GET')
+
+            def do_PUT(self):
+                self.handle_request('PUT')
+
+            def do_PATCH(self):
+                self.handle_request('PATCH')
+
+            def do_POST(self):
+                self.handle_request('POST')
+
+            def do_DELETE(self):
+                self.handle_request('DELETE')
+
+            def handle_request(self, method):
+                url = urlparse(self.path)
+                if not url.path.endswith('.json'):
+                    self.reply(404, {'error': 'not found'})
+                    return
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    body = json.loads(self.rfile.read(length)) if length else None
+                except ValueError:
+                    self.reply(400, {'error': 'invalid data'})
+                    return
+                if fake.latency:
+                    time.sleep(fake.latency)
+                params = {k: json.loads(v[0]) for k, v in parse_qs(url.query).items()
+                          if k != 'access_token'}
+                if method == 'GET' and 'text/event-stream' in self.headers.get('Accept', ''):
+                    self.stream(split_path(url.path[:-5]), params)
+                    return
+                status, result = fake.handle(method, split_path(url.path[:-5]), body, params)
+                self.reply(status, result)
+
+            def stream(self, parts, params):
+                events = queue.Queue()
+                with fake.lock:
+                    events.put(('put', '/', fake.query(fake.node(parts), params)))
+                    fake.streams.append((parts, events))
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                self.close_connection = True
+                try:
+                    while True:
+                        try:
+                            event, path, data = events.get(timeout=fake.keepalive)
+                        except queue.Empty:
+                            event, path, data = 'keep-alive', None, None
+                        if event is None:
+                            self.wfile.write(b"0\r\n\r\n")
+                            return
+                        payload = 'null' if path is None else json.dumps({'path': path, 'data': data})
+                        chunk = f"event: {event}\ndata: {payload}\n\n".encode()
+                        self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                        self.wfile.flush()
+                except OSError:
+                    pass
+                finally:
+                    with fake.lock:
+                        fake.streams = [s for s in fake.streams if s[1] is not events]
+
+            def reply(self, status, result):
+                data = json.dumps(result).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.url = f"http://{host}:{self.port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, name="fake-rtdb", daemon=True)
+        self.thread.start()
+
+    def node(self, parts, create=False):
+        node = self.root
+        for part in parts:
+            if not isinstance(node, dict) or (part not in node and not create):
+                return None
+            node = node.setdefault(part, {})
+        return node
+
+    def set(self, parts, value):
+        for stream_parts, events in self.streams:
+            if parts[:len(stream_parts)] == stream_parts:
+                events.put(('put', '/' + '/'.join(parts[len(stream_parts):]), value))
+        if not parts:
+            self.root = value if isinstance(value, dict) else {}
+            return
+        parent = self.node(parts[:-1], create=True)
+        if value is None:
+            parent.pop(parts[-1], None)
+        else:
+            parent[parts[-1]] = value
+
+    def handle(self, method, parts, body, params):
+        with self.lock:
+            self.requests += 1
+            if method == 'GET':
+                return 200, self.query(self.node(parts), params)
+            if method == 'PUT':
+                self.set(parts, body)
+                return 200, body
+            if method == 'PATCH':
+                if not isinstance(body, dict):
+                    return 400, {'error': 'PATCH needs an object'}
+                # Multi-path update: every key is a path below this node
+                for path, value in body.items():
+                    self.set(parts + split_path(path), value)
+                return 200, body
+            if method == 'POST':
+                key = self.keys.next_key()
+                self.set(parts + [key], body)
+                return 200, {'name': key}
+            if method == 'DELETE':
+                self.set(parts, None)
+                return 200, None
+        return 405, {'error': 'method not allowed'}
+
+    def query(self, value, params):
+        if not isinstance(value, dict) or params.get('orderBy') != '$key':
+            return value
+        keys = sorted(value)
+        if 'startAt' in params:
+            keys = [k for k in keys if k >= params['startAt']]
+        if 'limitToFirst' in params:
+            keys = keys[:params['limitToFirst']]
+        if 'limitToLast' in params:
+            keys = keys[-params['limitToLast']:] if params['limitToLast'] else []
+        return {k: value[k] for k in keys}
+
+    def count(self, path):
+        node = self.node(split_path(path))
+        return len(node) if isinstance(node, dict) else 0
+
+    def drop_streams(self):
+        """End every open stream, like a dropped connection"""
+        with self.lock:
+            for _, events in self.streams:
+                events.put((None, None, None))
+
+    def close(self):
+        self.drop_streams()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class RestReference:
+    """The parts of db.Reference the scripts use, over plain REST
+
+    For the fake server above; every thread gets its own pooled session.
+    """
+
+    local = threading.local()
+
+    def __init__(self, base_url, path="/"):
+        self.base_url = base_url.rstrip('/')
+        self.path = '/' + '/'.join(split_path(path))
+
+    @property
+    def session(self):
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = self.local.session = requests.Session()
+        return session
+
+    def request(self, method, params=None, data=None):
+        response = self.session.request(method, f"{self.base_url}{self.path}.json", params=params,
+                                        data=None if data is None else json.dumps(data), timeout=30)
+        response.raise_for_status()
+        return response.json()
+
+    def child(self, path):
+        return RestReference(self.base_url, f"{self.path}/{path}")
+
+    def get(self):
+        return self.request('GET')
+
+    def set(self, value):
+        self.request('PUT', data=value)
+
+    def update(self, value):
+        self.request('PATCH', data=value)
+
+    def push(self, value):
+        return self.child(self.request('POST', data=value)['name'])
+
+    def delete(self):
+        self.request('DELETE')
+
+    def order_by_key(self):
+        return RestQuery(self)
+
+
+class RestQuery:
+    def __init__(self, ref):
+        self.ref = ref
+        self.params = {'orderBy': '"$key"'}
+
+    def start_at(self, key):
+        self.params['startAt'] = json.dumps(key)
+        return self
+
+    def limit_to_first(self, count):
+        self.params['limitToFirst'] = count
+        return self
+
+    def limit_to_last(self, count):
+        self.params['limitToLast'] = count
+        return self
+
+    def get(self):
+        data = self.ref.request('GET', params=self.params) or {}
+        return OrderedDict(sorted(data.items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local fake Realtime Database REST server")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=0.03, help="seconds added to every request")
+    args = parser.parse_args()
+
+    fake = FakeRtdb(args.port, args.latency)
+    print(f"Fake RTDB at {fake.url}")
+    try:
+        while True:
+            time.sleep(5)
+    except KeyboardInterrupt:
+        fake.close()
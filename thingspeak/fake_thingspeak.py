@@ -0,0 +1,146 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeThingSpeak:
+    """Local stand-in for the ThingSpeak write API
+
+    Serves /update (one point, answers entry id 0 when it comes too soon)
+    and /channels/<id>/bulk_update.json (answers 429 when too soon), with
+    the same min_interval between accepted writes per channel that a free
+    account gets. fail_rate answers that fraction of requests with 503.
+    """
+
+    def __init__(self, port=0, min_interval=15.0, fail_rate=0.0, latency=0.0, api_key="TESTKEY",
+                 max_bulk=960, host="127.0.0.1"):
+        self.min_interval = min_interval
+        self.fail_rate = fail_rate
+        self.latency = latency
+        self.api_key = api_key
+        self.max_bulk = max_bulk
+        self.lock = threading.Lock()
+        self.last_write = {}
+        self.points = []
+        self.requests = 0
+        self.rejected = 0
+        self.connections = 0
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with fake.lock:
+                    fake.connections += 1
+
+            def do_GET(self):
+                self.handle_write()
+
+            def do_POST(self):
+                self.handle_write()
+
+            def handle_write(self):
+                url = urlparse(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if url.path == '/update':
+                    params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                    params.update({k: v[0] for k, v in parse_qs(body.decode()).items()})
+                    self.reply(*fake.update(params))
+                elif url.path.startswith('/channels/') and url.path.endswith('/bulk_update.json'):
+                    channel = url.path.split('/')[2]
+                    try:
+                        data = json.loads(body or b'{}')
+                    except ValueError:
+                        self.reply(400, '{"error": "invalid json"}')
+                        return
+                    self.reply(*fake.bulk(channel, data))
+                else:
+                    self.reply(404, '{"error": "not found"}')
+
+            def reply(self, status, text):
+                data = text.encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.url = f"http://{host}:{self.port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, name="fake-thingspeak", daemon=True)
+        self.thread.start()
+
+    def allow(self, channel):
+        """True and the write is recorded if the channel's interval has passed"""
+        now = time.time()
+        if now - self.last_write.get(channel, 0.0) < self.min_interval:
+            self.rejected += 1
+            return False
+        self.last_write[channel] = now
+        return True
+
+    def update(self, params):
+        with self.lock:
+            self.requests += 1
+            if params.get('api_key') != self.api_key:
+                return 401, '-1'
+            if random.random() < self.fail_rate:
+                return 503, '{"error": "unavailable"}'
+            if not self.allow('update'):
+                return 200, '0'
+            self.points.append((time.time(), None, params))
+            return 200, str(len(self.points))
+
+    def bulk(self, channel, data):
+        with self.lock:
+            self.requests += 1
+            if data.get('write_api_key') != self.api_key:
+                return 401, '{"error": "bad api key"}'
+            updates = data.get('updates') or []
+            if not updates or len(updates) > self.max_bulk:
+                return 400, '{"error": "bad number of updates"}'
+            if random.random() < self.fail_rate:
+                return 503, '{"error": "unavailable"}'
+            if not self.allow(channel):
+                return 429, '{"error": "too many requests"}'
+            now = time.time()
+            for update in updates:
+                self.points.append((now, update.get('created_at'), update))
+            return 202, '{"success": true}'
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local fake ThingSpeak write API")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--min-interval", type=float, default=15.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--api-key", default="TESTKEY", help="write key the server accepts")
+    args = parser.parse_args()
+
+    fake = FakeThingSpeak(args.port, args.min_interval, args.fail_rate, api_key=args.api_key)
+    print(f"Fake ThingSpeak at {fake.url} (api key {fake.api_key})")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"{len(fake.points)} points, {fake.requests} requests, {fake.rejected} too soon")
+    except KeyboardInterrupt:
+        fake.close()
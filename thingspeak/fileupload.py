@@ -1,24 +1,50 @@
-import firebase_admin
-from firebase_admin import credentials, db
-import pandas as pd
+import argparse
+import os
 
-# --- Step 1: Load Firebase Credentials ---
-cred = credentials.Certificate("dispenzo2service.json")  # replace with your JSON filename
-firebase_admin.initialize_app(cred, {
-    'databaseURL': 'https://dispenzo2-default-rtdb.firebaseio.com/'  # replace with your actual DB URL
-})
+from bulk_loader import BulkLoader
+from conn import TRANSACTIONS_PATH, init_firebase
+from csv_stream import TransactionReader
 
-# --- Step 2: Load CSV File ---
-df = pd.read_csv("Dispenzo_2.0_Variation_Dataset.csv")
+CSV_FILE = "Dispenzo_2.0_Variation_Dataset.csv"
 
-# --- Step 3: Convert DataFrame to Dict ---
-data = df.to_dict(orient="records")
 
-# --- Step 4: Reference to Database Node ---
-ref = db.reference("/Dispenzo_Transactions")
+def push_records(ref, records):
+    """Original upload: one push() round trip per row"""
+    for record in records:
+        ref.push(record)
 
-# --- Step 5: Push Data to Firebase ---
-for record in data:
-    ref.push(record)
 
-print("✅ Data successfully uploaded to Firebase Realtime Database!")
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Upload the transaction dataset to Firebase")
+    parser.add_argument("--csv", default=CSV_FILE)
+    parser.add_argument("--mode", default="bulk", choices=["bulk", "push"],
+                        help="bulk: chunked parallel updates, push: one request per row")
+    parser.add_argument("--chunk-size", type=int, default=500, help="rows per multi-path update")
+    parser.add_argument("--workers", type=int, default=8, help="chunks written concurrently")
+    parser.add_argument("--checkpoint", default="upload_state.json",
+                        help="progress file a failed load resumes from")
+    parser.add_argument("--read-rows", type=int, default=10000, help="CSV rows parsed per chunk")
+    parser.add_argument("--rejects", default="rejected_rows.csv", help="where malformed rows are written")
+    parser.add_argument("--database-url", help="REST base URL of a fake_rtdb.py server instead of Firebase")
+    args = parser.parse_args()
+
+    if args.database_url:
+        from fake_rtdb import RestReference
+        ref = RestReference(args.database_url, TRANSACTIONS_PATH)
+    else:
+        ref = init_firebase()
+
+    # Streamed and validated row by row, so the file never has to fit in memory
+    records = TransactionReader(args.csv, args.read_rows, args.rejects)
+    if args.mode == "push":
+        push_records(ref, records)
+    else:
+        loader = BulkLoader(ref, args.chunk_size, args.workers, checkpoint=args.checkpoint)
+        # Size is part of the identity so an edited file does not resume an old checkpoint
+        source = f"{os.path.abspath(args.csv)}:{os.path.getsize(args.csv)}"
+        loader.load(records, source)
+
+    stats = records.stats()
+    if stats['rejected']:
+        print(f"⚠️ {stats['rejected']} of {stats['rows']} rows rejected, see {args.rejects}")
+    print("✅ Data successfully uploaded to Firebase Realtime Database!")
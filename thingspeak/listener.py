@@ -0,0 +1,200 @@
+import json
+import queue
+import threading
+import time
+
+import requests
+
+
+def added_children(event, last_key):
+    """(key, entry) pairs a listen() event adds after last_key, in key order
+
+    Each connection starts with a 'put' at '/' carrying the whole node; new
+    transactions then arrive as a 'put' at '/<key>'. Changes to a field of
+    an existing transaction ('/<key>/<field>') and deletions are ignored.
+    """
+    if event.event_type not in ('put', 'patch') or event.data is None:
+        return []
+    path = event.path.strip('/')
+    if not path:
+        if not isinstance(event.data, dict):
+            return []
+        children = [(key, entry) for key, entry in event.data.items()
+                    if entry is not None and (last_key is None or key > last_key)]
+        return sorted(children, key=lambda item: item[0])
+    if '/' in path or event.event_type != 'put':
+        return []
+    return [(path, event.data)] if last_key is None or path > last_key else []
+
+
+class Event:
+    """Same fields as firebase_admin.db.Event"""
+
+    def __init__(self, event_type, path, data):
+        self.event_type = event_type
+        self.path = path
+        self.data = data
+
+
+class RestStreamSource:
+    """Realtime Database REST stream on the transactions node, ordered by key
+
+    Each connection asks for orderBy="$key"&startAt=<last key>, so the
+    snapshot it starts with only holds what is new since the last key
+    instead of the whole history. token() returns an OAuth access token
+    and is called again on every reconnect.
+    """
+
+    def __init__(self, database_url, path, token=None, heartbeat_timeout=75.0):
+        self.url = f"{database_url.rstrip('/')}/{path.strip('/')}.json"
+        self.token = token
+        self.heartbeat_timeout = heartbeat_timeout
+
+    def listen(self, callback, after=None):
+        params = {'orderBy': '"$key"'}
+        if after is not None:
+            params['startAt'] = json.dumps(after)
+        if self.token is not None:
+            params['access_token'] = self.token()
+        response = requests.get(self.url, params=params, stream=True, timeout=(10, self.heartbeat_timeout),
+                                headers={'Accept': 'text/event-stream'})
+        response.raise_for_status()
+        return RestStreamHandle(response, callback, self.heartbeat_timeout)
+
+
+class RestStreamHandle:
+    """Reads server-sent events on a thread and hands put/patch events to the callback
+
+    The server sends a keep-alive event every 30 seconds or so; a stream
+    with no traffic for heartbeat_timeout counts as dead, as does one the
+    server cancelled or whose credentials were revoked.
+    """
+
+    def __init__(self, response, callback, heartbeat_timeout):
+        self.response = response
+        self.callback = callback
+        self.heartbeat_timeout = heartbeat_timeout
+        self.last_activity = time.time()
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name="rtdb-stream", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        event_type = None
+        data = []
+        try:
+            # chunk_size=None hands over data as it arrives instead of waiting for a full block
+            for line in self.response.iter_lines(chunk_size=None, decode_unicode=True):
+                self.last_activity = time.time()
+                if self.closed:
+                    return
+                if line.startswith('event:'):
+                    event_type = line[6:].strip()
+                elif line.startswith('data:'):
+                    data.append(line[5:].strip())
+                elif not line and event_type:
+                    if event_type in ('cancel', 'auth_revoked'):
+                        print(f"⚠️ Stream ended by the server: {event_type}")
+                        return
+                    if event_type in ('put', 'patch'):
+                        message = json.loads('\n'.join(data))
+                        self.callback(Event(event_type, message['path'], message['data']))
+                    event_type = None
+                    data = []
+        except Exception as e:
+            # close() from another thread also lands here; only report real failures
+            if not self.closed:
+                print(f"⚠️ Stream error: {str(e)}")
+        finally:
+            self.response.close()
+
+    def alive(self):
+        return (self.thread.is_alive() and not self.closed
+                and time.time() - self.last_activity < self.heartbeat_timeout)
+
+    def close(self):
+        self.closed = True
+        self.response.close()
+
+
+class TransactionListener:
+    """Child-added subscription on the transactions node feeding a local queue
+
+    source.listen(callback, after) opens a stream starting at key `after`
+    and returns a handle with alive() and close(). A supervisor thread
+    reconnects with exponential backoff whenever the stream dies, from the
+    last key seen; the snapshot each connection starts with is filtered
+    against that key too, so a reconnect resumes without gaps or
+    duplicates. With skip_existing the first snapshot only sets that key,
+    so history already in the node is not forwarded.
+    """
+
+    def __init__(self, source, last_key=None, skip_existing=False, maxsize=10000,
+                 check_interval=1.0, max_backoff=30.0):
+        self.source = source
+        self.last_key = last_key
+        self.skip_existing = skip_existing
+        self.queue = queue.Queue(maxsize)
+        self.check_interval = check_interval
+        self.max_backoff = max_backoff
+
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+        self.handle = None
+        self.connects = 0
+        self.received = 0
+        self.thread = threading.Thread(target=self._run, name="rtdb-listener", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def on_event(self, event):
+        with self.lock:
+            children = added_children(event, self.last_key)
+            if self.skip_existing and not event.path.strip('/'):
+                # First snapshot: remember where the node ends, forward nothing
+                self.skip_existing = False
+                if children:
+                    self.last_key = children[-1][0]
+                print(f"Starting after {self.last_key}")
+                return
+            if not children:
+                return
+            self.last_key = children[-1][0]
+            now = time.time()
+            for key, entry in children:
+                self.queue.put((key, entry, now))
+            self.received += len(children)
+
+    def _run(self):
+        backoff = 1.0
+        while not self.stop.is_set():
+            connected_at = time.time()
+            try:
+                self.handle = self.source.listen(self.on_event, self.last_key)
+                self.connects += 1
+                while not self.stop.is_set() and self.handle.alive():
+                    self.stop.wait(self.check_interval)
+                self.handle.close()
+            except Exception as e:
+                print(f"⚠️ Listener error: {str(e)}")
+            if self.stop.is_set():
+                break
+            if time.time() - connected_at > self.max_backoff:
+                backoff = 1.0
+            print(f"⚠️ Stream lost, reconnecting in {backoff:.0f}s (after {self.last_key})")
+            self.stop.wait(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def get(self, timeout=None):
+        """Next (key, entry, received_at); raises queue.Empty on timeout"""
+        return self.queue.get(timeout=timeout)
+
+    def close(self):
+        self.stop.set()
+        if self.handle is not None:
+            self.handle.close()
+
+    def stats(self):
+        return {'connects': self.connects, 'received': self.received,
+                'queued': self.queue.qsize(), 'last_key': self.last_key}
@@ -0,0 +1,59 @@
+import random
+import time
+
+PUSH_CHARS = "-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz"
+
+
+class PushKeyGenerator:
+    """Firebase-style push keys generated locally, without a round trip
+
+    Same layout as ref.push(): 8 characters of millisecond timestamp and 12
+    random ones. Keys made in the same millisecond increment the random
+    part instead of redrawing it, so they always sort in generation order.
+    """
+
+    def __init__(self):
+        self.last_time = 0
+        self.last_random = [0] * 12
+
+    def next_key(self, now_ms=None):
+        now = int(time.time() * 1000) if now_ms is None else now_ms
+        # Never go back in time, or keys would stop sorting in order
+        now = max(now, self.last_time)
+        if now == self.last_time:
+            for i in range(11, -1, -1):
+                if self.last_random[i] < 63:
+                    self.last_random[i] += 1
+                    break
+                self.last_random[i] = 0
+        else:
+            self.last_random = [random.randrange(64) for _ in range(12)]
+        self.last_time = now
+
+        time_chars = []
+        for _ in range(8):
+            time_chars.append(PUSH_CHARS[now % 64])
+            now //= 64
+        return ''.join(reversed(time_chars)) + ''.join(PUSH_CHARS[i] for i in self.last_random)
+
+
+def sequential_key(base_ms, salt, index):
+    """Push-style key for row index of a load started at base_ms
+
+    8 timestamp characters like ref.push(), then the 4-character salt of
+    the load and the row index in 8 characters. The same row always gets
+    the same key, so writing a chunk again overwrites it instead of adding
+    duplicates, and keys sort in row order after anything pushed earlier.
+    """
+    chars = []
+    for value, width in ((base_ms, 8), (index, 8)):
+        part = []
+        for _ in range(width):
+            part.append(PUSH_CHARS[value % 64])
+            value //= 64
+        chars.append(''.join(reversed(part)))
+    return chars[0] + salt + chars[1]
+
+
+def random_salt():
+    return ''.join(random.choice(PUSH_CHARS) for _ in range(4))
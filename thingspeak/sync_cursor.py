@@ -0,0 +1,51 @@
+import json
+import os
+import time
+
+
+class SyncCursor:
+    """Key of the last transaction forwarded to ThingSpeak, kept in a small JSON file
+
+    Firebase push keys sort in creation order, so the key alone marks how far
+    the sync got. The file is rewritten (temp file + os.replace) after every
+    accepted upload; a restart resumes right after it, and at most the one
+    upload in flight during a crash can be sent twice.
+    """
+
+    def __init__(self, path="sync_state.json"):
+        self.path = path
+        self.last_key = None
+        self.synced = 0
+        if os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            self.last_key = state.get('last_key')
+            self.synced = state.get('synced', 0)
+
+    def save(self, key, count=1):
+        self.last_key = key
+        self.synced += count
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'last_key': key, 'synced': self.synced, 'updated': time.time()}, f)
+        os.replace(tmp, self.path)
+
+
+def fetch_after(ref, last_key, limit):
+    """Up to limit (key, entry) pairs newer than last_key, oldest first
+
+    Only the requested range is downloaded, so the cost per call does not
+    depend on how many transactions the node already holds.
+    """
+    if last_key is None:
+        data = ref.order_by_key().limit_to_first(limit).get()
+    else:
+        # start_at is inclusive: ask for one extra and drop the cursor itself
+        data = ref.order_by_key().start_at(last_key).limit_to_first(limit + 1).get()
+    items = [(key, entry) for key, entry in (data or {}).items() if key != last_key]
+    return items[:limit]
+
+
+def latest_key(ref):
+    data = ref.order_by_key().limit_to_last(1).get()
+    return next(iter(data), None) if data else None
@@ -0,0 +1,210 @@
+import json
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Transactions are logged in Indian time without an offset
+LOCAL_TZ = timezone(timedelta(hours=5, minutes=30))
+
+THINGSPEAK_BASE_URL = "https://api.thingspeak.com"
+
+
+def created_at(entry, fallback=None):
+    """ISO timestamp for a transaction from its Date and Time columns"""
+    date = str(entry.get("Date", "")).strip()
+    clock = str(entry.get("Time", "")).strip()
+    try:
+        stamp = datetime.strptime(f"{date} {clock}", "%Y-%m-%d %H:%M:%S").replace(tzinfo=LOCAL_TZ)
+    except ValueError:
+        stamp = datetime.fromtimestamp(fallback or time.time(), LOCAL_TZ)
+    return stamp.isoformat()
+
+
+class TokenBucket:
+    """Allows rate requests per second on average, burst at once"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self, stop=None):
+        """Block until a token is available and take it; False if stop was set meanwhile"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                delay = (1 - self.tokens) / self.rate
+            if stop is None:
+                time.sleep(delay)
+            elif stop.wait(delay):
+                return False
+
+    def hold(self, seconds):
+        """Push the next token at least seconds out, e.g. after the server said 429"""
+        with self.lock:
+            self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+
+class BulkUploader:
+    """Sends queued transactions to ThingSpeak in bulk_update requests
+
+    A pooled requests.Session keeps one connection alive across requests,
+    and a token bucket spaces requests at the channel's allowed update
+    interval. Everything queued in between goes out together in the next
+    request, up to max_batch points, each stamped with its own created_at.
+    Connection errors, 429 and 5xx answers are retried with exponential
+    backoff; the batch stays at the head of the queue, so nothing is lost
+    or reordered. A batch ThingSpeak rejects for good (4xx) is appended to
+    rejects_path as JSON lines and skipped, so it is not retried forever.
+    fields(entry) maps a transaction to field1..field8 and
+    on_sent(last_key, count) runs after every batch that is done with,
+    count being the points ThingSpeak accepted (0 for a rejected batch).
+    """
+
+    def __init__(self, channel_id, api_key, fields, base_url=THINGSPEAK_BASE_URL, interval=15.0,
+                 max_batch=960, max_backoff=120.0, timeout=10.0, on_sent=None, rejects_path=None):
+        self.url = f"{base_url.rstrip('/')}/channels/{channel_id}/bulk_update.json"
+        self.api_key = api_key
+        self.fields = fields
+        self.max_batch = max_batch
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.on_sent = on_sent
+        self.rejects_path = rejects_path
+        # A little under the limit so jitter in request latency does not earn a 429
+        self.bucket = TokenBucket(1.0 / (interval * 1.05))
+
+        self.session = requests.Session()
+        self.session.mount(base_url, HTTPAdapter(pool_connections=1, pool_maxsize=2))
+
+        self.pending = deque()
+        self.cond = threading.Condition()
+        self.stop = threading.Event()
+        self.thread = None
+
+        self.points = 0
+        self.requests = 0
+        self.retries = 0
+        self.dropped = 0
+        self.started = time.time()
+
+    def payload(self, items):
+        updates = []
+        for key, entry, received_at in items:
+            update = {"created_at": created_at(entry, received_at)}
+            update.update(self.fields(entry))
+            updates.append(update)
+        return {"write_api_key": self.api_key, "updates": updates}
+
+    def reject(self, items, status, reason):
+        """Append a batch ThingSpeak will never accept to the reject log"""
+        self.dropped += len(items)
+        if not self.rejects_path:
+            return
+        rejected_at = time.time()
+        with open(self.rejects_path, 'a', encoding='utf-8') as f:
+            for key, entry, _ in items:
+                f.write(json.dumps({'key': key, 'status': status, 'reason': reason,
+                                    'rejected_at': rejected_at, 'entry': entry}) + "\n")
+
+    def send(self, items, have_token=False):
+        """Upload one batch of (key, entry, received_at), retrying transient failures
+
+        Returns the number of points accepted: len(items), or 0 if ThingSpeak
+        rejected the batch for good and it went to the reject log. None if
+        stop was set first, in which case the batch is still unsent.
+        """
+        body = self.payload(items)
+        backoff = 1.0
+        while not self.stop.is_set():
+            if not have_token and not self.bucket.wait(self.stop):
+                return None
+            have_token = False
+            self.requests += 1
+            try:
+                response = self.session.post(self.url, json=body, timeout=self.timeout)
+                status = response.status_code
+            except requests.RequestException as e:
+                status = None
+                print(f"⚠️ Bulk update failed: {str(e)}")
+            if status is not None and status < 300:
+                self.points += len(items)
+                return len(items)
+            if status is not None and status != 429 and status < 500:
+                reason = response.text.strip()[:200]
+                print(f"❌ Bulk update rejected ({status}): {reason}; "
+                      f"{len(items)} point(s) up to {items[-1][0]} skipped")
+                self.reject(items, status, reason)
+                return 0
+            if status == 429:
+                self.bucket.hold(backoff)
+            self.retries += 1
+            self.stop.wait(backoff * random.uniform(0.5, 1.0))
+            backoff = min(backoff * 2, self.max_backoff)
+        return None
+
+    def put(self, key, entry, received_at=None):
+        with self.cond:
+            self.pending.append((key, entry, received_at or time.time()))
+            self.cond.notify()
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="thingspeak-bulk", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stop.is_set():
+            # Wait for a token first so everything queued meanwhile joins this batch
+            if not self.bucket.wait(self.stop):
+                return
+            with self.cond:
+                self.cond.wait_for(lambda: self.pending or self.stop.is_set())
+                batch = [self.pending[i] for i in range(min(len(self.pending), self.max_batch))]
+            if not batch:
+                continue
+            accepted = self.send(batch, have_token=True)
+            with self.cond:
+                for _ in batch:
+                    self.pending.popleft()
+            if accepted is not None and self.on_sent:
+                self.on_sent(batch[-1][0], accepted)
+
+    def backlog(self):
+        return len(self.pending)
+
+    def close(self, timeout=None):
+        """Stop after the backlog drained, or right away once timeout passes"""
+        deadline = None if timeout is None else time.time() + timeout
+        while self.pending and self.thread is not None and self.thread.is_alive():
+            if deadline is not None and time.time() > deadline:
+                break
+            time.sleep(0.1)
+        self.stop.set()
+        with self.cond:
+            self.cond.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout=self.timeout)
+        self.session.close()
+
+    def stats(self):
+        minutes = max(time.time() - self.started, 1e-6) / 60
+        return {
+            'points': self.points,
+            'requests': self.requests,
+            'retries': self.retries,
+            'dropped': self.dropped,
+            'backlog': len(self.pending),
+            'points_per_min': round(self.points / minutes, 1)
+        }